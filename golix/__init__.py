@@ -30,11 +30,65 @@ golix: A python library for Golix protocol object manipulation.
 ------------------------------------------------------
 '''
 
-# Add in core module
-from .core import *
+# Everything here is loaded lazily, on first attribute access (PEP 562), so
+# that "import golix" doesn't pull in the entire crypto stack and build all
+# of the parsers up front. Accessing (for example) golix.Ghid only imports
+# what's needed for a Ghid.
+import importlib
+
+# Mirrors core.__all__, mapping each name onto the lightest-weight module 
+# that defines it.
+_lazy_names = {
+    'SecurityError': '.utils',
+    'ParseError': '.core',
+    'Ghid': '.utils',
+    'Secret': '.utils',
+    'FirstParty': '.core',
+    'SecondParty': '.core',
+    'ThirdParty': '.core',
+    'firstparty_factory': '.core',
+    'thirdparty_factory': '.core',
+    'load_second_parties': '.core',
+    'load_first_party': '.core',
+    'PackedObject': '._getlow'
+}
 
 # Submodules
-from . import _getlow
-from . import _spec
-from . import cipher
-from . import utils
\ No newline at end of file
+_lazy_submodules = {
+    '_getlow',
+    '_idfile',
+    '_layout',
+    'antientropy',
+    'chunking',
+    'cipher',
+    'core',
+    'inbox',
+    'metadata',
+    'packfile',
+    'pool',
+    'profile',
+    'utils',
+    'validation',
+    'vault'
+}
+
+__all__ = list(_lazy_names)
+
+
+def __getattr__(name):
+    if name in _lazy_names:
+        module = importlib.import_module(_lazy_names[name], __name__)
+        value = getattr(module, name)
+    elif name in _lazy_submodules:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            'module ' + repr(__name__) + ' has no attribute ' + repr(name)
+        )
+        
+    globals()[name] = value
+    return value
+    
+    
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | _lazy_submodules)
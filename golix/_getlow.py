@@ -40,23 +40,17 @@ __all__ = [
     'GOBS', 
     'GOBD', 
     'GDXX', 
-    'GARQ'
+    'GARQ',
+    'PackedObject'
 ]
 
 # Global dependencies
 import abc
-import collections
+import collections.abc
 
-from ._spec import _gidc
-from ._spec import _geoc
-from ._spec import _gobs
-from ._spec import _gobd
-from ._spec import _gdxx
-from ._spec import _garq
-from ._spec import _asym_hand
-from ._spec import _asym_ak
-from ._spec import _asym_nk
-from ._spec import _asym_else
+from smartyparse import ParseError
+
+from . import _layout
 
 # Accommodate SP
 from .utils import cipher_length_lookup
@@ -73,67 +67,152 @@ from .utils import Secret
 # ###############################################
 
 # ----------------------------------------------------------------------
-# This makes me feel a little dirty.
+# Packing and unpacking go through the compiled layouts in _layout, which
+# report field offsets directly. The signature and ghid are still assumed
+# to be the last fields of every object (and are located relative to the
+# end of the packed data); search for "# Accommodate SP" for places this
+# affects.
+
+
+# ###############################################
+# Helper objects and functions
+# ###############################################
 
-# We need to refactor once smartyparse is rewritten to modify the same
-# object continuously. Currently, smartyparse handles nested smartyparsers
-# as their own independent unit, so you can't register a callback on the
-# whole set of data. Which is a problem. Basically, nested SP's have no
-# awareness of their surrounding file context, so you can't do a callback
-# to pull in their context. So currently, you have to do it as a multi-pass
-# thingajobber.
 
-# This is a total hack-up job to bend the smartyparse library to my will,
-# until such time as it can be rewritten to support more powerful callback
-# syntax, and access to global pack_into data for nested smartyparsers,
-# as well as some other issues. This isn't *exactly* a monkeypatch, but
-# it's close enough that I'll go ahead and monkeypatch the definition of
-# the word monkeypatch to suit my needs. In other news, the MetaPolice are
-# coming for me, and I have no defense lawyer.
-        
-# Strategy for gratuitous duck-punching: 
-# 1. Declare a mutable caching object: []
-# 2. Generate a caching callback on the fly, referencing that object
-# 3. Register that callback on the fly as postpack on ghid, with modify=False
-# 4. That callback appends the ghid's offset to the cache object
-# 5. Register a second callback on the entire _control
-# 6. That callback uses the offset to rewrite the hash with an actual hash
-# 7. Rewrite signature using the length of the hash and the cached hash offset
+class PackedObject:
+    ''' An immutable, packed-and-signed low-level Golix object: its type
+    (eg GOBS), ghid, and packed bytes. Objects are content-addressed, so
+    these hash and compare by ghid alone, and can be shared between 
+    threads and caches without copying.
+    
+    Produced by pack_signature() and the frozen property of low-level 
+    objects. Anything accepting packed bytes for unpacking will also
+    accept a PackedObject.
+    '''
+    __slots__ = ('_type', '_ghid', '_packed', '_hash', '__weakref__')
+    
+    def __init__(self, type, ghid, packed):
+        ''' Checks that packed really is the object of the given type 
+        with the given ghid, raising SecurityError if it isn't.
+        '''
+        if type.unpack(packed).ghid != ghid:
+            raise SecurityError('Ghid does not match packed object.')
+        self._init(type, ghid, packed)
+        
+    @classmethod
+    def _trusted(cls, type, ghid, packed):
+        ''' Builds a PackedObject without re-verifying packed, for data 
+        that has just been packed (or unpacked and verified).
+        '''
+        self = cls.__new__(cls)
+        self._init(type, ghid, packed)
+        return self
+        
+    def _init(self, type, ghid, packed):
+        if not isinstance(packed, bytes):
+            packed = bytes(packed)
+        # Ghids are mutable, so only their bytes are kept (see ghid).
+        ghid = bytes(ghid)
+        object.__setattr__(self, '_type', type)
+        object.__setattr__(self, '_ghid', ghid)
+        object.__setattr__(self, '_packed', packed)
+        object.__setattr__(self, '_hash', hash(ghid))
+        
+    def __setattr__(self, name, value):
+        raise AttributeError('PackedObject is immutable.')
+        
+    def __delattr__(self, name):
+        raise AttributeError('PackedObject is immutable.')
+        
+    def __reduce__(self):
+        return PackedObject._trusted, (self._type, self._ghid, self._packed)
+        
+    @property
+    def type(self):
+        return self._type
+        
+    @property
+    def ghid(self):
+        ''' A new Ghid on every access, so that modifying it can't affect
+        the PackedObject.
+        '''
+        return Ghid.from_bytes(self._ghid)
+        
+    @property
+    def packed(self):
+        return self._packed
+        
+    def unpack(self):
+        ''' Unpacks into a new low-level object of the appropriate type,
+        without copying the packed bytes.
+        '''
+        return self._type.unpack(self)
+        
+    def __bytes__(self):
+        return self._packed
+        
+    def __len__(self):
+        return len(self._packed)
+        
+    def __hash__(self):
+        return self._hash
+        
+    def __eq__(self, other):
+        if not isinstance(other, PackedObject):
+            return NotImplemented
+        return self._ghid == other._ghid
+        
+    def __repr__(self):
+        return (
+            type(self).__name__ + '(' + 
+            'type=' + self._type.__name__ + ', '
+            'ghid=' + repr(self.ghid) + ', '
+            'packed=<' + str(len(self._packed)) + ' bytes>)'
+        )
 
-# For other places this affects, search for "# Accommodate SP"
-        
-# This gets called postpack with modify=True on ['ghid'], referencing
-# the _control object.
-def _generate_offset_cacher(cache, ghid_parser):
-    # Relies upon late-binding closures to access the correct offset
-    def offset_cacher(*args, **kwargs):
-        start = ghid_parser.offset + 1
-        cache.append(start)
-    return offset_cacher
 
-def _generate_ghid_rewriter(parent_smartyparser, addresser):
-    def ghid_rewriter(ghid):
-        size = parent_smartyparser['ghid'].length
-        section = slice(len(ghid) - size, None)
-        ghid[section] = addresser.create()
+# Small segments are cheaper to copy together than to send separately.
+_COALESCE_LIMIT = 4096
 
 
-# ###############################################
-# Helper objects and functions
-# ###############################################
+def _coalesce(segments):
+    ''' Yields segments, joining runs of small ones.
+    '''
+    pending = []
+    for segment in segments:
+        if len(segment) < _COALESCE_LIMIT:
+            pending.append(segment)
+            continue
+        if pending:
+            yield b''.join(pending)
+            pending = []
+        yield segment
+    if pending:
+        yield b''.join(pending)
 
 
-def _attempt_asym_unpack(data):
-    for fmt in (_asym_pr, _asym_ak, _asym_nk, _asym_else):
-        try:
-            result = fmt.unpack(data)
-            break
-        except parsers.ParseError:
-            pass
-    # This means unsuccessful iteration through all parsers
-    else:
-        raise parsers.ParseError('Improperly formed asymmetric payload.')
-    return result
+def _unpack_asym(data):
+    ''' Unpacks a (decrypted) asymmetric request payload, dispatching on
+    its magic instead of trial-parsing every payload type.
+    '''
+    view = memoryview(data)
+    magic = view[_ASYM_MAGIC].tobytes()
+    try:
+        cls = _ASYM_LOOKUP[magic]
+    except KeyError:
+        raise ParseError('Improperly formed asymmetric payload.') from None
+    return cls.unpack(data)
+    
+    
+def _load_control(obj, control):
+    ''' Loads a (possibly nested) dict, as produced by LAYOUT.unpack, 
+    into the underscored slots of obj.
+    '''
+    for name, value in control.items():
+        if isinstance(value, dict):
+            _load_control(obj, value)
+        else:
+            setattr(obj, '_' + name, value)
     
     
 def _typecheck_ghid(ghid):
@@ -149,7 +228,7 @@ def _typecheck_ghidlist(iterable):
     # Use None as a no-op
     if iterable is None:
         return True
-    elif not isinstance(iterable, collections.Iterable):
+    elif not isinstance(iterable, collections.abc.Iterable):
         return False
     for iterant in iterable:
         if not _typecheck_ghid(iterant):
@@ -167,19 +246,36 @@ class _GolixObjectBase(metaclass=abc.ABCMeta):
     dispatch. From there, the subclasses handle object creation, roughly
     equivalent to the object defs spat out by the smartyparsers.
     
-    Will this need a helper metaclass to do all of the callbacks for the
-    parse handling? Or should that be @staticmethod?
+    Objects are compact __slots__ classes: every field of the layout is
+    stored in the slot of the same name with a leading underscore (eg, 
+    body -> target is self._target), which lets LAYOUT build and read 
+    them directly.
     '''
+    __slots__ = (
+        '_address_algo', 
+        '_signed', 
+        '_packed', 
+        '_segments', 
+        '_sig_slice', 
+        '_magic', 
+        '_version', 
+        '_cipher', 
+        '_ghid', 
+        '_signature',
+        '_frozen'
+    )
     
     def __init__(self, version='latest', _control=None):   
         # Do this first to initialize state.
         self._address_algo = None
         self._signed = False
         self._packed = None
+        self._segments = None
+        self._frozen = None
         
         # If we're creating an object from an unpacked one, just load directly
         if _control:
-            self._control = _control
+            _load_control(self, _control)
             # This can cause issues if _control is misused.
             self._signed = True
             
@@ -190,72 +286,86 @@ class _GolixObjectBase(metaclass=abc.ABCMeta):
             version = self._handle_version(version)
             
             # All checks passed, go ahead and load the 
-            self._control = {
-                # This gets the value of the literal from the parser
-                'magic': self.PARSER['magic'].parser.value,
-                'version': version,
-                'cipher': None,
-                'body': {},
-                'ghid': None,
-                'signature': None
-            }
+            self._magic = self.LAYOUT.magic
+            self._version = version
+            self._cipher = None
+            self._ghid = None
+            self._signature = None
             
     def _handle_version(self, version):
         if version == 'latest':
-            version = self.PARSER.latest
-        if version not in self.PARSER.versions:
+            version = self.LAYOUT.latest
+        if version not in self.LAYOUT.versions:
             raise ValueError('Object version unavailable: ' + str(version))
         return version
         
     @property
     def packed(self):
         ''' Returns the packed object if and only if it has been packed
-        and signed.
+        and signed. For objects packed with pack_into, this is a read-only
+        memoryview into the caller's buffer (not bytes).
         '''
         if self._signed:
-            return self._packed
+            packed = self._packed
+            # Objects from pack() are assembled on first use.
+            if packed is None:
+                packed = b''.join(self._segments)
+                self._packed = packed
+                self._segments = None
+            return packed
         else:
             raise RuntimeError(
                 'Packed object unavailable until packed and signed.'
             )
         
+    @property
+    def frozen(self):
+        ''' Returns the packed object as an immutable PackedObject. Like
+        packed, only available once packed and signed (or unpacked).
+        '''
+        frozen = self._frozen
+        if frozen is None:
+            frozen = PackedObject._trusted(type(self), self.ghid, self.packed)
+            self._frozen = frozen
+        return frozen
+        
     @property
     def signature(self):
-        return self._control['signature']
+        return self._signature
         
     @signature.setter
     def signature(self, value):
-        self._control['signature'] = value
+        self._signature = value
         
     @property
     def ghid(self):
-        return self._control['ghid']
+        return self._ghid
         
     @ghid.setter
     def ghid(self, ghid):
         if not _typecheck_ghid(ghid):
             raise TypeError('Ghid must be type Ghid or similar.')
             
-        self._control['ghid'] = ghid
+        self._ghid = ghid
         
     @property
     def version(self):
-        return self._control['version']
+        return self._version
         
     @version.setter
     def version(self, value):
-        self._control['version'] = value
+        self._version = value
         
     @property
     def cipher(self):
-        if self._control['cipher'] != None:
-            return self._control['cipher']
+        if self._cipher != None:
+            return self._cipher
         else:
             raise RuntimeError('Cipher has not yet been defined.')
         
     @cipher.setter
     def cipher(self, value):
-        self._control['cipher'] = value
+        self._cipher = value
         
     @property
     def _addresser(self):
@@ -279,81 +389,155 @@ class _GolixObjectBase(metaclass=abc.ABCMeta):
         '''
         return cipher_length_lookup[self.cipher]['sig']
         
+    def packed_size(self, address_algo, cipher):
+        ''' Returns the length the object will have once packed with 
+        address_algo and cipher, computed from its field sizes without 
+        packing it (eg, to preallocate a buffer for pack_into).
+        '''
+        hash_lookup(address_algo)
+        return self.LAYOUT.size_from(self, cipher)
+        
     def pack(self, address_algo, cipher):
-        ''' Performs raw packing using the smartyparser in self.PARSER.
+        ''' Performs raw packing using the compiled layout in self.LAYOUT.
         Generates a GHID as well.
+        
+        The packed bytes aren't assembled until they're first needed
+        (see pack_signature and iter_segments).
+        '''
+        self._segments = self._pack_segments(address_algo, cipher)
+        
+    def pack_into(self, buffer, offset, address_algo, cipher):
+        ''' Like pack, but writes the object directly into buffer (eg, a
+        bytearray or writable mmap), starting at offset, so that large 
+        payloads are copied exactly once. pack_signature then signs the 
+        object in place, after which packed is a read-only view into 
+        buffer. Returns the packed size (see packed_size).
+        '''
+        segments = self._pack_segments(address_algo, cipher)
+        view = memoryview(buffer).cast('B')
+        size = sum(len(segment) for segment in segments)
+        if offset < 0 or offset + size > len(view):
+            raise ValueError('Buffer is too small to pack object into.')
+            
+        position = offset
+        for segment in segments:
+            end = position + len(segment)
+            view[position:end] = segment
+            position = end
+            
+        self._packed = view[offset:position]
+        self._sig_slice = slice(size - len(segments[-1]), size)
+        return size
+        
+    def _pack_segments(self, address_algo, cipher):
+        ''' Lays the object out as a list of segments (one per field; 
+        see _layout._Layout.segments_from) with a placeholder signature,
+        and generates the ghid.
         '''
         # Normal
         self.cipher = cipher
         self._address_algo = address_algo
+        self._frozen = None
+        self._signed = False
+        self._packed = None
+        self._segments = None
         
         # Accommodate SP
         # This is really simple and is hard-coding a reliance on the order
         # of signature and hash in relation to the rest of the formats.
         # It's quick and dirty but effective and less prone to bugs than fancy
         # things, especially with smartyparse not as reliable as I'd like.
-        sig_length = self._get_sig_length()
-        sig_padding = bytes(sig_length)
-        self.signature = sig_padding
+        self.signature = bytes(self._get_sig_length())
         hash_length = self._addresser.ADDRESS_LENGTH
-        ghid_padding = bytes(hash_length)
-        self.ghid = Ghid(self.address_algo, ghid_padding)
+        self.ghid = Ghid(self.address_algo, bytes(hash_length))
         
         # Normal
-        packed = self.PARSER.pack(self._control)
+        segments = self.LAYOUT.segments_from(self)
+        self._address(segments)
+        self.signature = None
+        return segments
         
-        # Accommodate SP
-        final_size = len(packed)
-        sig_slice = slice(
-            final_size - sig_length,
-            None
-        )
-        hash_slice = slice(
-            sig_slice.start - hash_length,
-            sig_slice.start
-        )
-        calc_slice = slice(
-            0,
-            hash_slice.start
+    def _address(self, segments):
+        ''' Hashes segments and backpatches the ghid. The ghid is the 
+        second-to-last field (right before the signature), and addresses
+        everything before it, including its own address algorithm byte.
+        '''
+        address = self._addresser.create_segmented(
+            segments[:-2] + [segments[-2][:1]]
         )
-        self._sig_slice = sig_slice
-        
-        # Hash the packed data, until the appropriate point, and then sign
-        # Conversion to bytes necessary for PyCryptoDome API
-        address = self._addresser.create(bytes(packed[calc_slice]))
-        packed[hash_slice] = address
         self.ghid = Ghid(self.address_algo, address)
-        
-        # Normal-ish, courtesy of above
-        self._packed = packed
-        self.signature = None
-        
-    def pack_signature(self, signature):
-        if not self._packed:
+        segments[-2] = bytes(self.ghid)
+        
+    def pack_signature(self, signature, freeze=True):
+        ''' Packs the signature, returning the signed object as a 
+        PackedObject (see frozen). With freeze=False, returns None, and 
+        nothing is copied: objects from pack() keep their segments (for 
+        iter_segments) until packed is first accessed, and objects from
+        pack_into() stay in the caller's buffer.
+        '''
+        segments = self._segments
+        if segments is not None:
+            if len(signature) != len(segments[-1]):
+                raise ValueError('Signature length does not match cipher.')
+            segments[-1] = signature
+        elif self._packed and not self._signed:
+            self._packed[self._sig_slice] = signature
+            # Signed objects are immutable.
+            self._packed = self._packed.toreadonly()
+            del self._sig_slice
+        else:
             raise RuntimeError(
                 'Signature cannot be packed without first calling pack().'
             )
+            
         self.signature = signature
-        self._packed[self._sig_slice] = signature
         self._signed = True
-        del self._sig_slice
+        if freeze:
+            return self.frozen
+        
+    def iter_segments(self):
+        ''' Returns an iterator over the packed (and signed) object as a 
+        series of bytes-like segments, for eg. socket.sendmsg or 
+        os.writev. Until packed is first accessed, objects from pack() 
+        yield their payloads without copying them (coalescing the small
+        fields around them); anything else yields a single segment.
+        '''
+        if not self._signed:
+            raise RuntimeError(
+                'Packed object unavailable until packed and signed.'
+            )
+            
+        segments = self._segments
+        if segments is None:
+            return iter((self._packed,))
+        return _coalesce(segments)
         
     @classmethod
-    def unpack(cls, data):
-        ''' Performs raw unpacking with the smartyparser in self.PARSER.
+    def _from_packed(cls, data):
+        ''' Builds the object directly from packed data via the compiled
+        layout, bypassing __init__. Returns (self, offsets).
         '''
-        # Accommodate SP
-        offset_cache = []
-        offset_cacher = _generate_offset_cacher(offset_cache, cls.PARSER['ghid'])
-        cls.PARSER['ghid'].register_callback('preunpack', offset_cacher)
-        
-        # Normal
-        unpacked = cls.PARSER.unpack(data)
-        self = cls(_control=unpacked)
+        self = cls.__new__(cls)
+        self._address_algo = None
+        self._signed = True
+        self._segments = None
+        if isinstance(data, PackedObject):
+            self._frozen = data
+            data = data.packed
+        else:
+            self._frozen = None
+        offsets = cls.LAYOUT.unpack_into(self, data)
         self._packed = memoryview(data)
+        return self, offsets
         
-        # Accommodate SP
-        address_offset = offset_cache.pop()
+    @classmethod
+    def unpack(cls, data):
+        ''' Performs raw unpacking with the compiled layout in self.LAYOUT.
+        '''
+        self, offsets = cls._from_packed(data)
+        
+        # Skip the address algorithm byte.
+        address_offset = offsets['ghid'] + 1
         address_data = self._packed[:address_offset].tobytes()
         
         # Normal-ish
@@ -363,12 +547,22 @@ class _GolixObjectBase(metaclass=abc.ABCMeta):
         return self
        
 
+# GIDC body fields -> key names used by cipher.py
+_GIDC_KEY_NAMES = {
+    'signature_key': 'signature',
+    'encryption_key': 'encryption',
+    'exchange_key': 'exchange'
+}
+       
+
 class GIDC(_GolixObjectBase):
     ''' Golix identity container.
     
     Low level object. In most cases, you don't want this.
     '''
-    PARSER = _gidc
+    LAYOUT = _layout.gidc
+    KIND = 'identity'
+    __slots__ = ('_signature_key', '_encryption_key', '_exchange_key')
     
     def __init__(self, 
                 signature_key=None, 
@@ -391,45 +585,45 @@ class GIDC(_GolixObjectBase):
         # This should never not be defined, but subclasses might screw with
         # that assumption.
         try:
-            return self._control['body']['signature_key']
-        except KeyError as e:
+            return self._signature_key
+        except AttributeError as e:
             raise AttributeError('Signature key not yet defined.') from e
             
     @signature_key.setter
     def signature_key(self, value):
         # DON'T implement a deleter, because without a payload, this is
         # meaningless. Use None for temporary payloads.
-        self._control['body']['signature_key'] = value
+        self._signature_key = value
         
     @property
     def encryption_key(self):
         # This should never not be defined, but subclasses might screw with
         # that assumption.
         try:
-            return self._control['body']['encryption_key']
-        except KeyError as e:
+            return self._encryption_key
+        except AttributeError as e:
             raise AttributeError('Encryption key not yet defined.') from e
             
     @encryption_key.setter
     def encryption_key(self, value):
         # DON'T implement a deleter, because without a payload, this is
         # meaningless. Use None for temporary payloads.
-        self._control['body']['encryption_key'] = value
+        self._encryption_key = value
         
     @property
     def exchange_key(self):
         # This should never not be defined, but subclasses might screw with
         # that assumption.
         try:
-            return self._control['body']['exchange_key']
-        except KeyError as e:
+            return self._exchange_key
+        except AttributeError as e:
             raise AttributeError('exchange key not yet defined.') from e
             
     @exchange_key.setter
     def exchange_key(self, value):
         # DON'T implement a deleter, because without a payload, this is
         # meaningless. Use None for temporary payloads.
-        self._control['body']['exchange_key'] = value
+        self._exchange_key = value
         
     def pack(self, *args, **kwargs):
         ''' Quick and dirty packing, which immediately sets self._signed
@@ -439,9 +633,52 @@ class GIDC(_GolixObjectBase):
         self._signed = True
         return result
         
+    def pack_into(self, *args, **kwargs):
+        ''' As with pack, GIDCs are signed as soon as they're packed.
+        '''
+        result = super().pack_into(*args, **kwargs)
+        self._packed = self._packed.toreadonly()
+        del self._sig_slice
+        self._signed = True
+        return result
+        
     def _get_sig_length(self):
         # Accommodate SP
         return 0
+        
+    @classmethod
+    def load_keys(cls, data):
+        ''' Fast path for loading identities. GIDCs are entirely fixed-
+        size for a given cipher, so this slices the keys directly from
+        their static offsets and verifies the ghid, without building a 
+        GIDC object.
+        
+        Returns (ghid, cipher, keys), where keys is a dict with 
+        "signature", "encryption", and "exchange" keys (as memoryviews,
+        or None for cipher 0).
+        '''
+        if isinstance(data, PackedObject):
+            data = data.packed
+        view = memoryview(data)
+        layout = cls.LAYOUT.peek(view)
+        if len(view) < layout.SIZE:
+            raise ParseError('Insufficient data for identity.')
+            
+        body_start = layout.slices['body'].start
+        keys = {}
+        for field in layout.codecs['body'].fields:
+            start = body_start + field.offset
+            keys[_GIDC_KEY_NAMES[field.name]], __ = field.codec.unpack(
+                view, start, start + field.codec.SIZE
+            )
+        
+        ghid_slice = layout.slices['ghid']
+        ghid, __ = _layout._GHID.unpack(view, ghid_slice.start, ghid_slice.stop)
+        # Skip the address algorithm byte.
+        address_data = view[:ghid_slice.start + 1].tobytes()
+        hash_lookup(ghid.algo).verify(ghid.address, address_data)
+        
+        return ghid, view[layout.slices['cipher'].start], keys
        
 
 class GEOC(_GolixObjectBase):
@@ -451,7 +688,9 @@ class GEOC(_GolixObjectBase):
     perform state management; simply transitions between encrypted bytes
     and unencrypted bytes.
     '''
-    PARSER = _geoc
+    LAYOUT = _layout.geoc
+    KIND = 'container'
+    __slots__ = ('_author', '_payload')
     
     def __init__(self, author=None, payload=None, _control=None, *args, **kwargs):
         ''' Generates GEOC object.
@@ -470,23 +709,23 @@ class GEOC(_GolixObjectBase):
         # This should never not be defined, but subclasses might screw with
         # that assumption.
         try:
-            return self._control['body']['payload']
-        except KeyError as e:
+            return self._payload
+        except AttributeError as e:
             raise AttributeError('Payload not yet defined.') from e
             
     @payload.setter
     def payload(self, value):
         # DON'T implement a deleter, because without a payload, this is
         # meaningless. Use None for temporary payloads.
-        self._control['body']['payload'] = value
+        self._payload = value
         
     @property
     def author(self):
         # This should never not be defined, but subclasses might screw with
         # that assumption.
         try:
-            return self._control['body']['author']
-        except KeyError as e:
+            return self._author
+        except AttributeError as e:
             raise AttributeError('Author not yet defined.') from e
             
     @author.setter
@@ -496,7 +735,7 @@ class GEOC(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Authors must be type Ghid or similar.')
             
-        self._control['body']['author'] = ghid
+        self._author = ghid
         
 
 class GOBS(_GolixObjectBase):
@@ -505,7 +744,9 @@ class GOBS(_GolixObjectBase):
     Low level object. In most cases, you don't want this. Does not
     perform state management.
     '''
-    PARSER = _gobs
+    LAYOUT = _layout.gobs
+    KIND = 'bind_static'
+    __slots__ = ('_binder', '_target')
     
     def __init__(self, binder=None, target=None, _control=None, *args, **kwargs):
         ''' Generates GOBS object.
@@ -522,8 +763,8 @@ class GOBS(_GolixObjectBase):
     @property
     def binder(self):
         try:
-            return self._control['body']['binder']
-        except KeyError as e:
+            return self._binder
+        except AttributeError as e:
             raise AttributeError('Binder not yet defined.') from e
             
     @binder.setter
@@ -531,13 +772,13 @@ class GOBS(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Binders must be type Ghid or similar.')
             
-        self._control['body']['binder'] = ghid
+        self._binder = ghid
         
     @property
     def target(self):
         try:
-            return self._control['body']['target']
-        except KeyError as e:
+            return self._target
+        except AttributeError as e:
             raise AttributeError('Target not yet defined.') from e
             
     @target.setter
@@ -545,7 +786,7 @@ class GOBS(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Targets must be type Ghid or similar.')
             
-        self._control['body']['target'] = ghid
+        self._target = ghid
         
 
 class GOBD(_GolixObjectBase):
@@ -554,7 +795,9 @@ class GOBD(_GolixObjectBase):
     Low level object. In most cases, you don't want this. Does not
     perform state management.
     '''
-    PARSER = _gobd
+    LAYOUT = _layout.gobd
+    KIND = 'bind_dynamic'
+    __slots__ = ('_binder', '_history', '_target', '_ghid_dynamic')
     
     def __init__(self, 
                 binder=None, 
@@ -579,8 +822,8 @@ class GOBD(_GolixObjectBase):
     @property
     def binder(self):
         try:
-            return self._control['body']['binder']
-        except KeyError as e:
+            return self._binder
+        except AttributeError as e:
             raise AttributeError('Binder not yet defined.') from e
             
     @binder.setter
@@ -588,13 +831,13 @@ class GOBD(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Binders must be type Ghid or similar.')
             
-        self._control['body']['binder'] = ghid
+        self._binder = ghid
         
     @property
     def target(self):
         try:
-            return self._control['body']['target']
-        except KeyError as e:
+            return self._target
+        except AttributeError as e:
             raise AttributeError('Targets not yet defined.') from e
             
     @target.setter
@@ -602,13 +845,13 @@ class GOBD(_GolixObjectBase):
         if not _typecheck_ghid(value):
             raise TypeError('Target must be type Ghid or similar.')
         
-        self._control['body']['target'] = value
+        self._target = value
         
     @property
     def ghid_dynamic(self):
         try:
-            return self._control['ghid_dynamic']
-        except KeyError as e:
+            return self._ghid_dynamic
+        except AttributeError as e:
             raise AttributeError('Dynamic address not yet defined.') from e
             
     @ghid_dynamic.setter
@@ -616,13 +859,13 @@ class GOBD(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Ghid_dynamic must be type Ghid or similar.')
             
-        self._control['ghid_dynamic'] = ghid
+        self._ghid_dynamic = ghid
         
     @property
     def history(self):
         try:
-            return self._control['body']['history']
-        except KeyError as e:
+            return self._history
+        except AttributeError as e:
             raise AttributeError('History not yet defined.') from e
             
     @history.setter
@@ -630,129 +873,52 @@ class GOBD(_GolixObjectBase):
         if not _typecheck_ghidlist(value):
             raise TypeError('History must be an iterable of Ghids or similar.')
 
-        self._control['body']['history'] = value
+        self._history = value
         
-    def pack(self, address_algo, cipher):
+    def _pack_segments(self, address_algo, cipher):
         ''' Overwrite super() to support dynamic address generation.
-        Awkward, largely violates Don'tRepeatYourself, but quickest way
-        to work around SmartyParse's current limitations.
         '''
-        # Normal
-        # First we need to check some things.
-        if self.history and self.ghid_dynamic:
-            # Accommodate SP
-            calculate_dynamic = False
-        # Normal
-        elif self.history or self.ghid_dynamic:
+        # History and dynamic address must both be defined, or neither.
+        if bool(self.history) != bool(self.ghid_dynamic):
             raise ValueError(
                 'History and dynamic address must both be defined, or '
                 'undefined. One cannot exist without the other.')
         # In this case, we need to prepare to generate a dynamic address
-        else:
+        elif not self.history:
             # Accommodate SP
-            calculate_dynamic = True
-            
-        # Normal
-        self.cipher = cipher
-        self._address_algo = address_algo
-        
-        # Accommodate SP
-        # This is really simple and is hard-coding a reliance on the order
-        # of signature and hash in relation to the rest of the formats.
-        # It's quick and dirty but effective and less prone to bugs than fancy
-        # things, especially with smartyparse not as reliable as I'd like.
-        sig_length = cipher_length_lookup[self.cipher]['sig']
-        sig_padding = bytes(sig_length)
-        self.signature = sig_padding
-        hash_length = self._addresser.ADDRESS_LENGTH
-        ghid_padding = bytes(hash_length)
-        self.ghid = Ghid(self.address_algo, ghid_padding)
-        
-        # Accommodate SP
-        if calculate_dynamic:
             self.history = []
-            self.ghid_dynamic = Ghid(self.address_algo, ghid_padding)
-        
-        # Normal
-        packed = self.PARSER.pack(self._control)
-        
-        # Accommodate SP
-        final_size = len(packed)
-        sig_slice = slice(
-            final_size - sig_length,
-            None
-        )
-        hash_slice_static = slice(
-            sig_slice.start - hash_length,
-            sig_slice.start
-        )
-        calc_slice_static = slice(
-            0,
-            hash_slice_static.start
-        )
-        hash_slice_dynamic = slice(
-            # Don't forget the extra byte for the address algo denotation
-            hash_slice_static.start - 1 - hash_length,
-            hash_slice_static.start - 1
-        )
-        calc_slice_dynamic = slice(
-            0,
-            hash_slice_dynamic.start
-        )
-        self._sig_slice = sig_slice
+            self.ghid_dynamic = Ghid(
+                address_algo, 
+                bytes(hash_lookup(address_algo).ADDRESS_LENGTH)
+            )
+            
+        return super()._pack_segments(address_algo, cipher)
         
-        if calculate_dynamic:
-            address_dynamic = self._addresser.create(
-                bytes(packed[calc_slice_dynamic])
+    def _address(self, segments):
+        ''' Overwrite super() to generate the dynamic address (for new 
+        bindings, ie without history) first. It directly precedes the 
+        static ghid, and addresses everything before it.
+        '''
+        if not self.history:
+            address_dynamic = self._addresser.create_segmented(
+                segments[:-3] + [segments[-3][:1]]
             )
-            packed[hash_slice_dynamic] = address_dynamic
             self.ghid_dynamic = Ghid(self.address_algo, address_dynamic)
-        
-        # Hash the packed data, until the appropriate point, and then sign
-        # Conversion to bytes necessary for PyCryptoDome API
-        address = self._addresser.create(bytes(packed[calc_slice_static]))
-        packed[hash_slice_static] = address
-        self.ghid = Ghid(self.address_algo, address)
-        
-        # Normal-ish, courtesy of above
-        self._packed = packed
-        self.signature = None
+            segments[-3] = bytes(self.ghid_dynamic)
+            
+        super()._address(segments)
         
     @classmethod
     def unpack(cls, data):
-        ''' Performs raw unpacking with the smartyparser in self.PARSER.
+        ''' Performs raw unpacking with the compiled layout in self.LAYOUT.
         '''
-        # Accommodate SP
-        offset_cache_static = []
-        offset_cacher_static = _generate_offset_cacher(
-            offset_cache_static, 
-            cls.PARSER['ghid']
-        )
-        cls.PARSER['ghid'].register_callback(
-            'preunpack', 
-            offset_cacher_static
-        )
-        
-        offset_cache_dynamic = []
-        offset_cacher_dynamic = _generate_offset_cacher(
-            offset_cache_dynamic, 
-            cls.PARSER['ghid_dynamic']
-        )
-        cls.PARSER['ghid_dynamic'].register_callback(
-            'preunpack', 
-            offset_cacher_dynamic
-        )
-        
-        # Normal
-        unpacked = cls.PARSER.unpack(data)
-        self = cls(_control=unpacked)
-        self._packed = memoryview(data)
+        self, offsets = cls._from_packed(data)
         
-        # Accommodate SP
-        address_offset_static = offset_cache_static.pop()
+        # Skip the address algorithm bytes.
+        address_offset_static = offsets['ghid'] + 1
         address_data_static = self._packed[:address_offset_static].tobytes()
         
-        address_offset_dynamic = offset_cache_dynamic.pop()
+        address_offset_dynamic = offsets['ghid_dynamic'] + 1
         address_data_dynamic = self._packed[:address_offset_dynamic].tobytes()
         
         # Verify the initial hash if history is undefined
@@ -775,7 +941,9 @@ class GDXX(_GolixObjectBase):
     Low level object. In most cases, you don't want this. Does not
     perform state management.
     '''
-    PARSER = _gdxx
+    LAYOUT = _layout.gdxx
+    KIND = 'debind'
+    __slots__ = ('_debinder', '_target')
     
     def __init__(self, debinder=None, target=None, _control=None, *args, **kwargs):
         ''' Generates GDXX object.
@@ -792,8 +960,8 @@ class GDXX(_GolixObjectBase):
     @property
     def debinder(self):
         try:
-            return self._control['body']['debinder']
-        except KeyError as e:
+            return self._debinder
+        except AttributeError as e:
             raise AttributeError('Debinder not yet defined.') from e
             
     @debinder.setter
@@ -801,13 +969,13 @@ class GDXX(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Debinder must be type Ghid or similar.')
 
-        self._control['body']['debinder'] = ghid
+        self._debinder = ghid
         
     @property
     def target(self):
         try:
-            return self._control['body']['target']
-        except KeyError as e:
+            return self._target
+        except AttributeError as e:
             raise AttributeError('Targets not yet defined.') from e
             
     @target.setter
@@ -815,7 +983,7 @@ class GDXX(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Target must be type Ghid or similar.')
 
-        self._control['body']['target'] = ghid
+        self._target = ghid
         
 
 class GARQ(_GolixObjectBase):
@@ -824,7 +992,9 @@ class GARQ(_GolixObjectBase):
     Low level object. In most cases, you don't want this. Does not
     perform state management.
     '''
-    PARSER = _garq
+    LAYOUT = _layout.garq
+    KIND = 'request'
+    __slots__ = ('_recipient', '_payload', '_author', '_plaintext')
     
     def __init__(self, recipient=None, payload=None, _control=None, *args, **kwargs):
         ''' Generates GARQ object.
@@ -844,8 +1014,8 @@ class GARQ(_GolixObjectBase):
     @property
     def recipient(self):
         try:
-            return self._control['body']['recipient']
-        except KeyError as e:
+            return self._recipient
+        except AttributeError as e:
             raise AttributeError('Recipient not yet defined.') from e
             
     @recipient.setter
@@ -853,18 +1023,18 @@ class GARQ(_GolixObjectBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Recipient must be type Ghid or similar.')
 
-        self._control['body']['recipient'] = ghid
+        self._recipient = ghid
         
     @property
     def payload(self):
         try:
-            return self._control['body']['payload']
-        except KeyError as e:
+            return self._payload
+        except AttributeError as e:
             raise AttributeError('Payload not yet defined.') from e
             
     @payload.setter
     def payload(self, value):
-        self._control['body']['payload'] = value
+        self._payload = value
         
     @property
     def author(self):
@@ -907,40 +1077,45 @@ class GARQ(_GolixObjectBase):
     # def pack(self, *args, **kwargs):
     #     ''' Initialize output of payload, and then call super.
     #     '''
-    #     self._control['body']['payload'] = self._payload_obj.pack()
+    #     self._payload = self._payload_obj.pack()
     #     super().pack(*args, **kwargs)
         
     # @classmethod
     # def unpack(cls, *args, **kwargs):
     #     obj = super().unpack(*args, **kwargs)
     #     # Automatically parse whichever payload is there
-    #     payload = _attempt_asym_unpack(obj._control['body']['payload'])
+    #     payload = _unpack_asym(obj._payload)
+        
+    @classmethod
+    def unpack(cls, data):
+        self = super().unpack(data)
+        self._author = None
+        return self
         
     def _get_sig_length(self):
         # Accommodate SP
         return cipher_length_lookup[self.cipher]['mac']
         
 
-class _AsymBase():
+class _AsymBase:
     ''' AsymBase class should handle all of the parsing/building 
     dispatch. From there, the subclasses handle object creation, roughly
     equivalent to the object defs spat out by the smartyparsers.
+    
+    As with _GolixObjectBase, fields are stored in underscored slots.
     '''
+    __slots__ = ('_author', '_magic', '_packed')
     
     def __init__(self, author=None, _control=None):
         # If we're creating an object from an unpacked one, just load directly
         if _control:
-            self._control = _control
+            _load_control(self, _control)
             
         # Creating from scratch. Now we have some actual work to do.
         else:            
             # All checks passed, go ahead and load the 
-            self._control = {
-                # This gets the value of the literal from the parser
-                'author': author,
-                'magic': self.PARSER['magic'].parser.value,
-                'payload': None
-            }
+            self._author = author
+            self._magic = self.LAYOUT.magic
         
     @property
     def packed(self):
@@ -954,31 +1129,32 @@ class _AsymBase():
         
     @property
     def author(self):
-        return self._control['author']
+        return self._author
         
     @author.setter
     def author(self, ghid):
         if not _typecheck_ghid(ghid):
             raise TypeError('Author must be type Ghid or similar.')
 
-        self._control['author'] = ghid
+        self._author = ghid
         
     @property
     def magic(self):
-        return self._control['magic']
+        return self._magic
         
     def pack(self):
-        ''' Performs raw packing using the smartyparser in self.PARSER.
+        ''' Performs raw packing using the compiled layout in self.LAYOUT.
         '''
-        self._packed = self.PARSER.pack(self._control)
+        self._packed = self.LAYOUT.pack_from(self)
         return self._packed
         
     @classmethod
     def unpack(cls, data):
-        ''' Performs raw unpacking with the smartyparser in self.PARSER.
+        ''' Performs raw unpacking with the compiled layout in self.LAYOUT,
+        building the object directly (bypassing __init__).
         '''
-        unpacked = cls.PARSER.unpack(data)
-        self = cls(_control=unpacked)
+        self = cls.__new__(cls)
+        cls.LAYOUT.unpack_into(self, data)
         self._packed = memoryview(data)
         
         return self
@@ -987,20 +1163,20 @@ class _AsymBase():
 class GARQHandshake(_AsymBase):
     ''' Asymmetric pipe request. Used as payload in GARQ objects.
     '''
-    PARSER = _asym_hand
+    LAYOUT = _layout.asym_hand
+    __slots__ = ('_target', '_secret')
     
     def __init__(self, target=None, secret=None, _control=None, *args, **kwargs):
         super().__init__(_control=_control, *args, **kwargs)
         if _control is None:
-            self._control['payload'] = {}
             self.target = target
             self.secret = secret
         
     @property
     def target(self):
         try:
-            return self._control['payload']['target']
-        except KeyError as e:
+            return self._target
+        except AttributeError as e:
             raise AttributeError('Target not yet defined.') from e
             
     @target.setter
@@ -1008,7 +1184,7 @@ class GARQHandshake(_AsymBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Target must be type Ghid or similar.')
 
-        self._control['payload']['target'] = ghid
+        self._target = ghid
             
     @property
     def secret(self):
@@ -1020,17 +1196,12 @@ class GARQHandshake(_AsymBase):
             raise TypeError('Can only assign secret as a Secret-like object.')
         else:
             self._secret = value
-            
-    def pack(self, *args, **kwargs):
-        self._control['payload']['target'] = self.target
-        self._control['payload']['secret'] = bytes(self.secret)
-        super().pack(*args, **kwargs)
         
     @classmethod
     def unpack(cls, *args, **kwargs):
         self = super().unpack(*args, **kwargs)
-        self._secret = Secret.from_bytes(self._control['payload']['secret'])
-        self._target = self._control['payload']['target']
+        # The layout unpacks the raw secret bytes into the slot.
+        self._secret = Secret.from_bytes(self._secret)
         
         return self
         
@@ -1039,20 +1210,20 @@ class GARQAck(_AsymBase):
     ''' Asymmetric pipe acknowledgement. 
     Used as payload in GARQ objects.
     '''
-    PARSER = _asym_ak
+    LAYOUT = _layout.asym_ak
+    __slots__ = ('_target', '_status')
     
     def __init__(self, target=None, status=0, _control=None, *args, **kwargs):
         super().__init__(_control=_control, *args, **kwargs)
         if _control is None:
-            self._control['payload'] = {}
             self.target = target
             self.status = status
         
     @property
     def target(self):
         try:
-            return self._control['payload']['target']
-        except KeyError as e:
+            return self._target
+        except AttributeError as e:
             raise AttributeError('Target not yet defined.') from e
             
     @target.setter
@@ -1060,7 +1231,7 @@ class GARQAck(_AsymBase):
         if not _typecheck_ghid(ghid):
             raise TypeError('Target must be type Ghid or similar.')
 
-        self._control['payload']['target'] = ghid
+        self._target = ghid
             
     @property
     def status(self):
@@ -1073,19 +1244,6 @@ class GARQAck(_AsymBase):
         # else:
         #     self._status = value
         self._status = value
-            
-    def pack(self, *args, **kwargs):
-        self._control['payload']['target'] = self.target
-        self._control['payload']['status'] = self.status
-        super().pack(*args, **kwargs)
-        
-    @classmethod
-    def unpack(cls, *args, **kwargs):
-        self = super().unpack(*args, **kwargs)
-        self._status = self._control['payload']['status']
-        self._target = self._control['payload']['target']
-        
-        return self
 
 
 class GARQNak(GARQAck):
@@ -1093,13 +1251,15 @@ class GARQNak(GARQAck):
     Used as payload in GARQ objects.
     Other than magic, identical to AsymAck.
     '''
-    PARSER = _asym_nk
+    LAYOUT = _layout.asym_nk
+    __slots__ = ()
 
 
 class GARQElse(_AsymBase):
     ''' Asymmetric arbitrary payload. Used as payload in GARQ objects.
     '''
-    PARSER = _asym_else
+    LAYOUT = _layout.asym_else
+    __slots__ = ('_payload',)
     
     def __init__(self, payload=None, _control=None, *args, **kwargs):
         super().__init__(_control=_control, *args, **kwargs)
@@ -1108,8 +1268,24 @@ class GARQElse(_AsymBase):
         
     @property
     def payload(self):
-        return self._control['payload']
+        return self._payload
         
     @payload.setter
     def payload(self, value):
-        self._control['payload'] = value
\ No newline at end of file
+        self._payload = value
+
+
+# Top-level objects by their magic number. Each object's KIND names the
+# matching unpack_<kind> method of cipher's object handlers.
+_OBJECT_LOOKUP = {
+    cls.LAYOUT.magic: cls 
+    for cls in (GIDC, GEOC, GOBS, GOBD, GDXX, GARQ)
+}
+
+
+# Every asymmetric payload starts with the author ghid, then the magic.
+_ASYM_MAGIC = _layout.asym_else.layout.slices['magic']
+_ASYM_LOOKUP = {
+    cls.LAYOUT.magic: cls 
+    for cls in (GARQHandshake, GARQAck, GARQNak, GARQElse)
+}
@@ -0,0 +1,291 @@
+'''
+Binary identity files (GIDF), for persisting FirstParties. Files hold 
+the private keys along with the packed GIDC, so that loading doesn't 
+need to regenerate (and re-pack, and re-hash) the second party. The 
+body may optionally be wrapped in a passphrase- or Secret-keyed 
+envelope (AES-256-CTR, then HMAC-SHA512 over the whole file).
+
+File layout
+-----
+
+    header      b'GIDF' + version (Int8) + cipher (Int8) + envelope (Int8)
+    salt        16 random bytes (enveloped files only)
+    kdf         log2(n) + r + p, all Int8 (passphrase envelopes only)
+    body        (possibly encrypted) gidc, signature key, encryption
+                key, exchange key, each as length (Int32) + data
+    mac         HMAC-SHA512 of everything before it (enveloped only)
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'ENVELOPE_NONE',
+    'ENVELOPE_PASSPHRASE',
+    'ENVELOPE_SECRET'
+]
+
+# Global dependencies
+import os
+import hmac
+import struct
+
+from cryptography.hazmat.primitives import ciphers
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.hazmat.backends import default_backend
+
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import Secret
+from .utils import SecurityError
+from .utils import _hkdf_sha512
+
+
+# ###############################################
+# Format constants
+# ###############################################
+
+
+_MAGIC = b'GIDF'
+_VERSION = 1
+
+ENVELOPE_NONE = 0
+ENVELOPE_PASSPHRASE = 1
+ENVELOPE_SECRET = 2
+
+_header = struct.Struct('>4sBBB')
+_kdf = struct.Struct('>BBB')
+_length = struct.Struct('>I')
+
+_SALT_LENGTH = 16
+_MAC_LENGTH = 64
+
+# scrypt cost. log2(n) is stored in the file, so this can be raised 
+# without breaking existing files.
+_SCRYPT_LOG_N = 14
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+# Files declare their own scrypt cost, before anything is authenticated.
+# Anything cheaper than the defaults is refused as a downgrade, and 
+# anything above these ceilings (or 1 GiB of memory) as a resource 
+# exhaustion attempt.
+_SCRYPT_MAX_LOG_N = 20
+_SCRYPT_MAX_R = 16
+_SCRYPT_MAX_P = 16
+_SCRYPT_MAX_MEMORY = 2 ** 30
+
+_KEY_NAMES = ('signature', 'encryption', 'exchange')
+_INFO_ENCRYPT = b'golix-identity-file-encrypt'
+_INFO_MAC = b'golix-identity-file-mac'
+
+
+# ###############################################
+# Envelopes
+# ###############################################
+
+
+def _envelope_keys(master, salt):
+    ''' Expands master keying material into (key, nonce, mac key). The 
+    salt is random per file, so reusing a passphrase or Secret never 
+    reuses a CTR keystream.
+    '''
+    encrypt = _hkdf_sha512(master, salt, _INFO_ENCRYPT)
+    return encrypt[:32], encrypt[32:48], _hkdf_sha512(master, salt, _INFO_MAC)
+    
+    
+def _check_scrypt_params(log_n, r, p):
+    ''' Rejects scrypt parameters outside the allowed range, before any
+    work is done with them.
+    '''
+    if not (_SCRYPT_LOG_N <= log_n <= _SCRYPT_MAX_LOG_N and
+            _SCRYPT_R <= r <= _SCRYPT_MAX_R and
+            _SCRYPT_P <= p <= _SCRYPT_MAX_P):
+        raise ParseError('Identity file scrypt parameters out of range.')
+    # scrypt needs 128 * r * n bytes.
+    if 128 * r * (2 ** log_n) > _SCRYPT_MAX_MEMORY:
+        raise ParseError('Identity file scrypt parameters out of range.')
+    
+    
+def _passphrase_master(passphrase, salt, log_n, r, p):
+    if isinstance(passphrase, str):
+        passphrase = passphrase.encode('utf-8')
+    kdf = Scrypt(
+        salt = salt,
+        length = 64,
+        n = 2 ** log_n,
+        r = r,
+        p = p,
+        backend = default_backend()
+    )
+    return kdf.derive(bytes(passphrase))
+    
+    
+def _secret_master(secret):
+    if not isinstance(secret, Secret):
+        raise TypeError('secret must be a Secret.')
+    return bytes(secret.key) + bytes(secret.seed)
+    
+    
+def _ctr(key, nonce, data):
+    worker = ciphers.Cipher(
+        ciphers.algorithms.AES(key),
+        ciphers.modes.CTR(nonce),
+        backend = default_backend()
+    ).encryptor()
+    return worker.update(data) + worker.finalize()
+    
+    
+# ###############################################
+# Dumping and loading
+# ###############################################
+
+
+def dump(cipher, gidc, private_keys, passphrase=None, secret=None):
+    ''' Builds an identity file. gidc is the packed GIDC, and 
+    private_keys is a dict of "signature", "encryption", and "exchange"
+    private keys as bytes (ie, FirstParty._serialize, sans ghid). At 
+    most one of passphrase and secret may be given.
+    '''
+    if passphrase is not None and secret is not None:
+        raise ValueError('Use a passphrase or a secret, not both.')
+        
+    chunks = [_length.pack(len(gidc)), bytes(gidc)]
+    for name in _KEY_NAMES:
+        key = bytes(private_keys[name])
+        chunks.append(_length.pack(len(key)))
+        chunks.append(key)
+    body = b''.join(chunks)
+    
+    if passphrase is None and secret is None:
+        return _header.pack(_MAGIC, _VERSION, cipher, ENVELOPE_NONE) + body
+        
+    salt = os.urandom(_SALT_LENGTH)
+    if passphrase is not None:
+        envelope = ENVELOPE_PASSPHRASE
+        params = _kdf.pack(_SCRYPT_LOG_N, _SCRYPT_R, _SCRYPT_P)
+        master = _passphrase_master(
+            passphrase, salt, _SCRYPT_LOG_N, _SCRYPT_R, _SCRYPT_P
+        )
+    else:
+        envelope = ENVELOPE_SECRET
+        params = b''
+        master = _secret_master(secret)
+        
+    key, nonce, mac_key = _envelope_keys(master, salt)
+    authenticated = b''.join((
+        _header.pack(_MAGIC, _VERSION, cipher, envelope),
+        salt,
+        params,
+        _ctr(key, nonce, body)
+    ))
+    return authenticated + hmac.digest(mac_key, authenticated, 'sha512')
+    
+    
+def peek(data):
+    ''' Checks the header of an identity file, returning (cipher, 
+    envelope).
+    '''
+    if len(data) < _header.size:
+        raise ParseError('Insufficient data for identity file header.')
+    magic, version, cipher, envelope = _header.unpack_from(data)
+    if magic != _MAGIC:
+        raise ParseError('Data is not a Golix identity file.')
+    elif version != _VERSION:
+        raise ParseError('Unsupported identity file version: ' + str(version))
+    elif envelope not in (ENVELOPE_NONE, ENVELOPE_PASSPHRASE, ENVELOPE_SECRET):
+        raise ParseError('Unknown identity file envelope: ' + str(envelope))
+    return cipher, envelope
+    
+    
+def load(data, passphrase=None, secret=None):
+    ''' Opens an identity file. Returns (cipher, gidc, private_keys, 
+    authenticated), where authenticated is True if the file's contents 
+    were verified by its envelope's MAC. Raises SecurityError if the 
+    passphrase or secret is wrong (or the file was tampered with).
+    '''
+    data = memoryview(data)
+    cipher, envelope = peek(data)
+    position = _header.size
+    
+    if envelope == ENVELOPE_NONE:
+        body = data[position:]
+        authenticated = False
+        
+    else:
+        if envelope == ENVELOPE_PASSPHRASE:
+            if passphrase is None:
+                raise ValueError('Identity file requires a passphrase.')
+            params_end = position + _SALT_LENGTH + _kdf.size
+        else:
+            if secret is None:
+                raise ValueError('Identity file requires a secret.')
+            params_end = position + _SALT_LENGTH
+            
+        if len(data) < params_end + _MAC_LENGTH:
+            raise ParseError('Insufficient data for identity file.')
+            
+        salt = data[position:position + _SALT_LENGTH].tobytes()
+        if envelope == ENVELOPE_PASSPHRASE:
+            params = _kdf.unpack_from(data, position + _SALT_LENGTH)
+            _check_scrypt_params(*params)
+            master = _passphrase_master(passphrase, salt, *params)
+        else:
+            master = _secret_master(secret)
+            
+        key, nonce, mac_key = _envelope_keys(master, salt)
+        mac_start = len(data) - _MAC_LENGTH
+        expected = hmac.digest(mac_key, data[:mac_start], 'sha512')
+        if not hmac.compare_digest(expected, data[mac_start:]):
+            raise SecurityError(
+                'Failed to authenticate identity file. Wrong passphrase or '
+                'secret?'
+            )
+        body = memoryview(_ctr(key, nonce, data[params_end:mac_start]))
+        authenticated = True
+        
+    fields = []
+    position = 0
+    for __ in range(1 + len(_KEY_NAMES)):
+        if position + _length.size > len(body):
+            raise ParseError('Insufficient data for identity file body.')
+        length, = _length.unpack_from(body, position)
+        position += _length.size
+        if position + length > len(body):
+            raise ParseError('Insufficient data for identity file body.')
+        fields.append(body[position:position + length].tobytes())
+        position += length
+        
+    gidc = fields[0]
+    private_keys = dict(zip(_KEY_NAMES, fields[1:]))
+    return cipher, gidc, private_keys, authenticated
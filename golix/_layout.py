@@ -0,0 +1,862 @@
+'''
+Compiled, static layouts for Golix objects. Each (object, version, cipher)
+combination is compiled once into a flat field layout, which is then
+cached and used directly for packing and unpacking.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# This is the only definition of the wire formats. They were originally 
+# smartyparse parsers (now kept as a reference in tests/_spec.py, 
+# which trashtest_layout checks these against), which reassign their 
+# version- and cipher-dependent children through callbacks on every 
+# single pack and unpack: both slow and not thread-safe. Since there are
+# only a handful of valid combinations, we instead resolve each one 
+# exactly once, into a static layout: field order, static offsets (where
+# knowable), fixed sizes, and length links.
+
+# Global dependencies
+import abc
+import struct
+
+from collections import namedtuple
+
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import Ghid
+from .utils import ADDRESS_ALGOS
+
+from .utils import _dummy_address
+from .utils import _dummy_asym
+from .utils import _dummy_mac
+from .utils import _dummy_signature
+from .utils import _dummy_pubkey
+
+
+# ###############################################
+# Field codecs
+# ###############################################
+
+
+class _Codec(metaclass=abc.ABCMeta):
+    ''' Packs and unpacks a single field. SIZE is the fixed length of
+    the field, or None if it must be determined by a length link or by
+    the data itself.
+    '''
+    SIZE = None
+    
+    @abc.abstractmethod
+    def pack(self, value):
+        ''' Returns bytes for value.
+        '''
+        pass
+        
+    def segment(self, value):
+        ''' Returns a bytes-like object for value. Unlike pack, this may
+        reference value instead of copying it.
+        '''
+        return self.pack(value)
+        
+    def size(self, value):
+        ''' Returns the packed length of value. Only called when SIZE is
+        None (or, for blobs, to check a fixed length); subclasses should
+        avoid packing to find out.
+        '''
+        return len(self.pack(value))
+        
+    @abc.abstractmethod
+    def unpack(self, view, start, end):
+        ''' Unpacks the field from memoryview view, starting at start.
+        If the end of the field is known (fixed size or linked length),
+        it is passed as end; otherwise end is None, and the codec must
+        delimit itself. Returns (value, end).
+        '''
+        pass
+        
+        
+class _Literal(_Codec):
+    ''' Constant bytes. With verify=False, packing ignores the passed 
+    value, and unpacking always returns None (same as parsers.Literal).
+    '''
+    def __init__(self, value, verify=True):
+        self.value = bytes(value)
+        self.verify = verify
+        self.SIZE = len(self.value)
+        
+    def pack(self, value):
+        if self.verify and value != self.value:
+            raise ParseError('Passed object does not match specified literal.')
+        return self.value
+        
+    def unpack(self, view, start, end):
+        if not self.verify:
+            return None, end
+            
+        received = view[start:end].tobytes()
+        if received != self.value:
+            raise ParseError(
+                'Mismatched literal: received ' + str(received) + 
+                ', expected ' + str(self.value)
+            )
+        return self.value, end
+        
+        
+class _UInt(_Codec):
+    ''' Big-endian unsigned integer.
+    '''
+    def __init__(self, fmt):
+        self._struct = struct.Struct('>' + fmt)
+        self.SIZE = self._struct.size
+        
+    def pack(self, value):
+        try:
+            return self._struct.pack(value)
+        except struct.error as e:
+            raise ParseError('Failed to pack integer: ' + repr(value)) from e
+            
+    def unpack(self, view, start, end):
+        return self._struct.unpack_from(view, start)[0], end
+        
+        
+class _Blob(_Codec):
+    ''' Binary blob, optionally of fixed length. Unpacks to a memoryview
+    (same as parsers.Blob), so that large payloads aren't copied.
+    '''
+    def __init__(self, length=None):
+        self.SIZE = length
+        
+    def _check(self, length):
+        if self.SIZE is not None and length != self.SIZE:
+            raise ParseError(
+                'Data length does not match fixed-length blob parser.'
+            )
+        
+    def pack(self, value):
+        # Also accepts anything with __bytes__ (eg, Secret).
+        if not isinstance(value, bytes):
+            value = bytes(value)
+        self._check(len(value))
+        return value
+        
+    def segment(self, value):
+        # Segments outlive the call (until the object is first joined, or
+        # indefinitely with pack_signature(freeze=False)), so only bytes
+        # and read-only memoryviews are referenced. Anything mutable (eg,
+        # a bytearray) is snapshotted, so later changes can't corrupt an
+        # already-addressed object.
+        if isinstance(value, bytes):
+            segment = value
+        elif isinstance(value, memoryview) and value.readonly:
+            segment = value.cast('B')
+        else:
+            segment = bytes(value)
+        self._check(len(segment))
+        return segment
+        
+    def size(self, value):
+        try:
+            size = memoryview(value).nbytes
+        except TypeError:
+            size = len(bytes(value))
+        self._check(size)
+        return size
+        
+    def unpack(self, view, start, end):
+        # Unlinked, variable-length blobs consume everything remaining.
+        if end is None:
+            end = len(view)
+        return view[start:end], end
+        
+        
+class _GhidCodec(_Codec):
+    ''' A single ghid, delimited by its address algorithm.
+    '''
+    def __init__(self):
+        # If every address algorithm has the same length (currently true),
+        # ghids are fixed-size, which makes most offsets static.
+        lengths = {algo.ADDRESS_LENGTH for algo in ADDRESS_ALGOS.values()}
+        if len(lengths) == 1:
+            self.SIZE = 1 + lengths.pop()
+        
+    def pack(self, value):
+        return bytes(value)
+        
+    def size(self, value):
+        return 1 + len(value.address)
+        
+    def unpack(self, view, start, end):
+        if start >= len(view):
+            raise ParseError('Insufficient data for ghid.')
+            
+        algo = view[start]
+        try:
+            length = ADDRESS_ALGOS[algo].ADDRESS_LENGTH
+        except KeyError as e:
+            raise ParseError('Improper hash algorithm declaration.') from e
+            
+        stop = start + 1 + length
+        if (end is not None and stop != end) or stop > len(view):
+            raise ParseError('Data length does not match ghid length.')
+            
+        # Algo zero is inoperative, so ignore whatever address it declared.
+        if algo == 0:
+            address = _dummy_address
+        else:
+            address = view[start + 1:stop].tobytes()
+        return Ghid(algo, address), stop
+        
+        
+class _GhidListCodec(_Codec):
+    ''' A (linked-length) run of ghids. Unpacks to a list.
+    '''
+    def pack(self, value):
+        return b''.join([bytes(ghid) for ghid in value])
+        
+    def size(self, value):
+        # Objects pack a missing history as an empty one.
+        if not value:
+            return 0
+        elif _GHID.SIZE is not None:
+            return _GHID.SIZE * len(value)
+        else:
+            return sum(_GHID.size(ghid) for ghid in value)
+        
+    def unpack(self, view, start, end):
+        ghids = []
+        while start < end:
+            # Ghids are self-delimiting, and must exactly fill the run.
+            ghid, start = _GHID.unpack(view, start, None)
+            ghids.append(ghid)
+        if start != end:
+            raise ParseError('Ghid list length does not match linked length.')
+        return ghids, end
+        
+
+_UINT8 = _UInt('B')
+_UINT16 = _UInt('H')
+_UINT32 = _UInt('I')
+_UINT64 = _UInt('Q')
+_GHID = _GhidCodec()
+_GHIDLIST = _GhidListCodec()
+_NULL = _Literal(b'', verify=False)
+
+
+# ###############################################
+# Layouts
+# ###############################################
+
+
+# link is the name of the (preceding) field holding this field's length in
+# bytes. offset is the field's static offset, or None if it follows any 
+# variable-length field.
+_Field = namedtuple('_Field', ['name', 'codec', 'link', 'offset'])
+
+
+class _Layout(_Codec):
+    ''' An ordered, static sequence of fields. Layouts are themselves
+    codecs, so they can be nested (eg, as an object's body).
+    
+    Length fields (ie, anything referenced by a link) are computed 
+    during packing and omitted from unpacked results.
+    '''
+    def __init__(self, specs):
+        ''' specs is an iterable of (name, codec, link).
+        '''
+        fields = []
+        offset = 0
+        for name, codec, link in specs:
+            fields.append(_Field(name, codec, link, offset))
+            if offset is not None and codec.SIZE is not None:
+                offset += codec.SIZE
+            else:
+                offset = None
+                
+        self.fields = tuple(fields)
+        self.SIZE = offset
+        # Static slices for every field with both a static offset and size
+        self.slices = {
+            field.name: slice(field.offset, field.offset + field.codec.SIZE)
+            for field in fields
+            if field.offset is not None and field.codec.SIZE is not None
+        }
+        self._lengths = {
+            field.link: field.name for field in fields 
+            if field.link is not None
+        }
+        self.codecs = {field.name: field.codec for field in fields}
+        
+    def __repr__(self):
+        return (
+            type(self).__name__ + '(' + 
+            ', '.join(field.name for field in self.fields) + ')'
+        )
+        
+    def pack(self, value):
+        return b''.join(self._segments(value.__getitem__, False))
+        
+    def size(self, value):
+        return self._size(value.__getitem__, False)
+        
+    def pack_from(self, source):
+        ''' Like pack, but reads every field from the attribute of source
+        named with a leading underscore (eg, source._target), flattening
+        any nested layouts.
+        '''
+        return b''.join(self.segments_from(source))
+        
+    def segments_from(self, source):
+        ''' Like pack_from, but returns a list of bytes-like segments,
+        one per (flattened) field, without joining them. Blob segments
+        reference the source's values instead of copying them.
+        '''
+        return self._segments(
+            lambda name: getattr(source, '_' + name), 
+            True
+        )
+        
+    def size_from(self, source):
+        ''' Returns the length pack_from(source) would have, computed 
+        from the field sizes alone.
+        '''
+        return self._size(
+            lambda name: getattr(source, '_' + name), 
+            True
+        )
+        
+    def _get(self, get, name, codec):
+        try:
+            return get(name)
+        except (KeyError, AttributeError) as e:
+            if not isinstance(codec, _Literal):
+                raise ParseError('Missing field: ' + name) from e
+            return None
+        
+    def _segments(self, get, flatten):
+        lengths = self._lengths
+        segments = []
+        placeholders = {}
+        for name, codec, link, __ in self.fields:
+            if name in lengths:
+                placeholders[name] = len(segments)
+                segments.append(None)
+                continue
+                
+            if flatten and isinstance(codec, _Layout):
+                packed = codec._segments(get, flatten)
+            else:
+                packed = [codec.segment(self._get(get, name, codec))]
+                    
+            if link is not None:
+                segments[placeholders[link]] = self.codecs[link].pack(
+                    sum(len(segment) for segment in packed)
+                )
+            segments.extend(packed)
+            
+        return segments
+        
+    def _size(self, get, flatten):
+        # Even fully fixed-size layouts are walked, for the blob checks.
+        size = 0
+        for name, codec, link, __ in self.fields:
+            if flatten and isinstance(codec, _Layout):
+                size += codec._size(get, flatten)
+            elif isinstance(codec, _Blob) and codec.SIZE is not None:
+                # Check fixed-length blobs the same way packing would. The
+                # signature isn't known until after packing, so unset ones
+                # are skipped.
+                try:
+                    value = get(name)
+                except (KeyError, AttributeError):
+                    value = None
+                if value is not None:
+                    codec.size(value)
+                size += codec.SIZE
+            elif codec.SIZE is not None:
+                size += codec.SIZE
+            else:
+                size += codec.size(self._get(get, name, codec))
+        return size
+        
+    def declared_size(self, view, start=0, lengths=None):
+        ''' Returns the total size declared by the data at start in view,
+        reading only its length fields (so the cost doesn't depend on the
+        size of the data), or None if that requires parsing (ie, there's
+        a self-delimiting field of unknown size). If lengths is a dict, 
+        it will be updated with the value of every length field.
+        '''
+        if self.SIZE is not None:
+            return self.SIZE
+            
+        linked = {}
+        position = start
+        for name, codec, link, __ in self.fields:
+            if link is not None:
+                size = linked[link]
+            elif isinstance(codec, _Layout):
+                size = codec.declared_size(view, position, lengths)
+                if size is None:
+                    return None
+            elif codec.SIZE is not None:
+                size = codec.SIZE
+            else:
+                return None
+                
+            if name in self._lengths:
+                if position + size > len(view):
+                    raise ParseError('Insufficient data for field: ' + name)
+                value, __ = codec.unpack(view, position, position + size)
+                linked[name] = value
+                if lengths is not None:
+                    lengths[name] = value
+                    
+            position += size
+            
+        return position - start
+        
+    def unpack(self, view, start, end, offsets=None):
+        ''' Like _Codec.unpack, returning a dict as the value. If offsets
+        is a dict, it will be updated with the start of every field.
+        '''
+        unpacked = {}
+        end = self._unpack(
+            view, start, end, offsets, unpacked.__setitem__, False
+        )
+        return unpacked, end
+        
+    def unpack_into(self, target, view, start, end, offsets=None):
+        ''' Like unpack, but assigns every field to the attribute of 
+        target named with a leading underscore, flattening any nested 
+        layouts. This lets __slots__ classes be built directly, without
+        an intermediate dict. Returns end.
+        '''
+        def store(name, value):
+            setattr(target, '_' + name, value)
+        return self._unpack(view, start, end, offsets, store, True)
+        
+    def _unpack(self, view, start, end, offsets, store, flatten):
+        if end is None:
+            limit = len(view)
+        else:
+            limit = end
+            
+        lengths = self._lengths
+        linked = {}
+        position = start
+        for name, codec, link, __ in self.fields:
+            if link is not None:
+                stop = position + linked[link]
+            elif codec.SIZE is not None:
+                stop = position + codec.SIZE
+            else:
+                stop = None
+                
+            if stop is not None and stop > limit:
+                raise ParseError('Insufficient data for field: ' + name)
+            if offsets is not None:
+                offsets[name] = position
+                
+            if flatten and isinstance(codec, _Layout):
+                position = codec._unpack(
+                    view, position, stop, None, store, flatten
+                )
+                continue
+                
+            value, position = codec.unpack(view, position, stop)
+            
+            if name in lengths:
+                linked[name] = value
+            else:
+                store(name, value)
+                
+        if position > limit:
+            raise ParseError('Insufficient data for layout.')
+            
+        # As with smartyparse, trailing data (within a linked length, or 
+        # after the end of the object) is ignored.
+        if end is None:
+            end = position
+        return end
+        
+        
+def _resolve(specs, cipher):
+    ''' Resolves any cipher-dependent codecs (given as a lookup dict) in
+    specs to the concrete codec for cipher.
+    '''
+    resolved = []
+    for name, codec, link in specs:
+        if isinstance(codec, dict):
+            try:
+                codec = codec[cipher]
+            except KeyError:
+                raise ParseError(
+                    'No matching cipher available: ' + str(cipher)
+                ) from None
+        resolved.append((name, codec, link))
+    return resolved
+    
+    
+_header = struct.Struct('>4sIB')
+
+
+class _ObjectFormat:
+    ''' All of the (version, cipher) layouts for a top-level Golix 
+    object, compiled on first use and cached.
+    '''
+    def __init__(self, magic, bodies, trailer):
+        ''' bodies maps version -> body specs, and trailer holds the 
+        specs following the body. Specs may use a dict of cipher -> 
+        codec in place of a codec.
+        '''
+        self.magic = magic
+        self.versions = frozenset(bodies)
+        self.latest = max(bodies)
+        self._magic = _Literal(magic)
+        self._bodies = bodies
+        self._trailer = trailer
+        self._layouts = {}
+        
+    def __repr__(self):
+        return type(self).__name__ + '(' + repr(self.magic) + ')'
+        
+    def layout(self, version, cipher):
+        ''' Returns the compiled layout for (version, cipher).
+        '''
+        try:
+            return self._layouts[version, cipher]
+        except KeyError:
+            pass
+            
+        try:
+            body = self._bodies[version]
+        except KeyError:
+            raise ParseError('No matching version number available.') from None
+        
+        layout = _Layout([
+            ('magic', self._magic, None),
+            ('version', _UINT32, None),
+            ('cipher', _UINT8, None),
+            ('body', _Layout(_resolve(body, cipher)), None)
+        ] + _resolve(self._trailer, cipher))
+        
+        # Compilation is deterministic, so if multiple threads race here,
+        # it doesn't matter which one wins.
+        return self._layouts.setdefault((version, cipher), layout)
+        
+    def pack(self, obj):
+        ''' Packs obj (a dict, per the layout) into a bytearray.
+        '''
+        layout = self.layout(obj['version'], obj['cipher'])
+        return bytearray(layout.pack(obj))
+        
+    def pack_from(self, obj):
+        ''' Packs obj (an object with underscored attributes per the 
+        layout; see _Layout.pack_from) into a bytearray.
+        '''
+        layout = self.layout(obj._version, obj._cipher)
+        return bytearray(layout.pack_from(obj))
+        
+    def segments_from(self, obj):
+        ''' Like pack_from, but returns the unjoined segments (see 
+        _Layout.segments_from).
+        '''
+        return self.layout(obj._version, obj._cipher).segments_from(obj)
+        
+    def size_from(self, obj, cipher):
+        ''' Returns the length obj would have if packed with cipher.
+        '''
+        return self.layout(obj._version, cipher).size_from(obj)
+        
+    def peek(self, view):
+        ''' Checks the header of memoryview view, returning the layout 
+        for the rest of it.
+        '''
+        if len(view) < _header.size:
+            raise ParseError('Insufficient data for object header.')
+            
+        magic, version, cipher = _header.unpack_from(view)
+        if magic != self.magic:
+            raise ParseError(
+                'Mismatched literal: received ' + str(magic) + 
+                ', expected ' + str(self.magic)
+            )
+        return self.layout(version, cipher)
+        
+    def declared_size(self, view, lengths=None):
+        ''' Checks the header of memoryview view, and returns the total
+        size the object declares (see _Layout.declared_size).
+        '''
+        return self.peek(view).declared_size(view, 0, lengths)
+        
+    def unpack(self, data):
+        ''' Unpacks data into (dict, offsets), where offsets maps field
+        names to their starting offsets within data.
+        '''
+        view = memoryview(data)
+        offsets = {}
+        unpacked, __ = self.peek(view).unpack(view, 0, None, offsets)
+        return unpacked, offsets
+        
+    def unpack_into(self, target, data):
+        ''' Unpacks data directly onto target's attributes (see 
+        _Layout.unpack_into). Returns the field offsets.
+        '''
+        view = memoryview(data)
+        offsets = {}
+        self.peek(view).unpack_into(target, view, 0, None, offsets)
+        return offsets
+        
+        
+class _PayloadFormat:
+    ''' A single, static layout for asymmetric request payloads, with
+    the same interface as _ObjectFormat.
+    '''
+    def __init__(self, magic, specs):
+        self.magic = magic
+        self.layout = _Layout(specs)
+        
+    def __repr__(self):
+        return type(self).__name__ + '(' + repr(self.magic) + ')'
+        
+    def pack(self, obj):
+        return bytearray(self.layout.pack(obj))
+        
+    def pack_from(self, obj):
+        return bytearray(self.layout.pack_from(obj))
+        
+    def unpack(self, data):
+        offsets = {}
+        unpacked, __ = self.layout.unpack(memoryview(data), 0, None, offsets)
+        return unpacked, offsets
+        
+    def unpack_into(self, target, data):
+        offsets = {}
+        self.layout.unpack_into(target, memoryview(data), 0, None, offsets)
+        return offsets
+        
+        
+# ###############################################
+# Cipher-dependent codecs
+# ###############################################
+
+
+_signatures = {
+    0: _Literal(_dummy_signature, verify=False),
+    1: _Blob(512),
+    2: _Blob(64)
+}
+
+_macs = {
+    0: _Literal(_dummy_mac, verify=False),
+    1: _Blob(64),
+    2: _Blob(64)
+}
+
+_asyms = {
+    0: _Literal(_dummy_asym, verify=False),
+    1: _Blob(512),
+    2: _Blob(286)
+}
+
+_pubkeys_sig = {
+    0: _Literal(_dummy_pubkey, verify=False),
+    1: _Blob(512),
+    2: _Blob(32)
+}
+
+_pubkeys_encrypt = {
+    0: _Literal(_dummy_pubkey, verify=False),
+    1: _Blob(512),
+    2: _Blob(32)
+}
+
+_pubkeys_exchange = {
+    0: _Literal(_dummy_pubkey, verify=False),
+    1: _Blob(32),
+    2: _Blob(32)
+}
+
+
+# ###############################################
+# Object formats
+# ###############################################
+
+
+gidc = _ObjectFormat(
+    magic = b'GIDC',
+    bodies = {
+        2: (
+            ('signature_key', _pubkeys_sig, None),
+            ('encryption_key', _pubkeys_encrypt, None),
+            ('exchange_key', _pubkeys_exchange, None),
+        )
+    },
+    trailer = (
+        ('ghid', _GHID, None),
+        ('signature', _NULL, None),
+    )
+)
+
+geoc = _ObjectFormat(
+    magic = b'GEOC',
+    bodies = {
+        14: (
+            ('author', _GHID, None),
+            ('len_payload', _UINT64, None),
+            ('payload', _Blob(), 'len_payload'),
+        )
+    },
+    trailer = (
+        ('ghid', _GHID, None),
+        ('signature', _signatures, None),
+    )
+)
+
+gobs = _ObjectFormat(
+    magic = b'GOBS',
+    bodies = {
+        6: (
+            ('binder', _GHID, None),
+            ('target', _GHID, None),
+        )
+    },
+    trailer = (
+        ('ghid', _GHID, None),
+        ('signature', _signatures, None),
+    )
+)
+
+gobd = _ObjectFormat(
+    magic = b'GOBD',
+    bodies = {
+        15: (
+            ('binder', _GHID, None),
+            ('history_length', _UINT16, None),
+            ('history', _GHIDLIST, 'history_length'),
+            ('target', _GHID, None),
+        )
+    },
+    trailer = (
+        ('ghid_dynamic', _GHID, None),
+        ('ghid', _GHID, None),
+        ('signature', _signatures, None),
+    )
+)
+
+gdxx = _ObjectFormat(
+    magic = b'GDXX',
+    bodies = {
+        9: (
+            ('debinder', _GHID, None),
+            ('target', _GHID, None),
+        )
+    },
+    trailer = (
+        ('ghid', _GHID, None),
+        ('signature', _signatures, None),
+    )
+)
+
+garq = _ObjectFormat(
+    magic = b'GARQ',
+    bodies = {
+        12: (
+            ('recipient', _GHID, None),
+            ('payload', _asyms, None),
+        )
+    },
+    trailer = (
+        ('ghid', _GHID, None),
+        ('signature', _macs, None),
+    )
+)
+
+# Lookup for top-level objects by their magic number.
+OBJECT_FORMATS = {
+    fmt.magic: fmt for fmt in (gidc, geoc, gobs, gobd, gdxx, garq)
+}
+
+
+# ###############################################
+# Asymmetric payload formats
+# ###############################################
+
+
+asym_hand = _PayloadFormat(
+    magic = b'HS',
+    specs = (
+        ('author', _GHID, None),
+        ('magic', _Literal(b'HS'), None),
+        ('payload_length', _UINT16, None),
+        ('payload', _Layout((
+            ('target', _GHID, None),
+            ('secret_length', _UINT8, None),
+            ('secret', _Blob(), 'secret_length'),
+        )), 'payload_length'),
+    )
+)
+
+asym_ak = _PayloadFormat(
+    magic = b'AK',
+    specs = (
+        ('author', _GHID, None),
+        ('magic', _Literal(b'AK'), None),
+        ('payload_length', _UINT16, None),
+        ('payload', _Layout((
+            ('target', _GHID, None),
+            ('status', _UINT32, None),
+        )), 'payload_length'),
+    )
+)
+
+asym_nk = _PayloadFormat(
+    magic = b'NK',
+    specs = (
+        ('author', _GHID, None),
+        ('magic', _Literal(b'NK'), None),
+        ('payload_length', _UINT16, None),
+        ('payload', _Layout((
+            ('target', _GHID, None),
+            ('status', _UINT32, None),
+        )), 'payload_length'),
+    )
+)
+
+asym_else = _PayloadFormat(
+    magic = b'\x00\x00',
+    specs = (
+        ('author', _GHID, None),
+        ('magic', _Literal(b'\x00\x00'), None),
+        ('payload_length', _UINT16, None),
+        ('payload', _Blob(), 'payload_length'),
+    )
+)
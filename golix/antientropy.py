@@ -0,0 +1,358 @@
+'''
+Merkle-tree anti-entropy, for keeping two replicas of a set of Golix 
+objects in sync without exchanging their full ghid lists.
+
+Ghids are bucketed by the leading bits of their address (which, being a
+hash, spreads them evenly), and the buckets form the leaves of a binary
+tree of fixed depth. Each bucket's digest is a hash of its sorted 
+contents, and each internal node's digest is a hash of its two 
+children's, so adding or removing a ghid only rehashes its bucket and 
+the nodes on its path to the root. (Unlike XOR-combined digests, which
+anyone able to choose ghids can cancel out, two different sets can only
+share a digest by a hash collision.)
+
+To find the symmetric difference with a remote tree, the root digests 
+are compared first; from there, only the children of nodes that differ
+are requested, several levels (stride) at a time, until the differing 
+buckets are found and their contents exchanged. This takes 
+depth / stride + 2 round trips, whatever the size of the sets (plus one
+for every further MAX_INDICES nodes, when that many differ at once).
+
+The transport is any callable that delivers a request (a tuple of 
+ints, bytes, and lists) to the remote MerkleTree's handle() method and
+returns the response. In-process, that's just remote.handle.
+
+Digests detect accidental divergence, not malicious peers: a peer can 
+always lie about its contents, and every object should be verified on 
+receipt regardless.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'MerkleTree'
+]
+
+# Global dependencies
+import hashlib
+import threading
+
+# Intrapackage dependencies
+from .utils import Ghid
+
+
+# ###############################################
+# Trees
+# ###############################################
+
+
+_DIGEST_SIZE = 32
+# Empty subtrees all share this digest, regardless of their position.
+_EMPTY_DIGEST = bytes(_DIGEST_SIZE)
+# The most node or bucket indices handle() will answer in one request. 
+# difference() splits larger requests into batches.
+MAX_INDICES = 4096
+
+
+def _bucket_hash(keys):
+    ''' Hashes the (unordered) contents of a bucket. Ghids are all the 
+    same length, so they can be concatenated unambiguously.
+    '''
+    h = hashlib.blake2b(digest_size=_DIGEST_SIZE, person=b'golix-ae-bucket')
+    for key in sorted(keys):
+        h.update(key)
+    return h.digest()
+    
+    
+def _node_hash(left, right):
+    return hashlib.blake2b(
+        left + right, 
+        digest_size = _DIGEST_SIZE, 
+        person = b'golix-ae-node'
+    ).digest()
+    
+    
+class MerkleTree:
+    ''' A Merkle tree over a set of ghids, maintained incrementally. 
+    Both sides of an exchange must use the same depth; 2 ** depth 
+    buckets should be comfortably more than the number of differences 
+    expected between replicas. All methods are threadsafe.
+    '''
+    
+    def __init__(self, ghids=(), depth=16):
+        if not 0 < depth <= 64:
+            raise ValueError('Depth must be between 1 and 64.')
+            
+        self._depth = depth
+        self._prefix_bytes = (depth + 7) // 8
+        self._prefix_shift = (self._prefix_bytes * 8) - depth
+        # One dict of node index -> digest per level, from the root down
+        # to the buckets. Empty nodes are omitted.
+        self._levels = [{} for __ in range(depth + 1)]
+        # Bucket index -> set of ghid bytes
+        self._buckets = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        
+        self.update(ghids)
+            
+    @property
+    def depth(self):
+        return self._depth
+        
+    @property
+    def digest(self):
+        ''' The root digest, which is equal for any two trees holding the
+        same ghids (regardless of the order they were added in).
+        '''
+        return self._node_digest(0, 0)
+        
+    def __len__(self):
+        return self._count
+        
+    def __contains__(self, ghid):
+        key = bytes(ghid)
+        index = self._bucket_index(key)
+        with self._lock:
+            bucket = self._buckets.get(index)
+            return bucket is not None and key in bucket
+        
+    def __iter__(self):
+        ''' Iterates over all ghids, in bucket order.
+        '''
+        with self._lock:
+            keys = [
+                key 
+                for index in sorted(self._buckets) 
+                for key in sorted(self._buckets[index])
+            ]
+        for key in keys:
+            yield Ghid.from_bytes(key)
+            
+    def _bucket_index(self, key):
+        # Skip the address algorithm byte.
+        prefix = int.from_bytes(key[1:1 + self._prefix_bytes], 'big')
+        return prefix >> self._prefix_shift
+        
+    def _node_digest(self, level, index):
+        return self._levels[level].get(index, _EMPTY_DIGEST)
+        
+    def _refresh(self, bucket_indices):
+        ''' Rehashes the given buckets, and then every node above them, 
+        one level at a time (so shared ancestors are only hashed once).
+        Must hold the lock.
+        '''
+        changed = {}
+        for index in bucket_indices:
+            bucket = self._buckets.get(index)
+            if bucket:
+                changed[index] = _bucket_hash(bucket)
+            else:
+                changed[index] = _EMPTY_DIGEST
+                
+        for level in range(self._depth, -1, -1):
+            nodes = self._levels[level]
+            for index, digest in changed.items():
+                if digest == _EMPTY_DIGEST:
+                    nodes.pop(index, None)
+                else:
+                    nodes[index] = digest
+            if not level:
+                break
+                
+            parents = {}
+            for index in {index >> 1 for index in changed}:
+                left = nodes.get(index << 1, _EMPTY_DIGEST)
+                right = nodes.get((index << 1) | 1, _EMPTY_DIGEST)
+                if left == right == _EMPTY_DIGEST:
+                    parents[index] = _EMPTY_DIGEST
+                else:
+                    parents[index] = _node_hash(left, right)
+            changed = parents
+            
+    def add(self, ghid):
+        ''' Adds ghid. Returns True if it was new.
+        '''
+        key = bytes(ghid)
+        index = self._bucket_index(key)
+        with self._lock:
+            bucket = self._buckets.setdefault(index, set())
+            if key in bucket:
+                return False
+            bucket.add(key)
+            self._count += 1
+            self._refresh((index,))
+            return True
+            
+    def update(self, ghids):
+        ''' Adds many ghids, rehashing each affected node only once.
+        '''
+        keys = [bytes(ghid) for ghid in ghids]
+        with self._lock:
+            changed = set()
+            for key in keys:
+                index = self._bucket_index(key)
+                bucket = self._buckets.setdefault(index, set())
+                if key not in bucket:
+                    bucket.add(key)
+                    self._count += 1
+                    changed.add(index)
+            self._refresh(changed)
+            
+    def discard(self, ghid):
+        ''' Removes ghid, if present. Returns True if it was removed.
+        '''
+        key = bytes(ghid)
+        index = self._bucket_index(key)
+        with self._lock:
+            bucket = self._buckets.get(index)
+            if bucket is None or key not in bucket:
+                return False
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[index]
+            self._count -= 1
+            self._refresh((index,))
+            return True
+            
+    # ###############################################
+    # Anti-entropy
+    # ###############################################
+    
+    def handle(self, request):
+        ''' Answers a request from a remote tree's difference(). 
+        Requests are one of:
+        
+        ('root',)                       -> (depth, root digest)
+        ('nodes', level, [indices])     -> [digest for each node]
+        ('buckets', [indices])          -> [[ghid bytes] for each bucket]
+        
+        Requests for more than MAX_INDICES indices are refused.
+        '''
+        kind = request[0]
+        if kind != 'root' and len(request[-1]) > MAX_INDICES:
+            raise ValueError(
+                'Too many indices in one request: ' + str(len(request[-1]))
+            )
+        with self._lock:
+            if kind == 'root':
+                return self._depth, self._node_digest(0, 0)
+                
+            elif kind == 'nodes':
+                __, level, indices = request
+                if not 0 <= level <= self._depth:
+                    raise ValueError('Invalid tree level: ' + str(level))
+                return [self._node_digest(level, index) for index in indices]
+                
+            elif kind == 'buckets':
+                __, indices = request
+                return [
+                    sorted(self._buckets.get(index, ())) 
+                    for index in indices
+                ]
+                
+            else:
+                raise ValueError('Unknown anti-entropy request: ' + repr(kind))
+                
+    @staticmethod
+    def _fetch(transport, request, indices):
+        ''' Sends request for indices, in batches of at most MAX_INDICES,
+        and returns the concatenated replies. Raises ValueError unless 
+        every reply has exactly one entry per index asked for.
+        '''
+        replies = []
+        for start in range(0, len(indices), MAX_INDICES):
+            batch = indices[start:start + MAX_INDICES]
+            reply = list(transport(request + (batch,)))
+            if len(reply) != len(batch):
+                raise ValueError(
+                    'Remote answered ' + str(len(reply)) + ' of ' + 
+                    str(len(batch)) + ' indices.'
+                )
+            replies.extend(reply)
+        return replies
+        
+    def difference(self, transport, stride=4):
+        ''' Computes the symmetric difference with a remote tree, reached
+        through transport (see the module docstring). Each round trip 
+        descends stride levels. Returns (missing here, missing there) as
+        two sets of ghids.
+        '''
+        if stride < 1:
+            raise ValueError('Stride must be positive.')
+            
+        depth, remote_root = transport(('root',))
+        if depth != self._depth:
+            raise ValueError(
+                'Remote tree depth ' + str(depth) + ' does not match ' + 
+                str(self._depth)
+            )
+        if remote_root == self.digest:
+            return set(), set()
+            
+        frontier = [0]
+        level = 0
+        while level < depth and frontier:
+            next_level = min(level + stride, depth)
+            shift = next_level - level
+            candidates = [
+                child 
+                for index in frontier 
+                for child in range(index << shift, (index + 1) << shift)
+            ]
+            remote = self._fetch(transport, ('nodes', next_level), candidates)
+            with self._lock:
+                frontier = [
+                    index 
+                    for index, digest in zip(candidates, remote)
+                    if digest != self._node_digest(next_level, index)
+                ]
+            level = next_level
+            
+        missing_here = set()
+        missing_there = set()
+        if not frontier:
+            return missing_here, missing_there
+            
+        remote = self._fetch(transport, ('buckets',), frontier)
+        with self._lock:
+            for index, remote_keys in zip(frontier, remote):
+                remote_keys = set(remote_keys)
+                local_keys = self._buckets.get(index, set())
+                missing_here.update(remote_keys - local_keys)
+                missing_there.update(local_keys - remote_keys)
+                
+        return (
+            {Ghid.from_bytes(key) for key in missing_here},
+            {Ghid.from_bytes(key) for key in missing_there}
+        )
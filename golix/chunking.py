@@ -0,0 +1,417 @@
+'''
+Chunked containers, for large payloads. Plaintext is split into chunks
+with a content-defined chunker, each chunk goes into its own GEOC (with
+its own Secret), and a manifest GEOC lists the chunks in order. Since 
+chunk boundaries depend only on nearby content, a small edit changes 
+only the chunks around it; passing the previous manifest to 
+make_chunked lets every other chunk be reused as-is.
+
+Chunking computes a rolling hash over a window of about 36 bytes: each
+byte is mapped through a fixed gear table, and the hash at a position 
+is the XOR of the last 32 table bytes, each shifted 9 bits further 
+than the one after it. Working on the whole buffer as one big integer,
+that takes five shift-and-XORs (in C) instead of a Python loop per 
+byte. A boundary falls just after a run of clear hash bits closed by a
+set one, so it only depends on nearby content. The chunker skips the
+first min_size bytes of every chunk, uses a longer (stricter) run until
+the chunk reaches avg_size and a shorter one afterwards (which keeps 
+chunk sizes close to the average, as in FastCDC), and cuts 
+unconditionally at max_size.
+
+Manifest layout
+-----
+
+    header      b'GCMF' + version (Int8) + cipher (Int8) + total 
+                length (Int64) + chunk count (Int32)
+    chunks      length (Int32) + SHA-512 of the plaintext chunk + chunk
+                ghid (65 bytes) + chunk Secret, for each chunk in order
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'ChunkRef',
+    'ChunkedContainer',
+    'Manifest',
+    'split_chunks',
+    'make_chunked',
+    'receive_manifest',
+    'receive_chunked'
+]
+
+# Global dependencies
+import hashlib
+import struct
+import collections
+
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import Ghid
+from .utils import Secret
+from .utils import SecurityError
+from .utils import _map_ordered
+from .utils import _secret_codecs
+
+
+# ###############################################
+# Chunking
+# ###############################################
+
+
+MIN_CHUNK = 64 * 1024
+AVG_CHUNK = 256 * 1024
+MAX_CHUNK = 1024 * 1024
+
+# This must never change: it determines where chunk boundaries fall, so
+# changing it would defeat reuse against every existing manifest.
+_GEAR = tuple(
+    int.from_bytes(
+        hashlib.sha512(b'golix-chunk-gear' + bytes([ii])).digest()[:8], 
+        'big'
+    )
+    for ii in range(256)
+)
+# Translation table taking every byte to the top byte of its gear value.
+_GEAR_BYTES = bytes(gear >> 56 for gear in _GEAR)
+# The hash XORs 32 taps, 9 bits apart, by doubling the taps 5 times.
+_TAP_SHIFTS = tuple(9 << doubling for doubling in range(5))
+# How many bytes before a position its hash depends on.
+_CONTEXT = (31 * 9 + 7) // 8
+# Translation table taking every hash byte to its low bit.
+_LOW_BIT = bytes(value & 1 for value in range(256))
+# Hash bits are computed this many positions at a time, so that the 
+# search can stop soon after the first match.
+_BLOCK = 64 * 1024
+
+
+def _runs(avg_size):
+    ''' Returns the (strict, loose) boundary patterns for avg_size: a run
+    of clear hash bits closed by a set one. Neither can overlap itself, 
+    so each matches once every 2 ** len(pattern) bytes on average, and 
+    neither can match a run of identical bytes (whose hash is constant).
+    Since loose is a suffix of strict, a match cuts at the same place 
+    whichever of the two found it.
+    '''
+    bits = max(avg_size.bit_length() - 1, 3)
+    strict = b'\x00' * (bits - 1) + b'\x01'
+    loose = b'\x00' * (bits - 3) + b'\x01'
+    return strict, loose
+    
+    
+def _hash_bits(data, lo, hi):
+    ''' Returns one byte (0 or 1) per position in data[lo:hi]: the low 
+    bit of the rolling hash of the window ending there.
+    '''
+    context = max(lo - _CONTEXT, 0)
+    taps = int.from_bytes(
+        data[context:hi].tobytes().translate(_GEAR_BYTES), 
+        'little'
+    )
+    for shift in _TAP_SHIFTS:
+        taps ^= taps << shift
+    # Shifting grows the integer by at most _CONTEXT bytes.
+    hashed = taps.to_bytes(hi - context + _CONTEXT, 'little')
+    return hashed[lo - context:hi - context].translate(_LOW_BIT)
+    
+    
+def _search(data, lo, hi, pattern):
+    ''' Returns the position just after the first match of pattern in 
+    the hash bits of data[lo:hi], or -1 if there is none.
+    '''
+    while True:
+        top = min(lo + _BLOCK, hi)
+        found = _hash_bits(data, lo, top).find(pattern)
+        if found >= 0:
+            return lo + found + len(pattern)
+        elif top >= hi:
+            return -1
+        # Matches may straddle blocks.
+        lo = top + 1 - len(pattern)
+    
+    
+def _find_boundary(data, start, end, min_size, avg_size, max_size, runs):
+    ''' Returns the end of the chunk starting at start. Chunks end just 
+    after the first match of the (rarer) strict pattern up to avg_size,
+    or of the loose pattern after it.
+    '''
+    if end - start <= min_size:
+        return end
+        
+    strict, loose = runs
+    origin = start + min_size
+    normal = min(start + avg_size, end)
+    stop = min(start + max_size, end)
+    
+    found = _search(data, origin, normal, strict)
+    if found >= 0:
+        return found
+        
+    # Loose matches may start before normal, but must end after it.
+    resume = max(normal + 1 - len(loose), origin)
+    found = _search(data, resume, stop, loose)
+    if found >= 0:
+        return found
+    return stop
+    
+    
+def split_chunks(data, min_size=MIN_CHUNK, avg_size=AVG_CHUNK, 
+                 max_size=MAX_CHUNK):
+    ''' Splits data into content-defined chunks. Returns a list of 
+    memoryviews into data, in order.
+    '''
+    if not 0 < min_size <= avg_size <= max_size:
+        raise ValueError(
+            'Chunk sizes must satisfy 0 < min_size <= avg_size <= max_size.'
+        )
+        
+    data = memoryview(data).cast('B')
+    runs = _runs(avg_size)
+    chunks = []
+    start = 0
+    end = len(data)
+    while start < end:
+        boundary = _find_boundary(
+            data, start, end, min_size, avg_size, max_size, runs
+        )
+        chunks.append(data[start:boundary])
+        start = boundary
+    return chunks
+
+
+# ###############################################
+# Manifests
+# ###############################################
+
+
+_MAGIC = b'GCMF'
+_VERSION = 1
+
+_header = struct.Struct('>4sBBQI')
+_entry = struct.Struct('>I64s65s')
+
+
+ChunkRef = collections.namedtuple(
+    'ChunkRef', 
+    ['length', 'digest', 'ghid', 'secret']
+)
+
+ChunkedContainer = collections.namedtuple(
+    'ChunkedContainer', 
+    ['manifest', 'secret', 'container', 'chunks']
+)
+
+
+class Manifest:
+    ''' The ordered list of chunks (as ChunkRefs) that make up a chunked
+    container, along with its total length.
+    '''
+    
+    def __init__(self, cipher, chunks):
+        self._cipher = cipher
+        self._chunks = tuple(chunks)
+        self._length = sum(chunk.length for chunk in self._chunks)
+        
+    @property
+    def cipher(self):
+        return self._cipher
+        
+    @property
+    def chunks(self):
+        return self._chunks
+        
+    def __len__(self):
+        ''' The total plaintext length.
+        '''
+        return self._length
+        
+    def __eq__(self, other):
+        if not isinstance(other, Manifest):
+            return NotImplemented
+        return self.cipher == other.cipher and self.chunks == other.chunks
+        
+    def __bytes__(self):
+        parts = [_header.pack(
+            _MAGIC, 
+            _VERSION, 
+            self._cipher, 
+            self._length, 
+            len(self._chunks)
+        )]
+        for chunk in self._chunks:
+            parts.append(_entry.pack(
+                chunk.length, 
+                chunk.digest, 
+                bytes(chunk.ghid)
+            ))
+            parts.append(bytes(chunk.secret))
+        return b''.join(parts)
+        
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        try:
+            magic, version, cipher, length, count = _header.unpack_from(data)
+        except struct.error as e:
+            raise ParseError('Insufficient data for manifest.') from e
+            
+        if magic != _MAGIC:
+            raise ParseError('Data is not a chunk manifest.')
+        elif version != _VERSION:
+            raise ParseError('Unsupported manifest version: ' + str(version))
+        elif cipher not in _secret_codecs:
+            raise ParseError('No matching cipher available: ' + str(cipher))
+            
+        secret_length = _secret_codecs[cipher].size
+        if len(data) != _header.size + (
+            count * (_entry.size + secret_length)):
+                raise ParseError('Manifest length does not match its count.')
+        
+        chunks = []
+        offset = _header.size
+        for __ in range(count):
+            chunk_length, digest, ghid = _entry.unpack_from(data, offset)
+            offset += _entry.size
+            secret = Secret.from_bytes(data[offset:offset + secret_length])
+            offset += secret_length
+            chunks.append(ChunkRef(
+                chunk_length, 
+                digest, 
+                Ghid.from_bytes(ghid), 
+                secret
+            ))
+            
+        self = cls(cipher, chunks)
+        if len(self) != length:
+            raise ParseError('Manifest length does not match its chunks.')
+        return self
+
+
+# ###############################################
+# Containers
+# ###############################################
+
+
+def make_chunked(first_party, plaintext, previous=None, workers=None, 
+                 min_size=MIN_CHUNK, avg_size=AVG_CHUNK, max_size=MAX_CHUNK):
+    ''' Splits plaintext into chunks, and makes a GEOC for each, plus a
+    manifest GEOC listing them. Chunks are encrypted and signed in 
+    parallel; workers is as in make_containers.
+    
+    If previous is the Manifest for an earlier version of the content, 
+    any chunk whose plaintext is unchanged is reused from it instead of
+    being re-encrypted. Identical chunks within plaintext are likewise
+    only stored once.
+    
+    Returns a ChunkedContainer of (manifest, manifest secret, manifest 
+    GEOC, list of new chunk GEOCs). Only the new chunks (and the 
+    manifest GEOC) need to be uploaded.
+    '''
+    known = {}
+    if previous is not None:
+        if previous.cipher != first_party.ciphersuite:
+            raise ValueError('Previous manifest uses a different cipher.')
+        for chunk in previous.chunks:
+            known[chunk.digest] = chunk
+    
+    digests = []
+    new_digests = []
+    new_secrets = []
+    new_plaintexts = []
+    for chunk in split_chunks(plaintext, min_size, avg_size, max_size):
+        digest = hashlib.sha512(chunk).digest()
+        digests.append(digest)
+        if digest not in known:
+            # Claim the digest now, so that duplicates within plaintext 
+            # resolve to the same chunk.
+            known[digest] = None
+            new_digests.append(digest)
+            new_secrets.append(first_party.new_secret())
+            new_plaintexts.append(chunk)
+            
+    geocs = first_party.make_containers(new_secrets, new_plaintexts, workers)
+    for digest, secret, chunk, geoc in zip(
+        new_digests, new_secrets, new_plaintexts, geocs):
+            known[digest] = ChunkRef(len(chunk), digest, geoc.ghid, secret)
+            
+    manifest = Manifest(
+        first_party.ciphersuite, 
+        (known[digest] for digest in digests)
+    )
+    secret = first_party.new_secret()
+    container = first_party.make_container(secret, bytes(manifest))
+    return ChunkedContainer(manifest, secret, container, geocs)
+    
+    
+def receive_manifest(first_party, author, secret, container):
+    ''' Verifies and decrypts a manifest GEOC, returning its Manifest.
+    '''
+    plaintext = first_party.receive_container(author, secret, container)
+    try:
+        manifest = Manifest.from_bytes(plaintext)
+    except ParseError as e:
+        raise SecurityError('Could not securely unpack manifest.') from e
+    if manifest.cipher != first_party.ciphersuite:
+        raise SecurityError('Manifest cipher does not match the author.')
+    return manifest
+    
+    
+def receive_chunked(first_party, author, manifest, containers, workers=None):
+    ''' Verifies, decrypts, and reassembles the chunks of manifest. 
+    containers must map chunk ghids to unpacked GEOCs (eg a dict). 
+    Chunks are decrypted in a pool of worker threads (default: cpu 
+    count). Returns the plaintext as bytes.
+    '''
+    unique = {}
+    for chunk in manifest.chunks:
+        unique.setdefault(chunk.digest, chunk)
+        
+    def receive(chunk):
+        plaintext = first_party.receive_container(
+            author, 
+            chunk.secret, 
+            containers[chunk.ghid]
+        )
+        if (len(plaintext) != chunk.length or 
+            hashlib.sha512(plaintext).digest() != chunk.digest):
+                raise SecurityError(
+                    'Chunk ' + str(chunk.ghid) + ' does not match manifest.'
+                )
+        return plaintext
+        
+    chunks = list(unique.values())
+    plaintexts = dict(zip(
+        (chunk.digest for chunk in chunks),
+        _map_ordered(receive, chunks, workers)
+    ))
+    return b''.join(plaintexts[chunk.digest] for chunk in manifest.chunks)
@@ -76,7 +76,10 @@ Some initial temporary thoughts:
 __all__ = [
     'FirstParty1', 
     'SecondParty1', 
-    'ThirdParty1'
+    'ThirdParty1',
+    'FirstParty2', 
+    'SecondParty2', 
+    'ThirdParty2'
 ]
 
 # Global dependencies
@@ -87,6 +90,7 @@ import abc
 import json
 import base64
 import os
+import types
 from warnings import warn
 
 from cryptography.hazmat.primitives import hashes
@@ -95,6 +99,9 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives import ciphers
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
 from cryptography.hazmat.primitives.kdf import hkdf
 from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.backends import default_backend
@@ -110,6 +117,11 @@ from .utils import Ghid
 from .utils import SecurityError
 from .utils import ADDRESS_ALGOS
 from .utils import Secret
+from .utils import cipher_length_lookup
+from .utils import _map_ordered
+from .utils import _map_unordered
+from .utils import _xor_bytes
+from .utils import _hkdf_sha512
 
 from .utils import AsymHandshake
 from .utils import AsymAck
@@ -132,33 +144,44 @@ from ._getlow import GARQ
 from ._getlow import GARQHandshake
 from ._getlow import GARQAck
 from ._getlow import GARQNak
+from ._getlow import _unpack_asym
+from ._getlow import _OBJECT_LOOKUP
+
+from .pool import IdentityPool
+from .validation import validate
+from . import _idfile
 
 # Some globals
 DEFAULT_ADDRESSER = 1
 DEFAULT_CIPHER = 1
 
 
-# Some utilities
-class _NoopSHA512(hashes.SHA512):
-    def __init__(self, noopdata, *args, **kwargs):
-        self.__data = noopdata
-        super().__init__(*args, **kwargs)
-        self.algorithm = self
-        
-    def copy(self):
-        ''' Total NOOP, because self cannot change.
-        '''
-        return self
-        
-    def update(self, data):
-        # Noop noop noop
-        pass
-        
-    def finalize(self):
-        # Yay we get to do something!
-        return self.__data
-    
-    
+class _hybridmethod:
+    ''' Like classmethod, except that when accessed through an instance,
+    the instance is passed instead of the class.
+    '''
+    def __init__(self, func):
+        self.__func__ = func
+        self.__doc__ = func.__doc__
+        
+    def __get__(self, instance, owner):
+        if instance is None:
+            return types.MethodType(self.__func__, owner)
+        return types.MethodType(self.__func__, instance)
+
+
+def _unpack_exact(golix_format, packed):
+    ''' Unpacks packed as golix_format, after checking (see 
+    golix.validation) that it's that kind of object and that its 
+    declared lengths exactly fill the data. Trailing data is rejected.
+    '''
+    if validate(packed) != golix_format.LAYOUT.magic:
+        raise ParseError(
+            'Packed data is not a ' + golix_format.__name__ + ' object.'
+        )
+    return golix_format.unpack(packed)
+
+
 class _IdentityBase(metaclass=abc.ABCMeta):
     def __init__(self, keys, ghid):
         self._ghid = ghid
@@ -204,29 +227,33 @@ class _IdentityBase(metaclass=abc.ABCMeta):
 class _ObjectHandlerBase(metaclass=abc.ABCMeta):
     ''' Base class for anything that needs to unpack Golix objects.
     '''
+    # validation.Limits applied by unpack_any. Even with None, declared
+    # lengths are still checked against the data.
+    limits = None
+    
     @staticmethod
     def unpack_identity(packed):
-        gidc = GIDC.unpack(packed)
+        gidc = _unpack_exact(GIDC, packed)
         return gidc
     
     @staticmethod
     def unpack_container(packed):
-        geoc = GEOC.unpack(packed)
+        geoc = _unpack_exact(GEOC, packed)
         return geoc
         
     @staticmethod
     def unpack_bind_static(packed):
-        gobs = GOBS.unpack(packed)
+        gobs = _unpack_exact(GOBS, packed)
         return gobs
         
     @staticmethod
     def unpack_bind_dynamic(packed):
-        gobd = GOBD.unpack(packed)
+        gobd = _unpack_exact(GOBD, packed)
         return gobd
         
     @staticmethod
     def unpack_debind(packed):
-        gdxx = GDXX.unpack(packed)
+        gdxx = _unpack_exact(GDXX, packed)
         return gdxx
         
     @staticmethod
@@ -238,30 +265,57 @@ class _ObjectHandlerBase(metaclass=abc.ABCMeta):
         pass
         
     def unpack_any(self, packed):
-        ''' Try to unpack using any available parser.
-        Raises TypeError if no parser is found.
-        '''
-        for parser in (self.unpack_identity, 
-                        self.unpack_container,
-                        self.unpack_bind_static,
-                        self.unpack_bind_dynamic,
-                        self.unpack_debind,
-                        self.unpack_request):
-            try:
-                obj = parser(packed)
-            # Hm, don't really like this.
-            except (ParseError, TypeError):
-                pass
-            else:
-                break
-        else:
-            raise ParseError(
-                'Packed data does not appear to be a Golix object.'
-            )
-        return obj
+        ''' Unpacks any Golix object, dispatching on its magic number. 
+        The data is first checked against self.limits (see 
+        golix.validation), so malformed or oversized input is rejected
+        before it's parsed, hashed, or decrypted. Raises ParseError if 
+        the data isn't a valid Golix object.
+        '''
+        magic = validate(packed, self.limits)
+        kind = _OBJECT_LOOKUP[magic].KIND
+        return getattr(self, 'unpack_' + kind)(packed)
     
     
+def _lazy_key(name):
+    ''' Generates a property for a second party's public key. Second 
+    parties loaded with lazy=True hold raw GIDC key material until the 
+    first time any of their keys are used.
+    '''
+    def fget(self):
+        try:
+            return self._keys[name]
+        except AttributeError:
+            pass
+        # Racing threads will decode equivalent keys, so this is harmless.
+        keys = self._unpack_keys(self._raw_keys)
+        self._keys = keys
+        return keys[name]
+        
+    def fset(self, value):
+        try:
+            keys = self._keys
+        except AttributeError:
+            keys = self._keys = {}
+        keys[name] = value
+        
+    return property(fget, fset)
+    
+
 class _SecondPartyBase(metaclass=abc.ABCMeta):
+    _signature_key = _lazy_key('signature')
+    _encryption_key = _lazy_key('encryption')
+    _exchange_key = _lazy_key('exchange')
+    
+    @classmethod
+    def _from_raw_keys(cls, raw_keys, ghid):
+        ''' Creates a secondparty whose keys are decoded from raw_keys on
+        first use.
+        '''
+        self = cls.__new__(cls)
+        self._ghid = ghid
+        self._raw_keys = raw_keys
+        return self
+        
     @classmethod
     def from_keys(cls, keys, address_algo):
         ''' Creates a secondparty from unpacked keys -- DON'T use this
@@ -303,15 +357,34 @@ class _SecondPartyBase(metaclass=abc.ABCMeta):
         return self
         
     @classmethod
-    def from_packed(cls, packed):
+    def from_packed(cls, packed, lazy=False):
         ''' Loads a packed gidc into a SecondParty. Also does not select
         the correct SecondParty for the packed gidc's ciphersuite.
+        
+        If lazy=True, the public keys are kept raw until first use.
+        '''
+        ghid, cipher, raw_keys = GIDC.load_keys(packed)
+        return cls._from_loaded(packed, ghid, raw_keys, lazy)
+        
+    @classmethod
+    def _from_loaded(cls, packed, ghid, raw_keys, lazy):
+        ''' Finishes from_packed, given the output of GIDC.load_keys.
         '''
-        gidc = _ObjectHandlerBase.unpack_identity(packed)
-        self = cls.from_identity(gidc)
+        if lazy:
+            self = cls._from_raw_keys(raw_keys, ghid)
+        else:
+            self = cls(keys=cls._unpack_keys(raw_keys), ghid=ghid)
         self.packed = packed
         return self
         
+    @classmethod
+    def from_packed_many(cls, packeds, lazy=True):
+        ''' Loads many packed gidcs (for example, a directory of 
+        identities) into a list of SecondParties. Keys are kept raw 
+        until first use, unless lazy=False.
+        '''
+        return [cls.from_packed(packed, lazy=lazy) for packed in packeds]
+        
     @classmethod
     @abc.abstractmethod
     def _pack_keys(cls, keys):
@@ -331,6 +404,9 @@ class _SecondPartyBase(metaclass=abc.ABCMeta):
         
 class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
     DEFAULT_ADDRESS_ALGO = DEFAULT_ADDRESSER
+    # Optional mapping of container ghid -> Secret (eg a SecretVault),
+    # used by receive_container to resolve secrets by ghid.
+    vault = None
     
     def __init__(self, keys=None, ghid=None, address_algo='default', *args, **kwargs):
         self.address_algo = self._dispatch_address(address_algo)
@@ -389,7 +465,8 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         geoc.payload = self._encrypt(secret, plaintext)
         geoc.pack(cipher=self.ciphersuite, address_algo=self.address_algo)
         signature = self._sign(geoc.ghid.address)
-        geoc.pack_signature(signature)
+        # Leave the payload unjoined, in case it's sent with iter_segments.
+        geoc.pack_signature(signature, freeze=False)
         return geoc
         
     def make_bind_static(self, target):        
@@ -424,6 +501,139 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         gdxx.pack_signature(signature)
         return gdxx
         
+    def make_containers(self, secrets, plaintexts, workers=None):
+        ''' Batch version of make_container. Secrets and plaintexts 
+        must be the same length, and are matched pairwise. Encrypts, 
+        packs, and hashes everything in parallel first, and then signs 
+        in parallel.
+        Returns GEOCs in input order. Use workers=1 to sign serially, or
+        an IdentityPool to sign across processes.
+        '''
+        secrets = list(secrets)
+        plaintexts = list(plaintexts)
+        if len(secrets) != len(plaintexts):
+            raise ValueError('Must have exactly one secret per plaintext.')
+            
+        for secret in secrets:
+            if not self._typecheck_secret(secret):
+                raise TypeError(
+                    'Secret must be a properly-formatted Secret compatible '
+                    'with the current identity\'s declared ciphersuite.'
+                )
+                
+        # Encryption and hashing release the GIL (for all but the 
+        # smallest payloads), so they also go through the thread pool.
+        if isinstance(workers, IdentityPool):
+            threads = None
+        else:
+            threads = workers
+        geocs = _map_ordered(
+            self._seal_container, 
+            zip(secrets, plaintexts), 
+            threads
+        )
+        return self._sign_many(geocs, workers)
+        
+    def _seal_container(self, item):
+        ''' Encrypts, packs, and hashes (but does not sign) a GEOC from a
+        (secret, plaintext) pair.
+        '''
+        secret, plaintext = item
+        geoc = GEOC(author=self.ghid)
+        geoc.payload = self._encrypt(secret, plaintext)
+        geoc.pack(cipher=self.ciphersuite, address_algo=self.address_algo)
+        return geoc
+        
+    def make_binds_static(self, targets, workers=None):
+        ''' Batch version of make_bind_static. Packs and hashes all of 
+        the bindings first, and then signs them in parallel. Returns 
+        GOBS in input order. Use workers=1 to sign serially, or an 
+        IdentityPool to sign across processes.
+        '''
+        bindings = []
+        for target in targets:
+            gobs = GOBS(
+                binder = self.ghid,
+                target = target
+            )
+            gobs.pack(cipher=self.ciphersuite, address_algo=self.address_algo)
+            bindings.append(gobs)
+            
+        return self._sign_many(bindings, workers)
+        
+    def make_binds_dynamic(self, targets, ghids_dynamic=None, histories=None, 
+                            workers=None):
+        ''' Batch version of make_bind_dynamic. If passed, ghids_dynamic 
+        and histories must be matched pairwise with targets; otherwise, 
+        every binding gets a brand new dynamic address. Returns GOBD in 
+        input order. Use workers=1 to sign serially, or an IdentityPool 
+        to sign across processes.
+        '''
+        targets = list(targets)
+        if ghids_dynamic is None:
+            ghids_dynamic = [None] * len(targets)
+        else:
+            ghids_dynamic = list(ghids_dynamic)
+        if histories is None:
+            histories = [None] * len(targets)
+        else:
+            histories = list(histories)
+            
+        if not len(targets) == len(ghids_dynamic) == len(histories):
+            raise ValueError(
+                'Targets, ghids_dynamic, and histories must all be the same '
+                'length.'
+            )
+        
+        bindings = []
+        for target, ghid_dynamic, history in zip(
+            targets, ghids_dynamic, histories):
+                gobd = GOBD(
+                    binder = self.ghid,
+                    target = target,
+                    ghid_dynamic = ghid_dynamic,
+                    history = history
+                )
+                gobd.pack(
+                    cipher = self.ciphersuite, 
+                    address_algo = self.address_algo
+                )
+                bindings.append(gobd)
+            
+        return self._sign_many(bindings, workers)
+        
+    def make_debinds(self, targets, workers=None):
+        ''' Batch version of make_debind. Packs and hashes all of the 
+        debindings first, and then signs them in parallel. Returns GDXX
+        in input order. Use workers=1 to sign serially, or an 
+        IdentityPool to sign across processes.
+        '''
+        debindings = []
+        for target in targets:
+            gdxx = GDXX(
+                debinder = self.ghid,
+                target = target
+            )
+            gdxx.pack(cipher=self.ciphersuite, address_algo=self.address_algo)
+            debindings.append(gdxx)
+            
+        return self._sign_many(debindings, workers)
+        
+    def _sign_many(self, objs, workers=None):
+        ''' Signs a list of packed (but unsigned) objects over a worker 
+        pool, and then packs the signatures. Returns objs. workers may 
+        also be an IdentityPool holding this identity, in which case the
+        signing is spread across its processes.
+        '''
+        addresses = [obj.ghid.address for obj in objs]
+        if isinstance(workers, IdentityPool):
+            signatures = workers.sign_many(self.ghid, addresses)
+        else:
+            signatures = _map_ordered(self._sign, addresses, workers)
+        for obj, signature in zip(objs, signatures):
+            obj.pack_signature(signature, freeze=False)
+        return objs
+        
     def make_handshake(self, secret, target):
         return AsymHandshake(
             author = self.ghid,
@@ -447,7 +657,43 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         
     def make_request(self, recipient, request):
         self._typecheck_2ndparty(recipient)
+        return self._seal_request(recipient, self._pack_asym(request))
+        
+    def make_requests_fanout(self, recipients, request, workers=None):
+        ''' Batch version of make_request, sending the same request (eg,
+        a handshake sharing a container) to many recipients. The request
+        is packed once, and then the per-recipient encryption, key 
+        derivation, and MAC run in parallel. Returns GARQs in recipient 
+        order. Use workers=1 to work serially, or an IdentityPool to 
+        derive the MAC keys across processes.
+        '''
+        recipients = list(recipients)
+        for recipient in recipients:
+            self._typecheck_2ndparty(recipient)
+        plaintext = self._pack_asym(request)
+        
+        if isinstance(workers, IdentityPool):
+            keys = workers.derive_shared_many(self.ghid, recipients)
+            threads = None
+        else:
+            keys = {}
+            threads = workers
+            
+        return _map_ordered(
+            lambda recipient: self._seal_request(
+                recipient, 
+                plaintext, 
+                keys.get(recipient.ghid)
+            ),
+            recipients,
+            threads
+        )
         
+    @staticmethod
+    def _pack_asym(request):
+        ''' Converts request into the matching asymmetric payload object,
+        and returns its packed plaintext.
+        '''
         # I'm actually okay with this performance hit, since it forces some
         # level of type checking here. Which is, I think, in this case, good.
         if isinstance(request, AsymHandshake):
@@ -474,39 +720,60 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
                 '(or subclass thereof).'
             )
         request.pack()
-        plaintext = request.packed
+        return request.packed
         
+    def _seal_request(self, recipient, plaintext, key=None):
+        ''' Encrypts the packed plaintext to recipient, and wraps it in a
+        MAC'd GARQ. key is the shared secret with recipient, which is 
+        derived if None.
+        '''
         # Convert the plaintext to a proper payload and create a garq from it
         payload = self._encrypt_asym(recipient, plaintext)
-        del plaintext
         garq = GARQ(
             recipient = recipient.ghid,
             payload = payload
         )
         
+        if key is None:
+            key = self._derive_shared(recipient)
+        
         # Pack 'er up and generate a MAC for it
         garq.pack(cipher=self.ciphersuite, address_algo=self.address_algo)
         garq.pack_signature(
             self._mac(
-                key = self._derive_shared(recipient),
+                key = key,
                 data = garq.ghid.address
             )
         )
         
         return garq
     
-    @classmethod
-    def receive_container(cls, author, secret, container):
+    @_hybridmethod
+    def receive_container(self, author, secret, container):
+        ''' Verifies and decrypts the container. secret may be either the
+        container's Secret, or a ghid (or None, for the container's own 
+        ghid) to look up in self.vault. With an explicit Secret, this 
+        may also be called on the class, as a classmethod.
+        '''
         if not isinstance(container, GEOC):
             raise TypeError(
                 'Container must be an unpacked GEOC, for example, as returned '
                 'from unpack_container.'
             )
-        cls._typecheck_2ndparty(author)
+        self._typecheck_2ndparty(author)
+        
+        if not isinstance(secret, Secret):
+            if self.vault is None:
+                raise TypeError(
+                    'Resolving a secret by ghid requires a vault.'
+                )
+            if secret is None:
+                secret = container.ghid
+            secret = self.vault[secret]
         
         signature = container.signature
-        cls._verify(author, signature, container.ghid.address)
-        plaintext = cls._decrypt(secret, container.payload)
+        self._verify(author, signature, container.ghid.address)
+        plaintext = self._decrypt(secret, container.payload)
         # This will need to be converted into a namedtuple or something
         return plaintext
     
@@ -553,36 +820,69 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         return debinding.target
         
     def unpack_request(self, packed):
-        garq = GARQ.unpack(packed)
+        garq, plaintext = self._decrypt_request(packed)
+        return self._finish_request(garq, plaintext)
+        
+    def unpack_requests(self, packeds, workers=None):
+        ''' Bulk unpack_request, eg for draining an inbox. Decryption 
+        happens in a pool of worker threads (default: cpu count). 
+        
+        Yields (index, garq, error) as each request completes, which is
+        not necessarily in input order; index is the request's position
+        in packeds. Errors are isolated per request: if a request fails
+        to unpack, garq is None and error is the exception.
+        '''
+        decrypted = _map_unordered(self._decrypt_request, packeds, workers)
+        for index, result, error in decrypted:
+            if error is None:
+                try:
+                    garq = self._finish_request(*result)
+                except Exception as exc:
+                    garq = None
+                    error = exc
+            else:
+                garq = None
+            yield index, garq, error
+            
+    def _decrypt_request(self, packed):
+        ''' First (expensive, thread-safe) half of unpack_request.
+        Returns (garq, plaintext).
+        '''
+        garq = _unpack_exact(GARQ, packed)
         plaintext = self._decrypt_asym(garq.payload)
+        return garq, plaintext
         
-        # Could do this with a loop, but it gets awkward when trying to
-        # assign stuff to the resulting object.
+    @staticmethod
+    def _finish_request(garq, plaintext):
+        ''' Second half of unpack_request: parses the plaintext, and
+        attaches it to the garq.
+        '''
         try:
-            unpacked = GARQHandshake.unpack(plaintext)
+            unpacked = _unpack_asym(plaintext)
+        except ParseError as e:
+            raise SecurityError('Could not securely unpack request.') from e
+            
+        if isinstance(unpacked, GARQHandshake):
             request = AsymHandshake(
                 author = unpacked.author,
                 target = unpacked.target, 
                 secret = unpacked.secret
             )
-        except ParseError:
-            try:
-                unpacked = GARQAck.unpack(plaintext)
-                request = AsymAck(
-                    author = unpacked.author,
-                    target = unpacked.target, 
-                    status = unpacked.status
-                )
-            except ParseError:
-                try:
-                    unpacked = GARQNak.unpack(plaintext)
-                    request = AsymNak(
-                        author = unpacked.author,
-                        target = unpacked.target, 
-                        status = unpacked.status
-                    )
-                except ParseError:
-                    raise SecurityError('Could not securely unpack request.')
+        # Note that GARQNak subclasses GARQAck, so check it first.
+        elif isinstance(unpacked, GARQNak):
+            request = AsymNak(
+                author = unpacked.author,
+                target = unpacked.target, 
+                status = unpacked.status
+            )
+        elif isinstance(unpacked, GARQAck):
+            request = AsymAck(
+                author = unpacked.author,
+                target = unpacked.target, 
+                status = unpacked.status
+            )
+        else:
+            raise SecurityError('Could not securely unpack request.')
             
         garq._plaintext = request
         garq._author = request.author
@@ -617,6 +917,49 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         del request._plaintext, request.author
         return plaintext
         
+    def receive_requests(self, requestors, requests):
+        ''' Verifies many requests at once, returning a list of their 
+        contents (in order). requestors must be an iterable of the 
+        SecondParties that authored the requests; shared secrets are 
+        derived once per unique requestor.
+        '''
+        requestors = {
+            requestor.ghid: requestor for requestor in requestors
+        }
+        for requestor in requestors.values():
+            self._typecheck_2ndparty(requestor)
+        keys = self._derive_shared_many(requestors.values())
+        
+        plaintexts = []
+        for request in requests:
+            if not isinstance(request, GARQ):
+                raise TypeError(
+                    'Request must be an unpacked GARQ, as returned from '
+                    'unpack_request.'
+                )
+            try:
+                plaintext = request._plaintext
+                key = keys[request.author]
+            except (AttributeError, RuntimeError) as e:
+                raise TypeError(
+                    'Request must be an unpacked GARQ, as returned from '
+                    'unpack_request.'
+                ) from e
+            except KeyError as e:
+                raise ValueError(
+                    'Requestors must include the author of every request.'
+                ) from e
+                
+            self._verify_mac(
+                key = key,
+                data = request.ghid.address,
+                mac = request.signature
+            )
+            del request._plaintext, request.author
+            plaintexts.append(plaintext)
+            
+        return plaintexts
+        
     @classmethod
     @abc.abstractmethod
     def _generate_second_party(cls, keys, address_algo):
@@ -698,6 +1041,16 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         '''
         pass
         
+    def _derive_shared_many(self, partners):
+        ''' Derive shared secrets with many partners at once. Returns a
+        dict of partner ghid -> shared secret. Ciphersuites should 
+        override this with something faster than one-at-a-time.
+        '''
+        return {
+            partner.ghid: self._derive_shared(partner) 
+            for partner in partners
+        }
+        
     @classmethod
     @abc.abstractmethod
     def _mac(cls, key, data):
@@ -728,13 +1081,114 @@ class _FirstPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         pass
         
     @classmethod
-    @abc.abstractmethod
     def _from_serialized(cls, serialization):
         ''' Create an instance of the class from a dictionary as created
         by cls._serialize.
         '''
+        try:
+            ghid = Ghid.from_bytes(serialization['ghid'])
+        except (TypeError, KeyError) as e:
+            raise TypeError(
+                'serialization must be compatible with _serialize.'
+            ) from e
+            
+        return cls(keys=cls._load_private_keys(serialization), ghid=ghid)
+        
+    @classmethod
+    @abc.abstractmethod
+    def _load_private_keys(cls, serialization, validate=True):
+        ''' Loads the private keys from a dictionary as created by 
+        cls._serialize, returning a keys dict. validate=False may skip
+        any (expensive) key consistency checks, and must only be used 
+        for keys from an authenticated source.
+        '''
         pass
         
+    def dump(self, passphrase=None, secret=None):
+        ''' Returns the identity as a binary identity file (see _idfile),
+        including the packed GIDC. If passphrase (str or bytes) or 
+        secret (a Secret) is passed, the file is encrypted and 
+        authenticated with it. Treat unencrypted files as private keys.
+        '''
+        serialization = self._serialize()
+        return _idfile.dump(
+            cipher = self._ciphersuite,
+            gidc = self.second_party.packed,
+            private_keys = serialization,
+            passphrase = passphrase,
+            secret = secret
+        )
+        
+    @classmethod
+    def load(cls, data, passphrase=None, secret=None):
+        ''' Loads an identity file, as created by dump. Files from an
+        authenticated (passphrase or secret) envelope are trusted as-is,
+        skipping key validation and second party regeneration entirely;
+        unencrypted files are fully validated, and must match their 
+        stored GIDC.
+        '''
+        cipher, gidc, raw_keys, authenticated = _idfile.load(
+            data, 
+            passphrase = passphrase, 
+            secret = secret
+        )
+        if cipher != cls._ciphersuite:
+            raise ValueError(
+                'Identity file ciphersuite does not match ' + 
+                cls.__name__ + '.'
+            )
+        
+        keys = cls._load_private_keys(raw_keys, validate=not authenticated)
+        second_party = cls._2PID.from_packed(gidc, lazy=True)
+        
+        if authenticated:
+            return cls._from_parts(keys, second_party)
+            
+        self = cls(
+            keys = keys, 
+            ghid = second_party.ghid,
+            address_algo = second_party.ghid.algo
+        )
+        if self.second_party.ghid != second_party.ghid:
+            raise SecurityError('Identity file keys do not match its GIDC.')
+        return self
+        
+    @classmethod
+    def _from_parts(cls, keys, second_party):
+        ''' Assembles a FirstParty from its private keys and an existing 
+        second party, without regenerating (or re-packing) anything.
+        '''
+        self = cls.__new__(cls)
+        self.address_algo = cls._dispatch_address(second_party.ghid.algo)
+        self._second_party = second_party
+        _IdentityBase.__init__(self, keys=keys, ghid=second_party.ghid)
+        return self
+        
+        
+def _derive_shared_many(first_party, partners, exchange):
+    ''' Batched shared secret derivation for ciphersuites using 
+    _hkdf_sha512, salted with the XOR of both addresses. exchange is the
+    (bound) ECDH method of first_party's exchange key. Returns a dict of
+    partner ghid -> shared secret.
+    '''
+    # Our own address only needs to be converted once.
+    address = first_party.ghid.address
+    length = len(address)
+    mine = int.from_bytes(address, byteorder='big')
+    
+    keys = {}
+    for partner in partners:
+        ecdh = exchange(partner._exchange_key)
+        theirs = partner.ghid.address
+        if len(theirs) != length:
+            raise ValueError('Cannot XOR bytes of unequal length.')
+        salt = (mine ^ int.from_bytes(theirs, byteorder='big')).to_bytes(
+            length, 
+            byteorder='big'
+        )
+        keys[partner.ghid] = _hkdf_sha512(ecdh, salt)
+    return keys
+        
         
 class _ThirdPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
     ''' Subclass this (on a per-ciphersuite basis) for servers, and 
@@ -755,23 +1209,11 @@ class _ThirdPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
             )
         return address_algo
         
-    @staticmethod
-    def unpack_object(packed):
-        ''' Unpacks any Golix object.
+    def unpack_object(self, packed):
+        ''' Unpacks any Golix object. Same as unpack_any, including its 
+        self.limits checks.
         '''
-        success = False
-        for golix_format in (GIDC, GEOC, GOBS, GOBD, GDXX, GARQ):
-            try:
-                obj = golix_format.unpack(packed)
-                success = True
-            # Hm, don't really like this.
-            except (ParseError, TypeError):
-                pass
-        if not success:
-            raise ParseError(
-                'Packed data does not appear to be a Golix object.'
-            )
-        return obj
+        return self.unpack_any(packed)
         
     @classmethod
     def unpack_request(cls, packed):
@@ -779,7 +1221,7 @@ class _ThirdPartyBase(_ObjectHandlerBase, metaclass=abc.ABCMeta):
         (Cannot verify, at least for the existing ciphersuites, as of
         2016-03).
         '''
-        garq = GARQ.unpack(packed)
+        garq = _unpack_exact(GARQ, packed)
         return garq
         
     @classmethod
@@ -876,9 +1318,8 @@ class FirstParty0(_FirstPartyBase, _IdentityBase):
         }
         
     @classmethod
-    def _from_serialized(cls, serialization):
+    def _load_private_keys(cls, serialization, validate=True):
         try:
-            ghid = Ghid.from_bytes(serialization['ghid'])
             keys = {
                 'signature': serialization['signature'],
                 'encryption': serialization['encryption'],
@@ -889,7 +1330,7 @@ class FirstParty0(_FirstPartyBase, _IdentityBase):
                 'serialization must be compatible with _serialize.'
             ) from e
             
-        return cls(keys=keys, ghid=ghid)
+        return keys
     
     @classmethod
     def new_secret(cls):
@@ -1005,23 +1446,130 @@ class SecondParty1(_SecondPartyBase, _IdentityBase):
         
     @classmethod
     def _unpack_keys(cls, keys):
-        n_sig = int.from_bytes(keys['signature'], byteorder='big')
-        n_enc = int.from_bytes(keys['encryption'], byteorder='big')
-        
-        nums_sig = rsa.RSAPublicNumbers(n=n_sig, e=65537)
-        nums_enc = rsa.RSAPublicNumbers(n=n_enc, e=65537)
-        
         unpackkeys = {
-            'signature': nums_sig.public_key(CRYPTO_BACKEND),
-            'encryption': nums_enc.public_key(CRYPTO_BACKEND),
+            'signature': _load_rsa_public(keys['signature']),
+            'encryption': _load_rsa_public(keys['encryption']),
             'exchange': ECDHPublic(bytes(keys['exchange'])),
         }
         return unpackkeys
+        
+        
+# DER SubjectPublicKeyInfo for an RSA-4096 public key with e=65537, split
+# around the (512-byte) modulus. The modulus needs a leading zero byte, 
+# since its high bit is always set for full-length keys.
+_RSA4096_SPKI_PREFIX = bytes.fromhex(
+    '30820222300d06092a864886f70d01010105000382020f003082020a0282020100'
+)
+_RSA4096_SPKI_SUFFIX = bytes.fromhex('0203010001')
+
+
+def _load_rsa_public(modulus):
+    ''' Loads an RSA public key (e=65537) from its big-endian modulus.
+    Wrapping the modulus in a DER template is considerably cheaper than
+    going through int.from_bytes and RSAPublicNumbers.
+    '''
+    modulus = bytes(modulus)
+    if len(modulus) == 512 and modulus[0] & 0x80:
+        return serialization.load_der_public_key(
+            _RSA4096_SPKI_PREFIX + modulus + _RSA4096_SPKI_SUFFIX,
+            backend = CRYPTO_BACKEND
+        )
+    
+    # Anything else (ie, short moduli) goes the long way around.
+    n = int.from_bytes(modulus, byteorder='big')
+    nums = rsa.RSAPublicNumbers(n=n, e=65537)
+    return nums.public_key(CRYPTO_BACKEND)
+
+
+def _load_der_private(data, validate=True):
+    ''' Loads a DER (PKCS8) private key. For RSA, key validation costs
+    hundreds of milliseconds, so validate=False skips it -- only use 
+    that for keys from an authenticated source.
+    '''
+    if not validate:
+        try:
+            return serialization.load_der_private_key(
+                data = data,
+                password = None,
+                backend = CRYPTO_BACKEND,
+                unsafe_skip_rsa_key_validation = True
+            )
+        # Older versions of cryptography always validate.
+        except TypeError:
+            pass
+            
+    return serialization.load_der_private_key(
+        data = data,
+        password = None,
+        backend = CRYPTO_BACKEND
+    )
+
+
+# Payloads at least this long are encrypted in parallel; below it, the 
+# thread pool costs more than it saves.
+_CTR_PARALLEL_THRESHOLD = 8 * 1024 * 1024
+# Must be a multiple of the AES block size.
+_CTR_SEGMENT = 4 * 1024 * 1024
+_AES_BLOCK = 16
+
+
+def _aes_ctr(key, nonce, data, workers=None):
+    ''' AES-CTR, which is the same operation in both directions. Each
+    block's keystream depends only on the nonce and the block's index, 
+    so large payloads are split into counter-aligned segments, which are
+    processed concurrently in a thread pool (OpenSSL releases the GIL)
+    directly into a single preallocated buffer. Either way, the result
+    is returned as bytes. workers is as in _map_ordered.
+    '''
+    length = len(data)
+    if workers is None:
+        workers = os.cpu_count() or 1
+        
+    if workers <= 1 or length < _CTR_PARALLEL_THRESHOLD:
+        worker = ciphers.Cipher(
+            ciphers.algorithms.AES(key),
+            ciphers.modes.CTR(nonce),
+            backend = CRYPTO_BACKEND
+        ).encryptor()
+        return worker.update(data) + worker.finalize()
+        
+    data = memoryview(data).cast('B')
+    # update_into insists on block size - 1 bytes of slack past the end 
+    # of its output. CTR never writes into it, so segments can share the
+    # buffer, but the last one needs some room at the end.
+    output = bytearray(length + _AES_BLOCK - 1)
+    view = memoryview(output)
+    # OpenSSL increments the whole nonce as a 128-bit big-endian counter.
+    counter = int.from_bytes(nonce, 'big')
+    
+    def process(start):
+        block = (counter + (start // _AES_BLOCK)) % (1 << 128)
+        worker = ciphers.Cipher(
+            ciphers.algorithms.AES(key),
+            ciphers.modes.CTR(block.to_bytes(_AES_BLOCK, 'big')),
+            backend = CRYPTO_BACKEND
+        ).encryptor()
+        end = min(start + _CTR_SEGMENT, length)
+        worker.update_into(
+            data[start:end], 
+            view[start:end + _AES_BLOCK - 1]
+        )
+        worker.finalize()
+        
+    _map_ordered(process, range(0, length, _CTR_SEGMENT), workers)
+    view.release()
+    # Trimming the slack doesn't reallocate, and the one copy to bytes is
+    # small next to the encryption itself.
+    del output[length:]
+    return bytes(output)
 
 
 # RSA-PSS Signature salt length.
 # Put these here because explicit is better than implicit!
 _PSS_SALT_LENGTH = hashes.SHA512.digest_size
+# Addresses are signed directly, as if they were SHA512 digests. Note that
+# this is wire-compatible with hashing the address "again" via a noop hash.
+_PREHASHED_SHA512 = Prehashed(hashes.SHA512())
 
 class FirstParty1(_FirstPartyBase, _IdentityBase):
     ''' ... Hmmm
@@ -1076,19 +1624,16 @@ class FirstParty1(_FirstPartyBase, _IdentityBase):
         }
         
     @classmethod
-    def _from_serialized(cls, condensed):
+    def _load_private_keys(cls, condensed, validate=True):
         try:
-            ghid = Ghid.from_bytes(condensed['ghid'])
             keys = {
-                'signature': serialization.load_der_private_key(
-                    data = condensed['signature'],
-                    password = None,
-                    backend = CRYPTO_BACKEND
+                'signature': _load_der_private(
+                    condensed['signature'], 
+                    validate
                 ),
-                'encryption': serialization.load_der_private_key(
-                    data = condensed['encryption'],
-                    password = None,
-                    backend = CRYPTO_BACKEND
+                'encryption': _load_der_private(
+                    condensed['encryption'], 
+                    validate
                 ),
                 'exchange': ECDHPrivate.load(condensed['exchange'])
             }
@@ -1097,7 +1642,7 @@ class FirstParty1(_FirstPartyBase, _IdentityBase):
                 'serialization must be compatible with _serialize.'
             ) from e
             
-        return cls(keys=keys, ghid=ghid)
+        return keys
     
     @classmethod
     def new_secret(cls):
@@ -1109,19 +1654,10 @@ class FirstParty1(_FirstPartyBase, _IdentityBase):
         
     @classmethod
     def _encrypt(cls, secret, data):
-        ''' Symmetric encryptor.
+        ''' Symmetric encryptor. Large payloads are encrypted in 
+        parallel.
         '''
-        # Could we do eg memoryview instead?
-        if not isinstance(data, bytes):
-            data = bytes(data)
-            
-        instance = ciphers.Cipher(
-            ciphers.algorithms.AES(secret.key),
-            ciphers.modes.CTR(secret.seed),
-            backend = CRYPTO_BACKEND
-        )
-        worker = instance.encryptor()
-        return worker.update(data) + worker.finalize()
+        return _aes_ctr(secret.key, secret.seed, data)
         
     @classmethod
     def _decrypt(cls, secret, data):
@@ -1130,41 +1666,21 @@ class FirstParty1(_FirstPartyBase, _IdentityBase):
         Handle multiple ciphersuites by having a SecondParty for
         whichever author created it, and calling their decrypt instead.
         '''
-        # Could we do eg memoryview instead?
-        if not isinstance(data, bytes):
-            data = bytes(data)
-            
-        instance = ciphers.Cipher(
-            ciphers.algorithms.AES(secret.key),
-            ciphers.modes.CTR(secret.seed),
-            backend = CRYPTO_BACKEND
-        )
-        worker = instance.decryptor()
-        return worker.update(data) + worker.finalize()
+        # CTR decryption is just encryption again.
+        return _aes_ctr(secret.key, secret.seed, data)
         
     def _sign(self, data):
-        ''' Signing method.
+        ''' Signing method. Data is the (already SHA512-sized) address, 
+        which is signed directly as a prehashed digest.
         '''
-        signer = self._signature_key.signer(
-            padding.PSS(
-                mgf = padding.MGF1(hashes.SHA512()),
-                salt_length = _PSS_SALT_LENGTH
-            ),
-            hashes.SHA512()
-        )
-        signer._hash_ctx = _NoopSHA512(data)
-        return signer.finalize()
-        
-        # IT WOULD BE NICE TO BE ABLE TO USE THIS GRRRRRRRRRRRRRRRRRR
-        signature = self._signature_key.sign(
+        return self._signature_key.sign(
             bytes(data),
             padding.PSS(
                 mgf = padding.MGF1(hashes.SHA512()),
                 salt_length = _PSS_SALT_LENGTH
             ),
-            _NoopSHA512(data)
+            _PREHASHED_SHA512
         )
-        return signature
        
     @classmethod
     def _verify(cls, public, signature, data):
@@ -1178,27 +1694,15 @@ class FirstParty1(_FirstPartyBase, _IdentityBase):
         cls._typecheck_2ndparty(public)
         
         try:
-            verifier = public._signature_key.verifier(
+            public._signature_key.verify(
                 bytes(signature),
+                bytes(data),
                 padding.PSS(
                     mgf = padding.MGF1(hashes.SHA512()),
                     salt_length = _PSS_SALT_LENGTH
                 ),
-                hashes.SHA512()
+                _PREHASHED_SHA512
             )
-            verifier._hash_ctx = _NoopSHA512(data)
-            verifier.verify()
-            
-            # IT WOULD BE NICE TO BE ABLE TO USE THIS TOO!!!! grumble grumble
-            # public._signature_key.verify(
-            #     bytes(signature),
-            #     bytes(data),
-            #     padding.PSS(
-            #         mgf = padding.MGF1(hashes.SHA512()),
-            #         salt_length = _PSS_SALT_LENGTH
-            #     ),
-            #     _NoopSHA512(data)
-            # )
             
         except InvalidSignature as exc:
             raise SecurityError('Failed to verify signature.') from exc
@@ -1243,22 +1747,18 @@ class FirstParty1(_FirstPartyBase, _IdentityBase):
         # Call the donna25519 exchange method and return bytes
         ecdh = self._exchange_key.do_exchange(partner._exchange_key)
         
-        # Get both of our addresses and then the bitwise XOR of them both
-        my_hash = self.ghid.address
-        their_hash = partner.ghid.address
-        salt = bytes([a ^ b for a, b in zip(my_hash, their_hash)])
+        # Salt with the bitwise XOR of both of our addresses
+        salt = _xor_bytes(self.ghid.address, partner.ghid.address)
+        return _hkdf_sha512(ecdh, salt)
         
-        instance = hkdf.HKDF(
-            algorithm = hashes.SHA512(),
-            length = hashes.SHA512.digest_size,
-            salt = salt,
-            info = b'',
-            backend = CRYPTO_BACKEND
+    def _derive_shared_many(self, partners):
+        ''' Derive shared secrets with many partners at once.
+        '''
+        return _derive_shared_many(
+            self, 
+            partners, 
+            self._exchange_key.do_exchange
         )
-        key = instance.derive(ecdh)
-        # Might as well do this immediately, not that it really adds anything
-        del ecdh, my_hash, their_hash, salt
-        return key
         
     @classmethod
     def _mac(cls, key, data):
@@ -1300,4 +1800,277 @@ class ThirdParty1(_ThirdPartyBase):
     _ciphersuite = 1
     # Note that, since this classmethod is from a different class, the
     # cls passed internally will be FirstParty0, NOT ThirdParty0.
-    _verify = FirstParty1._verify
\ No newline at end of file
+    _verify = FirstParty1._verify
+        
+        
+class SecondParty2(_SecondPartyBase, _IdentityBase): 
+    _ciphersuite = 2
+        
+    @classmethod
+    def _pack_keys(cls, keys):
+        packkeys = {
+            'signature': keys['signature'].public_bytes(
+                encoding = serialization.Encoding.Raw,
+                format = serialization.PublicFormat.Raw
+            ),
+            'encryption': keys['encryption'].public_bytes(
+                encoding = serialization.Encoding.Raw,
+                format = serialization.PublicFormat.Raw
+            ),
+            'exchange': keys['exchange'].public_bytes(
+                encoding = serialization.Encoding.Raw,
+                format = serialization.PublicFormat.Raw
+            ),
+        }
+        return packkeys
+        
+    @classmethod
+    def _unpack_keys(cls, keys):
+        unpackkeys = {
+            'signature': ed25519.Ed25519PublicKey.from_public_bytes(
+                bytes(keys['signature'])
+            ),
+            'encryption': x25519.X25519PublicKey.from_public_bytes(
+                bytes(keys['encryption'])
+            ),
+            'exchange': x25519.X25519PublicKey.from_public_bytes(
+                bytes(keys['exchange'])
+            ),
+        }
+        return unpackkeys
+
+
+# Fixed-length ECIES-style asymmetric payloads for ciphersuite 2. The 
+# plaintext is length-prefixed and zero-padded so that the ciphertext 
+# length never depends on the request type. The body is just large enough 
+# for a handshake, which is the largest request.
+_ASYM2_LENGTH = cipher_length_lookup[2]['asym']
+_ASYM2_PUBKEY_LENGTH = 32
+_ASYM2_MAC_LENGTH = hashes.SHA512.digest_size
+_ASYM2_BODY_LENGTH = _ASYM2_LENGTH - _ASYM2_PUBKEY_LENGTH - _ASYM2_MAC_LENGTH
+_ASYM2_INFO = b'golix-asym-2'
+        
+        
+class FirstParty2(_FirstPartyBase, _IdentityBase):
+    ''' Ed25519 signatures, X25519 asymmetric encryption (ECIES-style, 
+    with AES-CTR and HMAC-SHA512) and exchange. Symmetric encryption and
+    MACs are shared with ciphersuite 1.
+    '''
+    _ciphersuite = 2
+    _2PID = SecondParty2
+    
+    # Symmetric operations are identical to ciphersuite 1. Note that, since
+    # these classmethods are from a different class, the cls passed 
+    # internally will be FirstParty1, NOT FirstParty2.
+    _encrypt = FirstParty1._encrypt
+    _decrypt = FirstParty1._decrypt
+    _mac = FirstParty1._mac
+    _verify_mac = FirstParty1._verify_mac
+        
+    @classmethod
+    def _generate_second_party(cls, keys, address_algo):
+        pubkeys = {
+            'signature': keys['signature'].public_key(),
+            'encryption': keys['encryption'].public_key(),
+            'exchange': keys['exchange'].public_key()
+        } 
+        del keys
+        return cls._2PID.from_keys(keys=pubkeys, address_algo=address_algo)
+        
+    @classmethod
+    def _generate_keys(cls):
+        keys = {}
+        keys['signature'] = ed25519.Ed25519PrivateKey.generate()
+        keys['encryption'] = x25519.X25519PrivateKey.generate()
+        keys['exchange'] = x25519.X25519PrivateKey.generate()
+        return keys
+        
+    def _serialize(self):
+        return {
+            'ghid': bytes(self.ghid),
+            'signature': self._signature_key.private_bytes(
+                encoding = serialization.Encoding.Raw,
+                format = serialization.PrivateFormat.Raw,
+                encryption_algorithm = serialization.NoEncryption()
+            ),
+            'encryption': self._encryption_key.private_bytes(
+                encoding = serialization.Encoding.Raw,
+                format = serialization.PrivateFormat.Raw,
+                encryption_algorithm = serialization.NoEncryption()
+            ),
+            'exchange': self._exchange_key.private_bytes(
+                encoding = serialization.Encoding.Raw,
+                format = serialization.PrivateFormat.Raw,
+                encryption_algorithm = serialization.NoEncryption()
+            )
+        }
+        
+    @classmethod
+    def _load_private_keys(cls, condensed, validate=True):
+        try:
+            keys = {
+                'signature': ed25519.Ed25519PrivateKey.from_private_bytes(
+                    bytes(condensed['signature'])
+                ),
+                'encryption': x25519.X25519PrivateKey.from_private_bytes(
+                    bytes(condensed['encryption'])
+                ),
+                'exchange': x25519.X25519PrivateKey.from_private_bytes(
+                    bytes(condensed['exchange'])
+                )
+            }
+        except (TypeError, KeyError) as e:
+            raise TypeError(
+                'serialization must be compatible with _serialize.'
+            ) from e
+            
+        return keys
+    
+    @classmethod
+    def new_secret(cls):
+        ''' Returns a new secure Secret().
+        '''
+        key = os.urandom(32)
+        nonce = os.urandom(16)
+        return super().new_secret(key=key, seed=nonce)
+        
+    def _sign(self, data):
+        ''' Signing method.
+        '''
+        return self._signature_key.sign(bytes(data))
+       
+    @classmethod
+    def _verify(cls, public, signature, data):
+        ''' Verifies an author's signature against bites. Errors out if 
+        unsuccessful. Returns True if successful.
+        '''
+        cls._typecheck_2ndparty(public)
+        
+        try:
+            public._signature_key.verify(bytes(signature), bytes(data))
+        except InvalidSignature as exc:
+            raise SecurityError('Failed to verify signature.') from exc
+            
+        return True
+        
+    @staticmethod
+    def _asym_keys(shared, ephemeral_public, recipient_public):
+        ''' Expands an ECDH shared secret into the AES key, CTR nonce,
+        and MAC key for an asymmetric payload.
+        '''
+        instance = hkdf.HKDF(
+            algorithm = hashes.SHA512(),
+            length = 32 + 16 + _ASYM2_MAC_LENGTH,
+            salt = ephemeral_public + recipient_public,
+            info = _ASYM2_INFO,
+            backend = CRYPTO_BACKEND
+        )
+        material = instance.derive(shared)
+        return material[:32], material[32:48], material[48:]
+        
+    def _encrypt_asym(self, public, data):
+        ''' Asymmetric encryptor. Generates an ephemeral X25519 key
+        for every payload.
+        '''
+        self._typecheck_2ndparty(public)
+        
+        data = bytes(data)
+        if len(data) + 2 > _ASYM2_BODY_LENGTH:
+            raise ValueError('Asymmetric plaintext is too long.')
+            
+        ephemeral = x25519.X25519PrivateKey.generate()
+        ephemeral_public = ephemeral.public_key().public_bytes(
+            encoding = serialization.Encoding.Raw,
+            format = serialization.PublicFormat.Raw
+        )
+        recipient_public = public._encryption_key.public_bytes(
+            encoding = serialization.Encoding.Raw,
+            format = serialization.PublicFormat.Raw
+        )
+        shared = ephemeral.exchange(public._encryption_key)
+        key, nonce, mac_key = self._asym_keys(
+            shared, 
+            ephemeral_public, 
+            recipient_public
+        )
+        del ephemeral, shared
+        
+        body = int.to_bytes(len(data), length=2, byteorder='big') + data
+        body += bytes(_ASYM2_BODY_LENGTH - len(body))
+        worker = ciphers.Cipher(
+            ciphers.algorithms.AES(key),
+            ciphers.modes.CTR(nonce),
+            backend = CRYPTO_BACKEND
+        ).encryptor()
+        ciphertext = worker.update(body) + worker.finalize()
+        
+        mac = self._mac(mac_key, ephemeral_public + ciphertext)
+        return ephemeral_public + ciphertext + mac
+        
+    def _decrypt_asym(self, data):
+        ''' Asymmetric decryptor.
+        '''
+        data = bytes(data)
+        if len(data) != _ASYM2_LENGTH:
+            raise SecurityError('Asymmetric payload has improper length.')
+            
+        ephemeral_public = data[:_ASYM2_PUBKEY_LENGTH]
+        ciphertext = data[_ASYM2_PUBKEY_LENGTH:-_ASYM2_MAC_LENGTH]
+        mac = data[-_ASYM2_MAC_LENGTH:]
+        recipient_public = self._encryption_key.public_key().public_bytes(
+            encoding = serialization.Encoding.Raw,
+            format = serialization.PublicFormat.Raw
+        )
+        
+        try:
+            shared = self._encryption_key.exchange(
+                x25519.X25519PublicKey.from_public_bytes(ephemeral_public)
+            )
+        except ValueError as exc:
+            raise SecurityError('Invalid ephemeral public key.') from exc
+        key, nonce, mac_key = self._asym_keys(
+            shared, 
+            ephemeral_public, 
+            recipient_public
+        )
+        del shared
+        
+        self._verify_mac(
+            key = mac_key, 
+            mac = mac, 
+            data = ephemeral_public + ciphertext
+        )
+        
+        worker = ciphers.Cipher(
+            ciphers.algorithms.AES(key),
+            ciphers.modes.CTR(nonce),
+            backend = CRYPTO_BACKEND
+        ).decryptor()
+        body = worker.update(ciphertext) + worker.finalize()
+        length = int.from_bytes(body[:2], byteorder='big')
+        return body[2:2 + length]
+    
+    def _derive_shared(self, partner):
+        ''' Derive a shared secret with the partner.
+        '''
+        ecdh = self._exchange_key.exchange(partner._exchange_key)
+        
+        # Salt with the bitwise XOR of both of our addresses
+        salt = _xor_bytes(self.ghid.address, partner.ghid.address)
+        return _hkdf_sha512(ecdh, salt)
+        
+    def _derive_shared_many(self, partners):
+        ''' Derive shared secrets with many partners at once.
+        '''
+        return _derive_shared_many(
+            self, 
+            partners, 
+            self._exchange_key.exchange
+        )
+        
+        
+class ThirdParty2(_ThirdPartyBase):
+    _ciphersuite = 2
+    # Note that, since this classmethod is from a different class, the
+    # cls passed internally will be FirstParty2, NOT ThirdParty2.
+    _verify = FirstParty2._verify
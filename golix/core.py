@@ -42,7 +42,10 @@ __all__ = [
     'SecondParty',
     'ThirdParty',
     'firstparty_factory',
-    'thirdparty_factory'
+    'thirdparty_factory',
+    'load_second_parties',
+    'load_first_party',
+    'PackedObject'
 ]
 
 # Global dependencies
@@ -53,11 +56,18 @@ from smartyparse import ParseError
 from .utils import Ghid
 from .utils import SecurityError
 from .utils import Secret
+from ._getlow import PackedObject
 
 # Inter-package dependencies that are only used locally
 from .cipher import FirstParty1 as FirstParty
 from .cipher import SecondParty1 as SecondParty
 from .cipher import ThirdParty1 as ThirdParty
+from .cipher import FirstParty2
+from .cipher import SecondParty2
+from .cipher import ThirdParty2
+
+from ._getlow import GIDC
+from . import _idfile
 
         
 # ###############################################
@@ -70,13 +80,16 @@ from .cipher import DEFAULT_CIPHER
 # Note that these will need to change their mapping value if the "import as"
 # ever changes due to additional ciphersuites.
 FIRST_PARTY_LOOKUP = {
-    1: FirstParty
+    1: FirstParty,
+    2: FirstParty2
 }
 SECOND_PARTY_LOOKUP = {
-    1: SecondParty
+    1: SecondParty,
+    2: SecondParty2
 }
 THIRD_PARTY_LOOKUP = {
-    1: ThirdParty
+    1: ThirdParty,
+    2: ThirdParty2
 }
 
 
@@ -109,4 +122,34 @@ def thirdparty_factory(cipher='default', *args, **kwargs):
     except (KeyError, TypeError) as e:
         raise ValueError('Improper cipher declaration.') from e
         
-    return cls(*args, **kwargs)
\ No newline at end of file
+    return cls(*args, **kwargs)
+
+
+def load_second_parties(packeds, lazy=True):
+    ''' Loads many packed GIDCs (for example, a directory of identities)
+    into SecondParty objects, selecting the correct SecondParty for each
+    GIDC's cipher. Public keys are kept raw until their first use, 
+    unless lazy=False.
+    '''
+    second_parties = []
+    for packed in packeds:
+        ghid, cipher, raw_keys = GIDC.load_keys(packed)
+        try:
+            cls = SECOND_PARTY_LOOKUP[cipher]
+        except KeyError as e:
+            raise ValueError('Improper cipher declaration.') from e
+        second_parties.append(cls._from_loaded(packed, ghid, raw_keys, lazy))
+    return second_parties
+
+
+def load_first_party(data, passphrase=None, secret=None):
+    ''' Loads a binary identity file, as created by FirstParty.dump, 
+    selecting the correct FirstParty for the file's cipher. Pass the 
+    passphrase or secret used to dump it, if any.
+    '''
+    cipher, __ = _idfile.peek(data)
+    try:
+        cls = FIRST_PARTY_LOOKUP[cipher]
+    except KeyError as e:
+        raise ValueError('Improper cipher declaration.') from e
+    return cls.load(data, passphrase=passphrase, secret=secret)
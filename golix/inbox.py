@@ -0,0 +1,311 @@
+'''
+Inbox screening, for incoming requests (GARQs) from untrusted sources.
+Decrypting a request costs a private-key operation (4096-bit RSA-OAEP,
+for the current ciphersuites), so an Inbox puts cheap checks in front 
+of it: structural validation, the recipient, duplicate ghids, and 
+decryption budgets per sender and in total, per time window. Only 
+requests passing every check are decrypted.
+
+Requests don't reveal their author until they're decrypted, so budgets
+are charged to a sender supplied by the caller -- whatever the transport
+can attribute the request to (eg, the uploading connection's identity).
+Anything without a sender shares a single budget.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'Inbox',
+    'RequestRejected'
+]
+
+# Global dependencies
+import time
+import threading
+import collections
+
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import SecurityError
+from .utils import _map_unordered
+
+from ._getlow import GARQ
+from .validation import validate
+
+
+class RequestRejected(SecurityError):
+    ''' Raised when an Inbox refuses to decrypt a request. reason is one
+    of the Inbox.counters keys.
+    '''
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        
+        
+class _Decryption:
+    ''' The (eventual) outcome of decrypting one request payload, shared
+    by every copy of the request that arrives. Exactly one of plaintext 
+    and error is set once done is. done is None if the inbox isn't the 
+    one decrypting (see Inbox.screen). window is the start of the budget
+    window the request was charged to.
+    '''
+    __slots__ = ('mac', 'window', 'done', 'plaintext', 'error')
+    
+    def __init__(self, mac, window, decrypting):
+        self.mac = mac
+        self.window = window
+        self.done = threading.Event() if decrypting else None
+        self.plaintext = None
+        self.error = None
+        
+        
+class Inbox:
+    ''' Screens incoming requests for first_party before decrypting them.
+    Requests must be well-formed (per limits; see golix.validation) and 
+    addressed to first_party. Each sender may then have at most 
+    per_sender requests decrypted per window seconds, with at most total
+    across all senders. Budgets of None are unlimited.
+    
+    The ghid commits to the encrypted payload, so each ghid (among the 
+    last max_seen) is decrypted at most once. An exact replay is 
+    rejected as a duplicate. A copy with a different MAC reuses the 
+    cached decryption without being charged to any budget; its MAC is 
+    checked, as always, by FirstParty.receive_request.
+    
+    counters tracks the outcome of every request: 'accepted', 'invalid',
+    'wrong_recipient', 'duplicate', 'over_sender_budget', 
+    'over_total_budget', and (for requests that passed screening but 
+    could not be decrypted) 'failed'. 'cached' also counts the accepted 
+    or failed requests that reused an earlier decryption.
+    '''
+    
+    def __init__(self, first_party, per_sender=None, total=None, window=60, 
+                 max_seen=65536, limits=None, clock=time.monotonic):
+        self._first_party = first_party
+        self.per_sender = per_sender
+        self.total = total
+        self.window = window
+        self.limits = limits
+        self._max_seen = max_seen
+        self._clock = clock
+        
+        self._lock = threading.Lock()
+        self._seen = collections.OrderedDict()
+        self._window_start = clock()
+        self._spent = collections.Counter()
+        self._spent_total = 0
+        self.counters = collections.Counter()
+        
+    def _reject(self, reason, message):
+        self.counters[reason] += 1
+        raise RequestRejected(reason, message)
+        
+    def _roll_window(self):
+        ''' Starts a new budget window, if the current one has expired. 
+        Must hold the lock.
+        '''
+        now = self._clock()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._spent.clear()
+            self._spent_total = 0
+            
+    def screen(self, packed, sender=None):
+        ''' Runs every check on packed, charging it to sender's budget 
+        unless its ghid has already been decrypted. Returns the (not yet 
+        decrypted) GARQ, or raises RequestRejected. Since the inbox never
+        sees the result, later copies of the request are all rejected as
+        duplicates.
+        '''
+        return self._screen(packed, sender, decrypting=False)[0]
+        
+    def _screen(self, packed, sender, decrypting=True):
+        ''' Does the actual screening. Returns (garq, decryption, fresh),
+        where fresh is True if this copy is responsible for decrypting.
+        '''
+        try:
+            if validate(packed, self.limits) != b'GARQ':
+                raise ParseError('Data is not a request.')
+            # Only parses and hashes the (small, fixed-size) request.
+            garq = GARQ.unpack(packed)
+        except (ParseError, SecurityError) as e:
+            with self._lock:
+                self._reject('invalid', 'Malformed request: ' + str(e))
+            
+        if garq.recipient != self._first_party.ghid:
+            with self._lock:
+                self._reject(
+                    'wrong_recipient', 
+                    'Request is not addressed to this identity.'
+                )
+            
+        ghid = garq.ghid
+        mac = bytes(garq.signature)
+        with self._lock:
+            decryption = self._seen.get(ghid)
+            if decryption is not None:
+                self._seen.move_to_end(ghid)
+                if decryption.mac == mac or decryption.done is None:
+                    self._reject(
+                        'duplicate', 
+                        'Request has already been seen.'
+                    )
+                self.counters['cached'] += 1
+                return garq, decryption, False
+                
+            self._roll_window()
+            if (self.per_sender is not None and 
+                self._spent[sender] >= self.per_sender):
+                    self._reject(
+                        'over_sender_budget', 
+                        'Sender has exceeded its decryption budget.'
+                    )
+            if self.total is not None and self._spent_total >= self.total:
+                self._reject(
+                    'over_total_budget', 
+                    'Inbox has exceeded its decryption budget.'
+                )
+                
+            self._spent[sender] += 1
+            self._spent_total += 1
+            decryption = _Decryption(mac, self._window_start, decrypting)
+            self._seen[ghid] = decryption
+            if len(self._seen) > self._max_seen:
+                self._seen.popitem(last=False)
+                
+        return garq, decryption, True
+        
+    def _abandon(self, garq, decryption, sender):
+        ''' Gives up on a screened request that will never be decrypted:
+        forgets its ghid, refunds sender's budget (if the window hasn't 
+        rolled over since), and fails any copies waiting on it.
+        '''
+        with self._lock:
+            if self._seen.get(garq.ghid) is decryption:
+                del self._seen[garq.ghid]
+            if decryption.window == self._window_start:
+                self._spent[sender] -= 1
+                self._spent_total -= 1
+        decryption.error = SecurityError('Request was never decrypted.')
+        decryption.done.set()
+        
+    def _decrypt(self, garq, decryption, fresh):
+        ''' Decrypts a screened garq, as with FirstParty.unpack_request.
+        Copies of an already-decrypted ghid wait for, and reuse, the 
+        original's result.
+        '''
+        try:
+            if fresh:
+                try:
+                    decryption.plaintext = self._first_party._decrypt_asym(
+                        garq.payload
+                    )
+                except Exception as exc:
+                    decryption.error = exc
+                finally:
+                    decryption.done.set()
+            else:
+                decryption.done.wait()
+                
+            if decryption.error is not None:
+                if fresh:
+                    raise decryption.error
+                raise SecurityError(
+                    'Could not decrypt request.'
+                ) from decryption.error
+            garq = self._first_party._finish_request(
+                garq, 
+                decryption.plaintext
+            )
+        except Exception:
+            with self._lock:
+                self.counters['failed'] += 1
+            raise
+        with self._lock:
+            self.counters['accepted'] += 1
+        return garq
+        
+    def unpack_request(self, packed, sender=None):
+        ''' Screens and then decrypts packed, returning the unpacked GARQ
+        (as with FirstParty.unpack_request). Raises RequestRejected if 
+        screening fails.
+        '''
+        return self._decrypt(*self._screen(packed, sender))
+        
+    def unpack_requests(self, packeds, senders=None, workers=None):
+        ''' Bulk unpack_request. senders, if passed, must be matched 
+        pairwise with packeds. The whole batch is screened before 
+        anything is yielded; decryption of the requests that pass 
+        screening happens in a pool of worker threads (default: cpu 
+        count). Requests still undecrypted when the generator is closed 
+        are forgotten, and their budget refunded, so they may be 
+        resubmitted.
+        
+        As with FirstParty.unpack_requests, yields (index, garq, error),
+        not necessarily in input order. Rejected requests have a 
+        RequestRejected as their error.
+        '''
+        packeds = list(packeds)
+        if senders is None:
+            senders = [None] * len(packeds)
+        else:
+            senders = list(senders)
+            if len(senders) != len(packeds):
+                raise ValueError('Must have exactly one sender per request.')
+                
+        screened = []
+        rejected = []
+        for index, (packed, sender) in enumerate(zip(packeds, senders)):
+            try:
+                screened.append((index, sender, self._screen(packed, sender)))
+            except RequestRejected as exc:
+                rejected.append((index, exc))
+                
+        decrypted = _map_unordered(
+            lambda item: self._decrypt(*item[2]), 
+            screened, 
+            workers
+        )
+        try:
+            for index, exc in rejected:
+                yield index, None, exc
+            for position, garq, error in decrypted:
+                yield screened[position][0], garq, error
+                
+        finally:
+            # Waits for any decryptions already in flight.
+            decrypted.close()
+            for __, sender, (garq, decryption, fresh) in screened:
+                if fresh and not decryption.done.is_set():
+                    self._abandon(garq, decryption, sender)
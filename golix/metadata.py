@@ -0,0 +1,373 @@
+'''
+Secondary metadata index for stored Golix objects, so that servers can
+answer queries like "every GOBS bound by X", "every GEOC authored by 
+Y", or "every GOBD ingested since cursor C" without unpacking every 
+object they hold. Backed by the standard library's sqlite3, so it needs
+no external service.
+
+Each object is recorded once (objects are content addressed), as:
+
+    seq             ingest sequence number; strictly increasing, and 
+                    never reused, so it doubles as a sync cursor
+    ghid            the object's ghid
+    type            GIDC, GEOC, GOBS, GOBD, GDXX, or GARQ
+    party           the author (GEOC), binder (GOBS, GOBD), debinder 
+                    (GDXX), or recipient (GARQ); None for GIDC
+    target          the bound or debound ghid (GOBS, GOBD, GDXX)
+    ghid_dynamic    the dynamic ghid (GOBD)
+    size            packed length, in bytes
+
+The index only stores metadata; the objects themselves live wherever 
+the server keeps them (eg, a pack file). Only index objects that have
+been verified -- the index trusts whatever it's given.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'MetadataIndex',
+    'Record'
+]
+
+# Global dependencies
+import sqlite3
+import threading
+import collections
+
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import Ghid
+
+from ._getlow import GIDC
+from ._getlow import GEOC
+from ._getlow import GOBS
+from ._getlow import GOBD
+from ._getlow import GDXX
+from ._getlow import GARQ
+from ._getlow import PackedObject
+
+
+# ###############################################
+# Schema
+# ###############################################
+
+
+_VERSION = 1
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS objects (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ghid BLOB NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    party BLOB,
+    target BLOB,
+    ghid_dynamic BLOB,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_party ON objects (party, type, seq);
+CREATE INDEX IF NOT EXISTS objects_target ON objects (target, type, seq);
+CREATE INDEX IF NOT EXISTS objects_dynamic ON objects (ghid_dynamic, seq)
+    WHERE ghid_dynamic IS NOT NULL;
+CREATE INDEX IF NOT EXISTS objects_type ON objects (type, seq);
+'''
+
+_INSERT = (
+    'INSERT OR IGNORE INTO objects '
+    '(ghid, type, party, target, ghid_dynamic, size) '
+    'VALUES (?, ?, ?, ?, ?, ?)'
+)
+
+_COLUMNS = 'seq, ghid, type, party, target, ghid_dynamic, size'
+
+# Type name -> (class, party attribute, target attribute)
+_TYPES = {
+    'GIDC': (GIDC, None, None),
+    'GEOC': (GEOC, 'author', None),
+    'GOBS': (GOBS, 'binder', 'target'),
+    'GOBD': (GOBD, 'binder', 'target'),
+    'GDXX': (GDXX, 'debinder', 'target'),
+    'GARQ': (GARQ, 'recipient', None),
+}
+_TYPE_NAMES = {cls: name for name, (cls, __, __) in _TYPES.items()}
+
+
+Record = collections.namedtuple(
+    'Record',
+    ['seq', 'ghid', 'type', 'party', 'target', 'ghid_dynamic', 'size']
+)
+
+
+def _type_name(obj_type):
+    ''' Converts a low-level object class (or its name) into the name
+    stored in the index.
+    '''
+    if isinstance(obj_type, type):
+        try:
+            return _TYPE_NAMES[obj_type]
+        except KeyError:
+            pass
+    elif isinstance(obj_type, bytes):
+        obj_type = obj_type.decode('ascii', 'replace')
+        
+    if obj_type in _TYPES:
+        return obj_type
+    raise ValueError('Unknown Golix object type: ' + repr(obj_type))
+    
+    
+def _key(ghid):
+    if ghid is None:
+        return None
+    return bytes(ghid)
+    
+    
+def _ghid(key):
+    if key is None:
+        return None
+    return Ghid.from_bytes(key)
+    
+    
+def _row(obj):
+    ''' Extracts the index row for a (verified) low-level object.
+    '''
+    if isinstance(obj, PackedObject):
+        obj = obj.unpack()
+        
+    try:
+        name = _TYPE_NAMES[type(obj)]
+    except KeyError:
+        raise TypeError(
+            'Can only index low-level Golix objects, not ' + repr(obj)
+        ) from None
+        
+    __, party, target = _TYPES[name]
+    if party is not None:
+        party = bytes(getattr(obj, party))
+    if target is not None:
+        target = bytes(getattr(obj, target))
+    if name == 'GOBD':
+        dynamic = bytes(obj.ghid_dynamic)
+    else:
+        dynamic = None
+        
+    return (bytes(obj.ghid), name, party, target, dynamic, len(obj.packed))
+    
+    
+def _record(row):
+    seq, ghid, name, party, target, dynamic, size = row
+    return Record(
+        seq, 
+        Ghid.from_bytes(ghid), 
+        _TYPES[name][0], 
+        _ghid(party), 
+        _ghid(target), 
+        _ghid(dynamic), 
+        size
+    )
+
+
+# ###############################################
+# Index
+# ###############################################
+
+
+class MetadataIndex:
+    ''' An SQLite index of object metadata, at path (which is created if
+    it does not exist; use ':memory:' for a transient index).
+    
+    Adds are buffered, and written in a single transaction once 
+    batch_size of them are pending, or on flush(), close(), or any 
+    query. Indices are safe to share between threads, and (courtesy of
+    SQLite) between processes.
+    '''
+    
+    def __init__(self, path, batch_size=1000):
+        self._path = path
+        self._batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        
+        try:
+            version = self._db.execute('PRAGMA user_version').fetchone()[0]
+            if version not in (0, _VERSION):
+                raise ParseError(
+                    'Unsupported metadata index version: ' + str(version)
+                )
+                
+            # WAL lets readers continue while a batch is being written.
+            if path != ':memory:':
+                self._db.execute('PRAGMA journal_mode = WAL')
+                self._db.execute('PRAGMA synchronous = NORMAL')
+            with self._db:
+                self._db.executescript(_SCHEMA)
+                self._db.execute('PRAGMA user_version = ' + str(_VERSION))
+                
+        except Exception:
+            self._db.close()
+            raise
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def _check_open(self):
+        if self._db is None:
+            raise RuntimeError('Metadata index has already been closed.')
+            
+    def _flush(self):
+        ''' Writes any pending rows. Must hold the lock.
+        '''
+        self._check_open()
+        if self._pending:
+            with self._db:
+                self._db.executemany(_INSERT, self._pending)
+            self._pending = []
+            
+    def flush(self):
+        ''' Writes any pending adds to the index.
+        '''
+        with self._lock:
+            self._flush()
+            
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._flush()
+                finally:
+                    self._db.close()
+                    self._db = None
+                    
+    def add(self, obj):
+        ''' Adds a low-level Golix object (GIDC, GEOC, etc, or a 
+        PackedObject) to the index. Objects already in the index are 
+        ignored.
+        '''
+        self.add_many((obj,))
+        
+    def add_many(self, objs):
+        ''' Adds many low-level Golix objects to the index. Returns the 
+        number of objects passed.
+        '''
+        # Extract everything first, so that a bad object leaves the 
+        # pending batch untouched.
+        rows = [_row(obj) for obj in objs]
+        with self._lock:
+            self._check_open()
+            self._pending.extend(rows)
+            if len(self._pending) >= self._batch_size:
+                self._flush()
+        return len(rows)
+        
+    def discard(self, ghid):
+        ''' Removes ghid from the index, if present. Returns True if it
+        was removed.
+        '''
+        with self._lock:
+            self._flush()
+            with self._db:
+                cursor = self._db.execute(
+                    'DELETE FROM objects WHERE ghid = ?', (bytes(ghid),)
+                )
+        return cursor.rowcount > 0
+        
+    def _query(self, sql, params):
+        with self._lock:
+            self._flush()
+            return self._db.execute(sql, params).fetchall()
+        
+    def __len__(self):
+        return self._query('SELECT COUNT(*) FROM objects', ())[0][0]
+        
+    def __contains__(self, ghid):
+        return bool(self._query(
+            'SELECT 1 FROM objects WHERE ghid = ?', (bytes(ghid),)
+        ))
+        
+    def get(self, ghid):
+        ''' Returns the Record for ghid, or raises KeyError.
+        '''
+        rows = self._query(
+            'SELECT ' + _COLUMNS + ' FROM objects WHERE ghid = ?', 
+            (bytes(ghid),)
+        )
+        if not rows:
+            raise KeyError(ghid)
+        return _record(rows[0])
+        
+    @property
+    def cursor(self):
+        ''' The seq of the most recently indexed object (or 0), for use
+        as a later query's after.
+        '''
+        return self._query('SELECT MAX(seq) FROM objects', ())[0][0] or 0
+        
+    def find(self, type=None, party=None, target=None, ghid_dynamic=None, 
+             after=0, limit=None):
+        ''' Returns a list of Records, in ingest order, matching every 
+        criterion given. type may be a low-level class (eg GOBS) or its 
+        name; party, target, and ghid_dynamic are ghids; and after is a
+        seq (eg, the previous result's last seq, or cursor). For 
+        example:
+        
+            index.find(type=GOBS, party=binder)
+            index.find(type=GEOC, party=author)
+            index.find(type=GOBD, after=last_seen)
+        '''
+        clauses = ['seq > ?']
+        params = [after]
+        if type is not None:
+            clauses.append('type = ?')
+            params.append(_type_name(type))
+        if party is not None:
+            clauses.append('party = ?')
+            params.append(_key(party))
+        if target is not None:
+            clauses.append('target = ?')
+            params.append(_key(target))
+        if ghid_dynamic is not None:
+            clauses.append('ghid_dynamic = ?')
+            params.append(_key(ghid_dynamic))
+            
+        sql = (
+            'SELECT ' + _COLUMNS + ' FROM objects WHERE ' + 
+            ' AND '.join(clauses) + ' ORDER BY seq'
+        )
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+            
+        return [_record(row) for row in self._query(sql, params)]
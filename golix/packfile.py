@@ -0,0 +1,468 @@
+'''
+Pack-file archives for large numbers of (mostly small) packed Golix
+objects. Instead of one file per object, objects are concatenated into
+a single archive, followed by a sorted ghid index and a fixed-size
+trailer pointing at that index.
+
+Archive layout
+-----
+
+    header      b'GPAK' + version (Int16) + reserved (Int16)
+    segment     packed object, packed object, ...
+    index       sorted entries of ghid (65 bytes) + offset (Int64)
+                + length (Int32)
+    trailer     index offset (Int64) + entry count (Int64) + b'KAPG'
+
+Appending writes a new segment after the existing trailer, followed by
+a new (complete) index and trailer. The old index stays behind as dead
+space until the archive is compacted, which means appends never
+overwrite anything an existing reader might be looking at.
+
+While an append is in progress, a small journal file next to the 
+archive (path + '.pending') records the size of the last complete 
+archive. Readers only look at that much of the file, and a writer 
+reopening the archive after a crash truncates it back to that size, so
+an interrupted append never loses what was already stored.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'PackWriter',
+    'PackReader',
+    'compact'
+]
+
+# Global dependencies
+import os
+import mmap
+import struct
+
+from smartyparse import ParseError
+
+# Interpackage dependencies
+from .utils import Ghid
+
+from ._getlow import _OBJECT_LOOKUP
+
+
+# ###############################################
+# Format constants
+# ###############################################
+
+
+_MAGIC = b'GPAK'
+_TRAILER_MAGIC = b'KAPG'
+_VERSION = 1
+
+_header = struct.Struct('>4sHH')
+_trailer = struct.Struct('>QQ4s')
+_pending = struct.Struct('>Q')
+_PENDING_SUFFIX = '.pending'
+
+# All currently-defined address algorithms use 64-byte addresses, plus the
+# single byte for the algorithm declaration.
+_GHID_LENGTH = 65
+_entry = struct.Struct('>' + str(_GHID_LENGTH) + 'sQI')
+
+
+def _ghid_key(ghid):
+    ''' Converts a ghid (or its bytes) into the fixed-length index key.
+    '''
+    key = bytes(ghid)
+    if len(key) != _GHID_LENGTH:
+        raise ValueError('Ghid length is incompatible with pack files.')
+    return key
+
+
+def _committed_size(path, size):
+    ''' Returns the size of the last complete archive at path, whose 
+    file is currently size bytes long. That's the whole file, unless an
+    append is in progress (or was interrupted).
+    '''
+    try:
+        with open(path + _PENDING_SUFFIX, 'rb') as f:
+            journal = f.read()
+    except FileNotFoundError:
+        return size
+        
+    # A torn journal means the writer died before appending anything.
+    if len(journal) != _pending.size:
+        return size
+    committed, = _pending.unpack(journal)
+    if committed > size:
+        raise ParseError('Pack file is shorter than its journal.')
+    return committed
+
+
+def _read_index(f, size):
+    ''' Reads the trailer and index from an open file of known size.
+    Returns (index_offset, {ghid bytes: (offset, length)}).
+    '''
+    if size < _header.size + _trailer.size:
+        raise ParseError('File too short to be a Golix pack file.')
+
+    f.seek(0)
+    magic, version, __ = _header.unpack(f.read(_header.size))
+    if magic != _MAGIC:
+        raise ParseError('File is not a Golix pack file.')
+    elif version != _VERSION:
+        raise ParseError('Unsupported pack file version: ' + str(version))
+
+    f.seek(size - _trailer.size)
+    index_offset, count, trailer_magic = _trailer.unpack(
+        f.read(_trailer.size)
+    )
+    if trailer_magic != _TRAILER_MAGIC:
+        raise ParseError('Pack file trailer is missing or corrupt.')
+    if index_offset + (count * _entry.size) + _trailer.size != size:
+        raise ParseError('Pack file index does not match file size.')
+
+    f.seek(index_offset)
+    raw = f.read(count * _entry.size)
+    index = {}
+    for key, offset, length in _entry.iter_unpack(raw):
+        index[key] = (offset, length)
+    return index_offset, index
+
+
+def _write_index(f, index):
+    ''' Writes a sorted index and the trailer at the current position.
+    '''
+    index_offset = f.tell()
+    chunks = []
+    for key in sorted(index):
+        offset, length = index[key]
+        chunks.append(_entry.pack(key, offset, length))
+    f.write(b''.join(chunks))
+    f.write(_trailer.pack(index_offset, len(index), _TRAILER_MAGIC))
+
+
+# ###############################################
+# Writing
+# ###############################################
+
+
+class PackWriter:
+    ''' Appends packed Golix objects to a pack file, creating the file
+    if it does not yet exist. Each writer session (open -> close) adds
+    a single segment and a new index. Use as a context manager, or call
+    close() explicitly; nothing is visible to readers until then. Only
+    one writer may have an archive open at a time.
+    '''
+
+    def __init__(self, path):
+        self._path = path
+        self._journal = path + _PENDING_SUFFIX
+
+        try:
+            self._file = open(path, 'r+b')
+        except FileNotFoundError:
+            self._file = open(path, 'w+b')
+            self._file.write(_header.pack(_MAGIC, _VERSION, 0))
+            self._index = {}
+        else:
+            try:
+                size = os.fstat(self._file.fileno()).st_size
+                size = _committed_size(path, size)
+                # Discard anything left behind by an interrupted append.
+                self._file.truncate(size)
+                # A new archive interrupted before its first close.
+                if size == _header.size:
+                    self._index = {}
+                else:
+                    __, self._index = _read_index(self._file, size)
+            except Exception:
+                self._file.close()
+                raise
+
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        # Record the last complete archive before appending to it.
+        with open(self._journal, 'wb') as f:
+            f.write(_pending.pack(self._file.tell()))
+            f.flush()
+            os.fsync(f.fileno())
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, ghid):
+        return _ghid_key(ghid) in self._index
+
+    def add(self, obj):
+        ''' Adds a packed-and-signed low-level Golix object (GIDC, GEOC,
+        etc). Returns True if it was written, False if the archive
+        already contained it.
+        '''
+        return self.add_packed(obj.ghid, obj.packed)
+
+    def add_packed(self, ghid, packed):
+        ''' Adds already-packed bytes for ghid. Objects are content
+        addressed, so repeated ghids are skipped. Returns True if the
+        object was written, False if it was a duplicate.
+        '''
+        if self._closed:
+            raise RuntimeError('Pack writer has already been closed.')
+
+        key = _ghid_key(ghid)
+        if key in self._index:
+            return False
+
+        offset = self._file.tell()
+        self._file.write(packed)
+        self._index[key] = (offset, len(packed))
+        return True
+
+    def close(self):
+        ''' Finalizes the segment by writing the index and trailer.
+        '''
+        if self._closed:
+            return
+        try:
+            _write_index(self._file, self._index)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._closed = True
+        # Only reached once the new trailer is safely on disk.
+        os.remove(self._journal)
+
+
+# ###############################################
+# Reading
+# ###############################################
+
+
+class PackReader:
+    ''' Memory-mapped, read-only access to a pack file. Lookups by ghid
+    are a binary search directly against the on-disk index, so opening
+    an archive does not load its index into memory.
+    '''
+
+    def __init__(self, path):
+        self._path = path
+        self._file = open(path, 'rb')
+
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            size = _committed_size(path, size)
+            # Also keeps empty files away from mmap, which rejects them.
+            if size < _header.size + _trailer.size:
+                raise ParseError('File too short to be a Golix pack file.')
+            # Anything past size is an append still in progress.
+            self._mmap = mmap.mmap(
+                self._file.fileno(),
+                size,
+                access = mmap.ACCESS_READ
+            )
+            self._load_trailer(size)
+        except Exception:
+            self.close()
+            raise
+
+    def _load_trailer(self, size):
+        magic, version, __ = _header.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ParseError('File is not a Golix pack file.')
+        elif version != _VERSION:
+            raise ParseError('Unsupported pack file version: ' + str(version))
+
+        index_offset, count, trailer_magic = _trailer.unpack_from(
+            self._mmap,
+            size - _trailer.size
+        )
+        if trailer_magic != _TRAILER_MAGIC:
+            raise ParseError('Pack file trailer is missing or corrupt.')
+        if index_offset + (count * _entry.size) + _trailer.size != size:
+            raise ParseError('Pack file index does not match file size.')
+
+        self._index_offset = index_offset
+        self._count = count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        mm = getattr(self, '_mmap', None)
+        if mm is not None:
+            mm.close()
+            self._mmap = None
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def _key_at(self, position):
+        start = self._index_offset + (position * _entry.size)
+        return self._mmap[start:start + _GHID_LENGTH]
+
+    def _entry_at(self, position):
+        return _entry.unpack_from(
+            self._mmap,
+            self._index_offset + (position * _entry.size)
+        )
+
+    def _find(self, key):
+        ''' Binary search for key. Returns (offset, length) or None.
+        '''
+        lo = 0
+        hi = self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < self._count:
+            found, offset, length = self._entry_at(lo)
+            if found == key:
+                return offset, length
+        return None
+
+    def __contains__(self, ghid):
+        return self._find(_ghid_key(ghid)) is not None
+
+    def __iter__(self):
+        ''' Iterates over all contained ghids, in sorted order.
+        '''
+        for position in range(self._count):
+            yield Ghid.from_bytes(self._key_at(position))
+
+    def get(self, ghid):
+        ''' Returns the packed bytes for ghid, or raises KeyError.
+        '''
+        found = self._find(_ghid_key(ghid))
+        if found is None:
+            raise KeyError(ghid)
+        offset, length = found
+        return self._mmap[offset:offset + length]
+
+    def unpack(self, ghid, unpacker=None):
+        ''' Looks up ghid and unpacks it. If unpacker is None, dispatches
+        to the appropriate low-level Golix object based on its magic.
+        Otherwise, unpacker should be eg. FirstParty.unpack_any.
+        '''
+        packed = self.get(ghid)
+        if unpacker is None:
+            return _unpack_dispatch(packed)
+        else:
+            return unpacker(packed)
+
+    def iter_packed(self):
+        ''' Sequentially iterates over (ghid, packed bytes) in on-disk
+        order, which is considerably friendlier to the page cache than
+        iterating in ghid order.
+        '''
+        entries = sorted(
+            (self._entry_at(position) for position in range(self._count)),
+            key = lambda entry: entry[1]
+        )
+        for key, offset, length in entries:
+            yield Ghid.from_bytes(key), self._mmap[offset:offset + length]
+
+    def iter_unpacked(self, unpacker=None):
+        ''' Like iter_packed, but unpacks each object. Yields the
+        unpacked objects.
+        '''
+        if unpacker is None:
+            unpacker = _unpack_dispatch
+        for __, packed in self.iter_packed():
+            yield unpacker(packed)
+
+
+def _unpack_dispatch(packed):
+    # Dispatch reads on the object magic instead of trial-parsing.
+    try:
+        cls = _OBJECT_LOOKUP[bytes(packed[:4])]
+    except KeyError as e:
+        raise ParseError(
+            'Packed data does not appear to be a Golix object.'
+        ) from e
+    return cls.unpack(packed)
+
+
+# ###############################################
+# Maintenance
+# ###############################################
+
+
+def compact(path, drop=None):
+    ''' Rewrites the pack file at path as a single segment, reclaiming
+    the dead space left by previous indices. Any ghids in drop are
+    removed from the archive. The rewrite goes to a temporary file that
+    atomically replaces the original once complete.
+
+    Returns the number of objects in the compacted archive.
+    '''
+    if drop is None:
+        drop = set()
+    else:
+        drop = {_ghid_key(ghid) for ghid in drop}
+
+    tmp_path = path + '.compact'
+    with PackReader(path) as reader:
+        # Write in the existing on-disk order to keep the copy sequential.
+        with open(tmp_path, 'w+b') as f:
+            f.write(_header.pack(_MAGIC, _VERSION, 0))
+            index = {}
+            for ghid, packed in reader.iter_packed():
+                key = bytes(ghid)
+                if key in drop:
+                    continue
+                index[key] = (f.tell(), len(packed))
+                f.write(packed)
+            _write_index(f, index)
+            f.flush()
+            os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    # The compacted archive is complete, so any interrupted append is 
+    # now moot.
+    try:
+        os.remove(path + _PENDING_SUFFIX)
+    except FileNotFoundError:
+        pass
+    return len(index)
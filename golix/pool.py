@@ -0,0 +1,232 @@
+'''
+Process pools with first-party identities resident in every worker, for
+scaling private-key operations (signing in particular) across cores.
+
+Private keys can't be pickled cheaply, so each identity is serialized 
+once, when the pool starts, and loaded into every worker process. After
+that, calls only ship their arguments, and are routed to the right 
+identity by ghid.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'IdentityPool'
+]
+
+# Global dependencies
+import os
+import functools
+
+# Intrapackage dependencies
+from .utils import Ghid
+
+
+# ###############################################
+# Worker side
+# ###############################################
+
+
+# Identities resident in the current worker process: ghid bytes -> 
+# FirstParty. Only populated within pool workers.
+_resident = {}
+
+
+def _initialize(serialized):
+    ''' Pool initializer. Loads every (class, serialization) pair.
+    '''
+    for cls, serialization in serialized:
+        first_party = cls._from_serialized(serialization)
+        _resident[bytes(first_party.ghid)] = first_party
+        
+        
+def _sign(ghid, data):
+    return _resident[ghid]._sign(data)
+    
+    
+def _decrypt_asym(ghid, data):
+    return _resident[ghid]._decrypt_asym(data)
+    
+    
+def _derive_shared(ghid, partner):
+    cls, partner_ghid, raw_keys = partner
+    partner = cls._from_raw_keys(raw_keys, Ghid.from_bytes(partner_ghid))
+    return _resident[ghid]._derive_shared(partner)
+    
+    
+def _ship_partner(partner):
+    ''' Second parties hold (unpicklable) public key objects, so ship 
+    them as raw keys instead.
+    '''
+    raw_keys = partner._pack_keys({
+        'signature': partner._signature_key,
+        'encryption': partner._encryption_key,
+        'exchange': partner._exchange_key
+    })
+    return type(partner), bytes(partner.ghid), raw_keys
+
+
+# ###############################################
+# Pool
+# ###############################################
+
+
+class IdentityPool:
+    ''' A pool of worker processes, each holding its own copy of every
+    identity it was created with. Use as a context manager, or call 
+    close() explicitly.
+    
+    Pools may be passed as workers to the FirstParty batch methods (eg, 
+    make_binds_static) of any identity they hold. Otherwise, calls are 
+    routed by ghid:
+    
+        with IdentityPool([first_party]) as pool:
+            signatures = pool.sign_many(first_party.ghid, addresses)
+    '''
+    
+    def __init__(self, identities, workers=None):
+        ''' identities is an iterable of FirstParties. workers defaults
+        to the cpu count.
+        '''
+        # Deferred to keep import times down.
+        import concurrent.futures
+        
+        serialized = []
+        ghids = set()
+        for identity in identities:
+            serialized.append((type(identity), identity._serialize()))
+            ghids.add(identity.ghid)
+            
+        if workers is None:
+            workers = os.cpu_count() or 1
+            
+        self._ghids = frozenset(ghids)
+        self._workers = workers
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers = workers,
+            initializer = _initialize,
+            initargs = (serialized,)
+        )
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def __contains__(self, ghid):
+        return ghid in self._ghids
+        
+    @property
+    def ghids(self):
+        return self._ghids
+        
+    def close(self):
+        ''' Shuts down the worker processes, waiting for any pending 
+        calls to finish.
+        '''
+        self._executor.shutdown(wait=True)
+        
+    def _route(self, ghid):
+        if ghid not in self._ghids:
+            raise KeyError('Identity is not resident in pool: ' + repr(ghid))
+        return bytes(ghid)
+        
+    def _map(self, func, ghid, items):
+        ''' Ordered map of func(ghid, item) over the pool, batching 
+        items into chunks to amortize the interprocess overhead.
+        '''
+        key = self._route(ghid)
+        items = list(items)
+        chunksize = max(1, len(items) // (self._workers * 4))
+        return list(self._executor.map(
+            functools.partial(func, key), 
+            items, 
+            chunksize = chunksize
+        ))
+        
+    def submit_sign(self, ghid, data):
+        ''' Signs data as the identity with ghid. Returns a Future.
+        '''
+        return self._executor.submit(_sign, self._route(ghid), bytes(data))
+        
+    def sign_many(self, ghid, datas):
+        ''' Signs every item in datas as the identity with ghid. Returns
+        a list of signatures, in order.
+        '''
+        return self._map(_sign, ghid, (bytes(data) for data in datas))
+        
+    def submit_decrypt_asym(self, ghid, data):
+        ''' Decrypts an asymmetric payload addressed to the identity with
+        ghid. Returns a Future.
+        '''
+        return self._executor.submit(
+            _decrypt_asym, 
+            self._route(ghid), 
+            bytes(data)
+        )
+        
+    def decrypt_asym_many(self, ghid, datas):
+        ''' Decrypts many asymmetric payloads addressed to the identity
+        with ghid. Returns a list of plaintexts, in order.
+        '''
+        return self._map(
+            _decrypt_asym, 
+            ghid, 
+            (bytes(data) for data in datas)
+        )
+        
+    def submit_derive_shared(self, ghid, partner):
+        ''' Derives the shared secret between the identity with ghid and
+        the SecondParty partner. Returns a Future.
+        '''
+        return self._executor.submit(
+            _derive_shared, 
+            self._route(ghid), 
+            _ship_partner(partner)
+        )
+        
+    def derive_shared_many(self, ghid, partners):
+        ''' Derives shared secrets between the identity with ghid and 
+        every partner. Returns a dict of partner ghid -> shared secret.
+        '''
+        partners = list(partners)
+        secrets = self._map(
+            _derive_shared, 
+            ghid, 
+            [_ship_partner(partner) for partner in partners]
+        )
+        return {
+            partner.ghid: secret 
+            for partner, secret in zip(partners, secrets)
+        }
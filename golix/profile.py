@@ -0,0 +1,629 @@
+'''
+Workload profiler. Runs a configurable mix of operations against the 
+real API, under either cProfile or a sampling profiler, and writes:
+
+    PREFIX.folded   collapsed stacks (one "frame;frame;frame count" per
+                    line), for flamegraph.pl, speedscope, etc
+    PREFIX.txt      per-function and per-component tables, attributing
+                    time to golix._layout, golix._getlow, golix.cipher,
+                    smartyparse, cryptography, hashlib, and so on
+    PREFIX.prof     raw pstats data (cProfile only)
+
+Usage:
+
+    python -m golix.profile --identities 8 --cipher 1 \\
+        --mix container:10,request:2,bind_static:5 \\
+        --payload-size 1024 --payload-size 1048576 \\
+        --iterations 20 --profiler sample --output regression
+
+Identity generation happens before profiling starts, unless 
+--profile-setup is passed. With cProfile, the collapsed stacks are
+reconstructed from caller/callee totals, so (unlike sampled stacks) 
+they're approximate wherever a function is reached by several paths.
+C functions (eg OpenSSL signing) are attributed to the module or type
+they're defined on. The sampling profiler samples every thread, but 
+only sees Python frames, so time spent in C is charged to its caller.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'OPERATIONS',
+    'Workload',
+    'SamplingProfiler',
+    'main'
+]
+
+# Global dependencies
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import functools
+import threading
+import collections
+
+# Intrapackage dependencies
+from .utils import Ghid
+from .cipher import FirstParty0
+from .cipher import FirstParty1
+from .cipher import FirstParty2
+
+
+_FIRST_PARTIES = {
+    0: FirstParty0,
+    1: FirstParty1,
+    2: FirstParty2
+}
+
+DEFAULT_MIX = {
+    'container': 10,
+    'bind_static': 5,
+    'bind_dynamic': 2,
+    'debind': 1,
+    'request': 2,
+    'identity': 1
+}
+
+
+# ###############################################
+# Workloads
+# ###############################################
+
+
+def _random_ghid(rng):
+    return Ghid(1, rng.getrandbits(512).to_bytes(64, 'big'))
+
+
+def _op_container(author, reader, payload, rng):
+    secret = author.new_secret()
+    geoc = author.make_container(secret, payload)
+    geoc = reader.unpack_container(geoc.packed)
+    reader.receive_container(author.second_party, secret, geoc)
+    
+    
+def _op_bind_static(author, reader, payload, rng):
+    gobs = author.make_bind_static(_random_ghid(rng))
+    gobs = reader.unpack_bind_static(gobs.packed)
+    reader.receive_bind_static(author.second_party, gobs)
+    
+    
+def _op_bind_dynamic(author, reader, payload, rng):
+    gobd = author.make_bind_dynamic(_random_ghid(rng))
+    gobd = reader.unpack_bind_dynamic(gobd.packed)
+    reader.receive_bind_dynamic(author.second_party, gobd)
+    
+    
+def _op_debind(author, reader, payload, rng):
+    gdxx = author.make_debind(_random_ghid(rng))
+    gdxx = reader.unpack_debind(gdxx.packed)
+    reader.receive_debind(author.second_party, gdxx)
+    
+    
+def _op_request(author, reader, payload, rng):
+    handshake = author.make_handshake(
+        secret = author.new_secret(), 
+        target = _random_ghid(rng)
+    )
+    garq = author.make_request(reader.second_party, handshake)
+    garq = reader.unpack_request(garq.packed)
+    reader.receive_request(author.second_party, garq)
+    
+    
+def _op_identity(author, reader, payload, rng):
+    reader.unpack_identity(author.second_party.packed)
+
+
+# Operation name -> func(author, reader, payload, rng). Every operation 
+# covers the full round trip: make, pack, unpack, and verify/receive.
+OPERATIONS = {
+    'container': _op_container,
+    'bind_static': _op_bind_static,
+    'bind_dynamic': _op_bind_dynamic,
+    'debind': _op_debind,
+    'request': _op_request,
+    'identity': _op_identity
+}
+
+
+class Workload:
+    ''' A repeatable mix of operations. mix maps operation names (see 
+    OPERATIONS) to how many times each runs per iteration; payloads for
+    containers cycle through payload_sizes. Each operation picks a 
+    random author and reader from the identities.
+    '''
+    
+    def __init__(self, identities=4, cipher=1, mix=None, 
+                 payload_sizes=(1024,), seed=0):
+        if mix is None:
+            mix = dict(DEFAULT_MIX)
+            # The placeholder asymmetric payload can't be unpacked.
+            if cipher == 0:
+                del mix['request']
+        for name in mix:
+            if name not in OPERATIONS:
+                raise ValueError('Unknown operation: ' + name)
+        if identities < 1:
+            raise ValueError('Need at least one identity.')
+        try:
+            self._cls = _FIRST_PARTIES[cipher]
+        except KeyError:
+            raise ValueError('Unknown ciphersuite: ' + str(cipher)) from None
+        if cipher == 0 and mix.get('request'):
+            raise ValueError('Ciphersuite 0 cannot round-trip requests.')
+            
+        self.identities = identities
+        self.cipher = cipher
+        self.mix = dict(mix)
+        self._rng = random.Random(seed)
+        # Payload contents don't matter, but keep them incompressible.
+        block = bytes(self._rng.getrandbits(8) for __ in range(4096))
+        self._payloads = [
+            (block * (size // len(block) + 1))[:size]
+            for size in payload_sizes
+        ]
+        self._parties = None
+        
+    def setup(self):
+        ''' Generates the identities.
+        '''
+        self._parties = [self._cls() for __ in range(self.identities)]
+        
+    def run(self, iterations=1):
+        ''' Runs the mix iterations times. Returns the number of 
+        operations performed.
+        '''
+        if self._parties is None:
+            self.setup()
+            
+        rng = self._rng
+        parties = self._parties
+        schedule = [
+            name for name, count in self.mix.items() for __ in range(count)
+        ]
+        count = 0
+        for iteration in range(iterations):
+            rng.shuffle(schedule)
+            for name in schedule:
+                payload = self._payloads[count % len(self._payloads)]
+                OPERATIONS[name](
+                    rng.choice(parties), 
+                    rng.choice(parties), 
+                    payload, 
+                    rng
+                )
+                count += 1
+        return count
+
+
+# ###############################################
+# Profilers
+# ###############################################
+
+
+def _module_name(filename):
+    ''' Best-effort dotted module name for a source file.
+    '''
+    if not filename or filename.startswith('<') or filename == '~':
+        return '<builtin>'
+        
+    parts = os.path.normpath(filename).split(os.sep)
+    name = parts[-1]
+    if name.endswith('.py'):
+        name = name[:-3]
+    parts[-1] = name
+    
+    for anchor in ('site-packages', 'dist-packages'):
+        if anchor in parts:
+            parts = parts[len(parts) - parts[::-1].index(anchor):]
+            break
+    else:
+        if 'golix' in parts:
+            parts = parts[len(parts) - 1 - parts[::-1].index('golix'):]
+        else:
+            parts = parts[-1:]
+            
+    if parts[-1] == '__init__' and len(parts) > 1:
+        parts = parts[:-1]
+    return '.'.join(parts)
+    
+    
+# cProfile names C functions like "<method 'verify' of 
+# 'cryptography...Ed25519PublicKey' objects>" or "<built-in method 
+# _hashlib.hmac_digest>".
+_C_METHOD = re.compile(r"<method '(\w+)' of '([\w.]+)' objects>")
+_C_FUNCTION = re.compile(r'<built-in method ([\w.]+)>')
+
+
+def _resolve_module(module):
+    ''' Extension submodules (eg cryptography's Rust bindings) often 
+    report a bare name like 'x25519', which isn't in sys.modules. If 
+    every loaded module with that last component belongs to the same 
+    package, assume it's part of that package.
+    '''
+    if not module:
+        return 'builtins'
+    elif module in sys.modules or module in sys.builtin_module_names:
+        return module
+        
+    suffix = '.' + module
+    packages = {
+        name.split('.')[0] for name in list(sys.modules) 
+        if name.endswith(suffix)
+    }
+    if len(packages) == 1:
+        return packages.pop() + suffix
+    return module
+    
+    
+@functools.lru_cache(maxsize=None)
+def _c_frame(name):
+    ''' Best-effort (module, function) for a C function, from the name 
+    cProfile records for it.
+    '''
+    match = _C_METHOD.fullmatch(name)
+    if match:
+        method, owner = match.groups()
+        module, __, cls = owner.rpartition('.')
+        return _resolve_module(module), cls + '.' + method
+        
+    match = _C_FUNCTION.fullmatch(name)
+    if match:
+        module, __, function = match.group(1).rpartition('.')
+        return _resolve_module(module), function
+        
+    return '<builtin>', name
+    
+    
+_COMPONENTS = {
+    'smartyparse': 'smartyparse',
+    'cryptography': 'cryptography',
+    'donna25519': 'donna25519',
+    'builtins': '<builtin>',
+    # The standard library's (mostly OpenSSL-backed) hashing.
+    'hashlib': 'hashlib',
+    'hmac': 'hashlib',
+    '_hashlib': 'hashlib',
+    '_blake2': 'hashlib',
+    '_sha2': 'hashlib',
+    '_sha512': 'hashlib',
+    '_ssl': 'hashlib',
+}
+
+
+def _component(module):
+    ''' Collapses a module name into the component it belongs to: 
+    golix modules are kept separate, and third-party packages are 
+    grouped by their top-level name.
+    '''
+    if module == 'golix' or module.startswith('golix.'):
+        return module
+    elif module == '<builtin>':
+        return module
+    return _COMPONENTS.get(module.split('.')[0], 'other')
+    
+    
+# Innermost frames of threads that are blocked waiting (eg idle pool 
+# workers, or a caller waiting on them), which aren't worth sampling.
+_IDLE_MODULES = {'threading'}
+_IDLE_FRAMES = {('concurrent.futures.thread', '_worker')}
+
+
+class SamplingProfiler:
+    ''' Periodically samples the stacks of running threads from a 
+    background thread: every thread, or only thread_id if passed. 
+    Threads that are blocked waiting in threading (or idle in a thread 
+    pool) are skipped, so that time is charged to the threads doing the
+    work. Stacks are recorded root first, as tuples of (module, 
+    function) frames. Each sample counts interval seconds, so with 
+    several busy threads, the totals add up to more than the wall time.
+    '''
+    
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self._thread_id = thread_id
+        self._stop = threading.Event()
+        self._sampler = None
+        self.stacks = collections.Counter()
+        self.samples = 0
+        
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        
+    def start(self):
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self._thread_id is not None:
+                frames = {self._thread_id: frames.get(self._thread_id)}
+                
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((
+                        _module_name(code.co_filename),
+                        getattr(code, 'co_qualname', code.co_name)
+                    ))
+                    frame = frame.f_back
+                if not stack or stack[0][0] in _IDLE_MODULES or (
+                    stack[0] in _IDLE_FRAMES):
+                        continue
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+                self.samples += 1
+                
+    def table(self):
+        ''' Returns {(module, function): (self seconds, total seconds)}.
+        '''
+        totals = collections.Counter()
+        selfs = collections.Counter()
+        for stack, count in self.stacks.items():
+            selfs[stack[-1]] += count
+            for frame in set(stack):
+                totals[frame] += count
+        return {
+            frame: (selfs[frame] * self.interval, totals[frame] * self.interval)
+            for frame in totals
+        }
+        
+    def folded(self):
+        ''' Returns {collapsed stack string: count}.
+        '''
+        return {
+            ';'.join(module + ':' + function for module, function in stack): 
+            count
+            for stack, count in self.stacks.items()
+        }
+
+
+def _pstats_frame(func):
+    filename, __, name = func
+    # cProfile records C functions with a filename of '~'.
+    if filename == '~':
+        return _c_frame(name)
+    return _module_name(filename), name
+    
+    
+def _pstats_table(stats):
+    table = collections.defaultdict(lambda: [0.0, 0.0])
+    for func, (__, __, tt, ct, __) in stats.stats.items():
+        entry = table[_pstats_frame(func)]
+        entry[0] += tt
+        entry[1] += ct
+    return {frame: tuple(times) for frame, times in table.items()}
+    
+    
+def _pstats_folded(stats, resolution=1e-6, max_depth=64):
+    ''' Reconstructs collapsed stacks from pstats caller/callee totals, 
+    splitting each function's time between its callers in proportion to
+    the time spent on each call edge. Counts are in microseconds.
+    '''
+    callees = collections.defaultdict(dict)
+    roots = []
+    for func, (__, __, __, __, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+            
+    folded = collections.Counter()
+    
+    def visit(func, stack, share):
+        __, __, tt, ct, __ = stats.stats[func]
+        if ct <= 0 or share * ct < resolution:
+            return
+        label = ';'.join(stack)
+        own = int(round(share * tt / resolution))
+        if own:
+            folded[label] += own
+        if len(stack) >= max_depth:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            frame = ':'.join(_pstats_frame(callee))
+            # Skip recursion, which is already included in the totals.
+            if frame in stack:
+                continue
+            visit(callee, stack + [frame], share * edge_time / ct)
+            
+    for root in roots:
+        visit(root, [':'.join(_pstats_frame(root))], 1.0)
+    return folded
+
+
+def _write_tables(f, table, top):
+    ''' Writes the per-component and per-function tables.
+    '''
+    components = collections.Counter()
+    for (module, __), (own, __) in table.items():
+        components[_component(module)] += own
+    total = sum(components.values()) or 1.0
+    
+    f.write('Self time by component\n')
+    f.write('{:<28} {:>12} {:>8}\n'.format('component', 'seconds', '%'))
+    for component, seconds in components.most_common():
+        f.write('{:<28} {:>12.4f} {:>7.1f}%\n'.format(
+            component, seconds, seconds / total * 100
+        ))
+        
+    f.write('\nTop functions by self time\n')
+    f.write('{:<16} {:>10} {:>10}  {}\n'.format(
+        'component', 'self (s)', 'total (s)', 'function'
+    ))
+    ranked = sorted(table.items(), key=lambda item: item[1][0], reverse=True)
+    for (module, function), (own, cumulative) in ranked[:top]:
+        f.write('{:<16} {:>10.4f} {:>10.4f}  {}:{}\n'.format(
+            _component(module), own, cumulative, module, function
+        ))
+
+
+# ###############################################
+# Command line
+# ###############################################
+
+
+def _parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        name, __, count = item.partition(':')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                'Unknown operation: ' + repr(name) + ' (choose from ' + 
+                ', '.join(sorted(OPERATIONS)) + ')'
+            )
+        try:
+            mix[name] = int(count) if count else 1
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                'Bad count for ' + name + ': ' + repr(count)
+            ) from None
+    return mix
+    
+    
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog = 'python -m golix.profile',
+        description = 'Profile a workload of Golix operations.'
+    )
+    parser.add_argument('--identities', type=int, default=4)
+    parser.add_argument(
+        '--cipher', type=int, default=1, choices=sorted(_FIRST_PARTIES)
+    )
+    parser.add_argument(
+        '--mix', type=_parse_mix, default=None,
+        help = 'Comma-separated operation:count pairs, from: ' + 
+               ', '.join(sorted(OPERATIONS)) + ' (default: ' + 
+               ','.join(name + ':' + str(count) 
+                        for name, count in DEFAULT_MIX.items()) + 
+               ', without requests for ciphersuite 0)'
+    )
+    parser.add_argument(
+        '--payload-size', type=int, action='append', dest='payload_sizes',
+        help = 'Container payload size in bytes; repeat for a mix.'
+    )
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument(
+        '--profiler', choices=('cprofile', 'sample'), default='cprofile'
+    )
+    parser.add_argument(
+        '--interval', type=float, default=0.001,
+        help = 'Sampling interval in seconds (sampling profiler only).'
+    )
+    parser.add_argument('--output', default='golix-profile')
+    parser.add_argument('--top', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--profile-setup', action='store_true',
+        help = 'Include identity generation in the profile.'
+    )
+    return parser
+    
+    
+def main(argv=None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    try:
+        workload = Workload(
+            identities = args.identities,
+            cipher = args.cipher,
+            mix = args.mix,
+            payload_sizes = args.payload_sizes or (1024,),
+            seed = args.seed
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    
+    def target():
+        if args.profile_setup:
+            workload.setup()
+        return workload.run(args.iterations)
+        
+    if not args.profile_setup:
+        workload.setup()
+        
+    start = time.perf_counter()
+    if args.profiler == 'cprofile':
+        # Deferred so that the sampling profiler doesn't pay for them.
+        import cProfile
+        import pstats
+        
+        profiler = cProfile.Profile()
+        operations = profiler.runcall(target)
+        elapsed = time.perf_counter() - start
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(args.output + '.prof')
+        table = _pstats_table(stats)
+        folded = _pstats_folded(stats)
+        
+    else:
+        with SamplingProfiler(args.interval) as profiler:
+            operations = target()
+        elapsed = time.perf_counter() - start
+        table = profiler.table()
+        folded = profiler.folded()
+        
+    with open(args.output + '.folded', 'w') as f:
+        for stack, count in sorted(folded.items()):
+            f.write(stack + ' ' + str(count) + '\n')
+            
+    with open(args.output + '.txt', 'w') as f:
+        f.write('{:,} operations in {:.3f} s ({})\n\n'.format(
+            operations, elapsed, args.profiler
+        ))
+        _write_tables(f, table, args.top)
+        
+    with open(args.output + '.txt') as f:
+        sys.stdout.write(f.read())
+    return 0
+    
+    
+if __name__ == '__main__':
+    sys.exit(main())
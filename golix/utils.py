@@ -33,20 +33,18 @@ golix: A python library for Golix protocol object manipulation.
 ------------------------------------------------------
 
 '''
+import os
 import abc
 import base64
+import hashlib
+import hmac
+import struct
 
 from collections import namedtuple
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 
-from smartyparse import SmartyParser
-from smartyparse import ListyParser
-from smartyparse import ParseHelper
-from smartyparse import parsers
-from smartyparse import references
-
 # ----------------------------------------------------------------------
 # Address algorithms
 
@@ -64,6 +62,18 @@ class _AddressAlgoBase(metaclass=abc.ABCMeta):
         del h
         return digest
         
+    @classmethod
+    def create_segmented(cls, segments):
+        ''' Like create, but for data split across an iterable of 
+        bytes-like segments, which are hashed without being joined.
+        '''
+        h = hashes.Hash(cls._HASH_ALGO(), backend=default_backend())
+        for segment in segments:
+            h.update(segment)
+        digest = h.finalize()
+        del h
+        return digest
+        
     @classmethod
     def verify(cls, address, data):
         ''' Verifies an address (note: not the whole ghid) from data.
@@ -88,6 +98,10 @@ class AddressAlgo0(_AddressAlgoBase):
     def create(cls, data):
         return _dummy_address
         
+    @classmethod
+    def create_segmented(cls, segments):
+        return _dummy_address
+        
     @classmethod
     def verify(cls, address, data):
         return True
@@ -99,11 +113,36 @@ class AddressAlgo1(_AddressAlgoBase):
     _HASH_ALGO = hashes.SHA512
     ADDRESS_LENGTH = _HASH_ALGO.digest_size
 
+    
+class AddressAlgo2(_AddressAlgoBase):
+    ''' BLAKE2b-512
+    '''
+    # Digest size must match SHA512, so that all ghids are the same length.
+    _DIGEST_SIZE = 64
+    ADDRESS_LENGTH = _DIGEST_SIZE
+    
+    @classmethod
+    def create(cls, data):
+        ''' Creates an address (note: not the whole ghid) from data.
+        '''
+        return hashlib.blake2b(data, digest_size=cls._DIGEST_SIZE).digest()
+        
+    @classmethod
+    def create_segmented(cls, segments):
+        ''' Like create, but for data split across an iterable of 
+        bytes-like segments, which are hashed without being joined.
+        '''
+        h = hashlib.blake2b(digest_size=cls._DIGEST_SIZE)
+        for segment in segments:
+            h.update(segment)
+        return h.digest()
+
 # Zero should be rendered inop, IE ignore all input data and generate
 # symbolic representations
 ADDRESS_ALGOS = {
     0: AddressAlgo0,
-    1: AddressAlgo1
+    1: AddressAlgo1,
+    2: AddressAlgo2
 }
     
 def hash_lookup(num):
@@ -122,14 +161,6 @@ _dummy_mac = b'[[ Start MAC ' + (b'-' * 40) + b' End MAC ]]'
 _dummy_asym = b'[[ Start asymmetric payload ' + (b'-' * 458) + b' End asymmetric payload ]]'
 _dummy_pubkey = b'[ ' + (b'-') * 21 + b' MOCK PUBLIC KEY ' + (b'-') * 22 + b' ]'
 
-# ----------------------------------------------------------------------
-# Hash algo identifier / length block
-
-_hash_algo_lookup = {
-    0: ParseHelper(parsers.Blob(length=len(_dummy_address))),
-    1: ParseHelper(parsers.Blob(length=64))
-}
-
 # ----------------------------------------------------------------------
 # Ghids and parsers therefore.
 
@@ -232,72 +263,6 @@ class Ghid:
 _dummy_ghid = Ghid(0, _dummy_address)
 
 
-def _ghid_transform(unpacked_spo):
-    ''' Transforms an unpacked SmartyParseObject into a .utils.Ghid.
-    If using algo zero, also eliminates the address and replaces with
-    None.
-    '''
-    ghid = Ghid(algo=unpacked_spo['algo'], address=unpacked_spo['address'])
-    
-    if ghid.algo == 0:
-        ghid.address = None
-        
-    return ghid
-
-
-def generate_ghid_parser():
-    ghid_parser = SmartyParser()
-    ghid_parser['algo'] = ParseHelper(parsers.Int8(signed=False))
-    ghid_parser['address'] = None
-
-    @references(ghid_parser)
-    def _ghid_format(self, algo):
-        try:
-            self['address'] = _hash_algo_lookup[algo]
-        except KeyError as e:
-            print(algo)
-            raise ValueError('Improper hash algorithm declaration.') from e
-            
-    ghid_parser['algo'].register_callback('prepack', _ghid_format)
-    ghid_parser['algo'].register_callback('postunpack', _ghid_format)
-    
-    # Don't forget to transform the object back to a utils.Ghid
-    ghid_parser.register_callback('postunpack', _ghid_transform, modify=True)
-    
-    return ghid_parser
-    
-    
-def generate_ghidlist_parser():    
-    return ListyParser(parsers=[generate_ghid_parser()])
-
-# ----------------------------------------------------------------------
-# Generalized object dispatchers
-
-def _gen_dispatch(header, lookup, key):
-    @references(header)
-    def _dispatch_obj(self, version, key=key):
-        try:
-            self[key] = lookup[version]
-        except KeyError:
-            raise parsers.ParseError('No matching version number available.')
-    return _dispatch_obj
-    
-# This should keep working even with the addition of new version numbers
-def _gen_body_update(header, lookup, key):
-    @references(header)
-    def _update_body(self, parsed, key=key):
-        try:
-            self['body'][key] = lookup[parsed]
-        except KeyError:
-            raise parsers.ParseError('No matching object body key available.')
-    return _update_body
-    
-def _callback_multi(*funcs):
-    def generated_callback(value):
-        for f in funcs:
-            f(value)
-    return generated_callback
-
 # ----------------------------------------------------------------------
 # Cipher length lookup block
 
@@ -317,15 +282,110 @@ cipher_length_lookup = {
         'seed': 16
     },
     2: {
-        'key': 64,
-        'sig': 512,
+        'key': 32,
+        'sig': 64,
         'mac': 64,
-        'asym': 512,
-        'seed': 0
+        # Ephemeral X25519 key (32), then the length-prefixed handshake 
+        # (2 + 188, the largest request), then the MAC (64).
+        'asym': 286,
+        'seed': 16
     }
 }
 
 
+# ----------------------------------------------------------------------
+# Parallel helpers
+
+
+def _map_ordered(func, iterable, workers=None):
+    ''' Maps func across iterable, returning a list of results in input
+    order. Uses a thread pool of size workers (default: cpu count), 
+    which is only useful when func spends its time in code that releases
+    the GIL (eg OpenSSL). Use workers=1 for a deterministic, 
+    single-threaded fallback in the calling thread.
+    '''
+    items = list(iterable)
+    if workers is None:
+        workers = os.cpu_count() or 1
+        
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+        
+    # Deferred to keep import times down.
+    import concurrent.futures
+    
+    workers = min(workers, len(items))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+def _map_unordered(func, iterable, workers=None):
+    ''' Maps func across iterable in a thread pool of size workers 
+    (default: cpu count), yielding (index, result, error) as each item 
+    completes -- ie, not necessarily in input order. Exceptions are 
+    isolated per item: exactly one of result and error is None. The 
+    number of items in flight is bounded, so iterable may be large (or 
+    lazy). workers=1 runs in the calling thread, in order.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+        
+    def call(item):
+        try:
+            return func(item), None
+        except Exception as exc:
+            return None, exc
+        
+    if workers <= 1:
+        for index, item in enumerate(iterable):
+            yield (index,) + call(item)
+        return
+        
+    # Deferred to keep import times down.
+    import concurrent.futures
+    
+    window = workers * 4
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, item in enumerate(iterable):
+            pending[pool.submit(call, item)] = index
+            if len(pending) >= window:
+                done, __ = concurrent.futures.wait(
+                    pending, 
+                    return_when = concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield (pending.pop(future),) + future.result()
+                    
+        for future in concurrent.futures.as_completed(pending):
+            yield (pending[future],) + future.result()
+
+
+# ----------------------------------------------------------------------
+# Key derivation helpers
+
+
+def _xor_bytes(a, b):
+    ''' Bitwise XOR of two equal-length bytes-like objects, done as a
+    single int operation instead of a per-byte Python loop.
+    '''
+    length = len(a)
+    if len(b) != length:
+        raise ValueError('Cannot XOR bytes of unequal length.')
+    return (
+        int.from_bytes(a, byteorder='big') ^ int.from_bytes(b, byteorder='big')
+    ).to_bytes(length, byteorder='big')
+    
+    
+def _hkdf_sha512(ikm, salt, info=b''):
+    ''' HKDF-SHA512 (RFC 5869) for a single 64-byte output block. 
+    Identical output to cryptography's HKDF with length=64, but uses the 
+    stdlib's one-shot HMAC, so no intermediate objects are created.
+    '''
+    prk = hmac.digest(salt, ikm, 'sha512')
+    return hmac.digest(prk, info + b'\x01', 'sha512')
+
+
 # ----------------------------------------------------------------------
 # Misc objects
 
@@ -334,35 +394,64 @@ class SecurityError(RuntimeError):
     pass
     
     
-_secret_parser = SmartyParser()
-_secret_parser['magic'] = ParseHelper(parsers.Literal(b'SH'))
-_secret_parser['version'] = ParseHelper(parsers.Int16(signed=False))
-_secret_parser['cipher'] = ParseHelper(parsers.Int8(signed=False))
-_secret_parser['key'] = None
-_secret_parser['seed'] = None
-
-def _secret_cipher_update(cipher):
-    key_length = cipher_length_lookup[cipher]['key']
-    seed_length = cipher_length_lookup[cipher]['seed']
-    _secret_parser['key'] = ParseHelper(parsers.Blob(length=key_length))
-    _secret_parser['seed'] = ParseHelper(parsers.Blob(length=seed_length))
-
-_secret_parser['cipher'].register_callback(
-    'prepack', 
-    _secret_cipher_update
-)
-_secret_parser['cipher'].register_callback(
-    'postunpack', 
-    _secret_cipher_update
-)
-
-# Hard code this in for now
-_secret_parsers = {
-    2: _secret_parser
+_SECRET_MAGIC = b'SH'
+
+_secret_latest = 2
+_secret_versions = {2}
+
+# Secrets are fixed-size for any given cipher, so they're serialized with
+# plain structs (one per cipher). tests/_spec.py keeps the smartyparse 
+# reference definition they're checked against.
+_secret_header = struct.Struct('>2sHB')
+_secret_codecs = {
+    cipher: struct.Struct(
+        '>2sHB' + str(lengths['key']) + 's' + str(lengths['seed']) + 's'
+    )
+    for cipher, lengths in cipher_length_lookup.items()
 }
 
-_secret_latest = max(list(_secret_parsers))
-_secret_versions = set(_secret_parsers)
+
+def _secret_parse_error(message):
+    # Deferred to keep import times down; this is only needed for errors.
+    from smartyparse import ParseError
+    return ParseError(message)
+
+
+def _unpack_secret(cls, data, offset):
+    ''' Unpacks a single Secret from data at offset. Returns (secret, 
+    end offset).
+    '''
+    try:
+        magic, version, cipher = _secret_header.unpack_from(data, offset)
+    except struct.error as e:
+        raise _secret_parse_error('Insufficient data for Secret.') from e
+        
+    if magic != _SECRET_MAGIC:
+        raise _secret_parse_error(
+            'Mismatched literal: received ' + str(magic) + 
+            ', expected ' + str(_SECRET_MAGIC)
+        )
+    if version not in _secret_versions:
+        raise _secret_parse_error('Improper Secret version declaration.')
+    try:
+        codec = _secret_codecs[cipher]
+    except KeyError:
+        raise _secret_parse_error(
+            'No matching cipher available: ' + str(cipher)
+        ) from None
+        
+    try:
+        __, __, __, key, seed = codec.unpack_from(data, offset)
+    except struct.error as e:
+        raise _secret_parse_error('Insufficient data for Secret.') from e
+        
+    # The codec guarantees the lengths, so skip the checks in __init__.
+    self = cls.__new__(cls)
+    self._cipher = cipher
+    self._version = version
+    self._key = key
+    self._seed = seed
+    return self, offset + codec.size
     
     
 class Secret:
@@ -374,7 +463,7 @@ class Secret:
     # a case to be made for discouraging people from using Secrets for
     # anything other than, well, secrets.
     __slots__ = ['_key', '_seed', '_version', '_cipher', '__weakref__']
-    MAGIC = _secret_parser['magic'].parser.value
+    MAGIC = _SECRET_MAGIC
     
     def __init__(self, cipher, key, seed=None, version='latest'):
         # Most of these checks should probably be moved into property 
@@ -404,8 +493,9 @@ class Secret:
             
         self._cipher = cipher
         self._version = version
-        self._key = key
-        self._seed = seed
+        # The struct codecs only accept bytes, not arbitrary buffers.
+        self._key = bytes(key)
+        self._seed = bytes(seed)
        
     @property
     def key(self):
@@ -416,18 +506,50 @@ class Secret:
         return self._seed
     
     def __bytes__(self):
-        return bytes(self._parser.pack(self._control))
+        return _secret_codecs[self._cipher].pack(
+            self.MAGIC,
+            self._version,
+            self._cipher,
+            self._key,
+            self._seed
+        )
         
     @classmethod
     def from_bytes(cls, data):
-        # Okay, this is hard-coding in version 2 as the unpacker. Oh well.
-        obj = _secret_parser.unpack(data)
-        return cls(
-            cipher = obj['cipher'],
-            key = bytes(obj['key']),
-            seed = bytes(obj['seed']),
-            version = obj['version']
-        )
+        # As with smartyparse, any trailing data is ignored.
+        self, __ = _unpack_secret(cls, data, 0)
+        return self
+        
+    @classmethod
+    def pack_many(cls, secrets):
+        ''' Serializes many secrets (eg, a vault snapshot) into a single
+        bytes object. Secrets are self-delimiting, so this is just their
+        concatenation.
+        '''
+        return b''.join([
+            _secret_codecs[secret._cipher].pack(
+                secret.MAGIC,
+                secret._version,
+                secret._cipher,
+                secret._key,
+                secret._seed
+            )
+            for secret in secrets
+        ])
+        
+    @classmethod
+    def unpack_many(cls, data):
+        ''' Inverse of pack_many. Returns a list of Secrets, in order.
+        Unlike from_bytes, data must be consumed exactly.
+        '''
+        data = memoryview(data)
+        secrets = []
+        offset = 0
+        end = len(data)
+        while offset < end:
+            secret, offset = _unpack_secret(cls, data, offset)
+            secrets.append(secret)
+        return secrets
         
     @property
     def version(self):
@@ -437,10 +559,6 @@ class Secret:
     def cipher(self):
         return self._cipher
         
-    @property
-    def _parser(self):
-        return _secret_parsers[self.version]
-        
     @property
     def _control(self):
         return {
@@ -0,0 +1,155 @@
+'''
+Fail-fast validation of untrusted Golix objects. Everything here works
+from the object header and length fields alone, so a hostile or corrupt
+object is rejected in constant time, before any parsing, hashing, or 
+decryption.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'Limits',
+    'DEFAULT_LIMITS',
+    'validate'
+]
+
+# Global dependencies
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import ADDRESS_ALGOS
+
+from ._getlow import PackedObject
+from ._layout import OBJECT_FORMATS
+from ._layout import _header
+
+
+# The smallest possible ghid, for bounding the number of history entries.
+_MIN_GHID_LENGTH = 1 + min(
+    algo.ADDRESS_LENGTH for algo in ADDRESS_ALGOS.values()
+)
+
+
+class Limits:
+    ''' Structural limits for untrusted input. Anything left as None is
+    unlimited (or, for ciphers and versions, limited only to what the 
+    library understands).
+    
+    max_size        largest acceptable packed object, in bytes
+    ciphers         collection of acceptable ciphersuites
+    versions        dict of object magic (eg b'GEOC') -> collection of
+                    acceptable versions for that object
+    max_history     most history entries acceptable in a GOBD
+    '''
+    
+    def __init__(self, max_size=None, ciphers=None, versions=None, 
+                 max_history=None):
+        self.max_size = max_size
+        self.ciphers = None if ciphers is None else frozenset(ciphers)
+        if versions is None:
+            self.versions = {}
+        else:
+            self.versions = {
+                magic: frozenset(allowed) 
+                for magic, allowed in versions.items()
+            }
+        self.max_history = max_history
+        
+    def __repr__(self):
+        return (
+            type(self).__name__ + '(max_size=' + repr(self.max_size) + 
+            ', ciphers=' + repr(self.ciphers) + 
+            ', versions=' + repr(self.versions) + 
+            ', max_history=' + repr(self.max_history) + ')'
+        )
+        
+        
+# Only checks that objects are internally consistent.
+DEFAULT_LIMITS = Limits()
+
+
+def validate(data, limits=None):
+    ''' Checks packed data against limits (default: DEFAULT_LIMITS), and
+    checks that its declared lengths exactly match the available data. 
+    Returns the object's magic number (eg b'GEOC'). Raises ParseError 
+    for anything invalid.
+    '''
+    if limits is None:
+        limits = DEFAULT_LIMITS
+    if isinstance(data, PackedObject):
+        data = data.packed
+        
+    view = memoryview(data)
+    available = len(view)
+    
+    if limits.max_size is not None and available > limits.max_size:
+        raise ParseError(
+            'Object size ' + str(available) + ' exceeds limit of ' + 
+            str(limits.max_size)
+        )
+    if available < _header.size:
+        raise ParseError('Insufficient data for object header.')
+        
+    magic, version, cipher = _header.unpack_from(view)
+    try:
+        fmt = OBJECT_FORMATS[magic]
+    except KeyError:
+        raise ParseError(
+            'Packed data does not appear to be a Golix object.'
+        ) from None
+        
+    if limits.ciphers is not None and cipher not in limits.ciphers:
+        raise ParseError('Ciphersuite not allowed: ' + str(cipher))
+    allowed = limits.versions.get(magic)
+    if allowed is not None and version not in allowed:
+        raise ParseError(
+            'Version ' + str(version) + ' not allowed for ' + str(magic)
+        )
+        
+    # This also rejects unknown versions and ciphersuites.
+    lengths = {}
+    declared = fmt.declared_size(view, lengths)
+    if declared is not None and declared != available:
+        raise ParseError(
+            'Declared length ' + str(declared) + ' does not match the ' + 
+            str(available) + ' bytes available.'
+        )
+        
+    if limits.max_history is not None:
+        history = lengths.get('history_length', 0) // _MIN_GHID_LENGTH
+        if history > limits.max_history:
+            raise ParseError(
+                'History length exceeds limit of ' + str(limits.max_history)
+            )
+            
+    return magic
@@ -0,0 +1,512 @@
+'''
+Secret vaults: persistent storage for the (many) Secrets needed to open
+GEOCs, keyed by container ghid. Instead of a dict of Secret objects, 
+secrets live in a single memory-mapped file of fixed-size records, 
+each one sealed under the vault's master Secret. Only a small LRU of 
+decoded Secrets is held in memory.
+
+File layout
+-----
+
+    header      b'GSVT' + version (Int16) + reserved (Int16)
+                + capacity (Int64) + live records (Int64)
+                + used slots (Int64) + salt (16 bytes) + key check 
+                (32 bytes)
+    records     capacity fixed-size slots of state (Int8) + ghid 
+                (65 bytes) + nonce (12 bytes) + sealed secret
+
+The records form an open-addressed hash table (linear probing) on the
+ghid address, which is already a cryptographic hash, so lookups touch
+one or two records regardless of vault size. Records are sealed with 
+AES-256-GCM, with the ghid as associated data, so they can't be moved
+between slots or ghids undetected. When the table gets half full, it
+is rehashed into a new file twice the size, which atomically replaces 
+the old one.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Control * imports
+__all__ = [
+    'SecretVault'
+]
+
+# Global dependencies
+import os
+import hmac
+import mmap
+import struct
+import threading
+import collections
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
+
+from smartyparse import ParseError
+
+# Intrapackage dependencies
+from .utils import Ghid
+from .utils import Secret
+from .utils import SecurityError
+from .utils import AsymHandshake
+from .utils import _hkdf_sha512
+from .utils import _secret_codecs
+
+
+# ###############################################
+# Format constants
+# ###############################################
+
+
+_MAGIC = b'GSVT'
+_VERSION = 1
+
+_SALT_LENGTH = 16
+_CHECK_LENGTH = 32
+_NONCE_LENGTH = 12
+_TAG_LENGTH = 16
+
+_header = struct.Struct(
+    '>4sHHQQQ' + str(_SALT_LENGTH) + 's' + str(_CHECK_LENGTH) + 's'
+)
+
+# As with pack files, all currently-defined address algorithms use 
+# 64-byte addresses, plus the single byte for the algorithm declaration.
+_GHID_LENGTH = 65
+
+# Secrets are padded up to the largest serialization of any cipher, so
+# that every record is the same size. Secret.from_bytes ignores the
+# padding.
+_SECRET_LENGTH = max(codec.size for codec in _secret_codecs.values())
+_SEALED_LENGTH = _SECRET_LENGTH + _TAG_LENGTH
+_record = struct.Struct(
+    '>B' + str(_GHID_LENGTH) + 's' + str(_NONCE_LENGTH) + 's' + 
+    str(_SEALED_LENGTH) + 's'
+)
+
+_EMPTY = 0
+_LIVE = 1
+_DELETED = 2
+
+# Rehash once more than this fraction of slots (including deleted ones)
+# are in use. Linear probing degrades quickly past about half full.
+_MAX_LOAD = 0.5
+_MIN_CAPACITY = 64
+
+_INFO_SEAL = b'golix-secret-vault-seal'
+_INFO_CHECK = b'golix-secret-vault-check'
+
+
+def _ghid_key(ghid):
+    ''' Converts a ghid (or its bytes) into the fixed-length record key.
+    '''
+    key = bytes(ghid)
+    if len(key) != _GHID_LENGTH:
+        raise ValueError('Ghid length is incompatible with secret vaults.')
+    return key
+    
+    
+def _vault_keys(master, salt):
+    ''' Expands the master Secret into (sealing key, key check).
+    '''
+    if not isinstance(master, Secret):
+        raise TypeError('master must be a Secret.')
+    material = bytes(master.key) + bytes(master.seed)
+    seal = _hkdf_sha512(material, salt, _INFO_SEAL)[:32]
+    check = _hkdf_sha512(material, salt, _INFO_CHECK)[:_CHECK_LENGTH]
+    return seal, check
+    
+    
+def _capacity_for(count):
+    capacity = _MIN_CAPACITY
+    while count > capacity * _MAX_LOAD:
+        capacity *= 2
+    return capacity
+    
+    
+def _create(path, salt, check, capacity, records=()):
+    ''' Writes a new vault file at path, inserting the (already sealed)
+    records into a table of the given capacity. Returns the number of 
+    records written.
+    '''
+    mask = capacity - 1
+    table = bytearray(capacity * _record.size)
+    count = 0
+    for record in records:
+        key = record[1:1 + _GHID_LENGTH]
+        slot = _home_slot(key, mask)
+        while table[slot * _record.size] != _EMPTY:
+            slot = (slot + 1) & mask
+        table[slot * _record.size:(slot + 1) * _record.size] = record
+        count += 1
+        
+    with open(path, 'wb') as f:
+        f.write(_header.pack(
+            _MAGIC, _VERSION, 0, capacity, count, count, salt, check
+        ))
+        f.write(table)
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+    
+    
+def _home_slot(key, mask):
+    # Skip the address algorithm byte; the rest is a uniform hash.
+    return int.from_bytes(key[1:9], 'big') & mask
+
+
+# ###############################################
+# Vault
+# ###############################################
+
+
+class SecretVault:
+    ''' A persistent, encrypted mapping of container ghid -> Secret,
+    backed by a single memory-mapped file at path (created if it does
+    not exist). master is the Secret that all records are sealed under;
+    opening an existing vault with the wrong master raises 
+    SecurityError. cache_size controls how many decoded Secrets are 
+    kept in memory.
+    
+    Changes are written straight into the mapped file; call flush() (or
+    close()) to force them to disk. Vaults are safe to share between 
+    threads, but not between processes.
+    '''
+    
+    def __init__(self, path, master, cache_size=1024):
+        self._path = path
+        self._cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap = None
+        
+        if not os.path.exists(path):
+            salt = os.urandom(_SALT_LENGTH)
+            __, check = _vault_keys(master, salt)
+            _create(path, salt, check, _MIN_CAPACITY)
+            
+        self._open()
+        
+        try:
+            seal, check = _vault_keys(master, self._salt)
+            if not hmac.compare_digest(check, self._check):
+                raise SecurityError(
+                    'Incorrect master secret for this vault.'
+                )
+        except Exception:
+            self.close()
+            raise
+            
+        self._aead = AESGCM(seal)
+        
+    def _open(self):
+        ''' (Re)maps the file at self._path and reads its header.
+        '''
+        self._file = open(self._path, 'r+b')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < _header.size:
+                raise ParseError('File too short to be a Golix secret vault.')
+                
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+            (
+                magic, 
+                version, 
+                __, 
+                capacity, 
+                count, 
+                used, 
+                self._salt, 
+                self._check
+            ) = _header.unpack_from(self._mmap, 0)
+            
+            if magic != _MAGIC:
+                raise ParseError('File is not a Golix secret vault.')
+            elif version != _VERSION:
+                raise ParseError(
+                    'Unsupported secret vault version: ' + str(version)
+                )
+            elif capacity & (capacity - 1) or not capacity:
+                raise ParseError('Secret vault capacity is corrupt.')
+            elif _header.size + (capacity * _record.size) != size:
+                raise ParseError('Secret vault does not match file size.')
+                
+        except Exception:
+            self._unmap()
+            raise
+            
+        self._capacity = capacity
+        self._count = count
+        self._used = used
+        
+    def _unmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def flush(self):
+        ''' Forces any changes out to disk.
+        '''
+        with self._lock:
+            self._check_open()
+            self._mmap.flush()
+            
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.flush()
+            self._unmap()
+            self._cache.clear()
+            
+    def _check_open(self):
+        if self._mmap is None:
+            raise RuntimeError('Secret vault has already been closed.')
+            
+    def __len__(self):
+        return self._count
+        
+    def _write_counts(self):
+        # Capacity, live records, and used slots are contiguous in the 
+        # header, directly after the magic, version, and reserved bytes.
+        struct.pack_into('>QQ', self._mmap, 16, self._count, self._used)
+        
+    def _find(self, key):
+        ''' Probes for key. Returns (slot, found), where slot is either
+        the slot containing key, or the first reusable slot for it.
+        '''
+        mask = self._capacity - 1
+        slot = _home_slot(key, mask)
+        reusable = None
+        mm = self._mmap
+        while True:
+            start = _header.size + (slot * _record.size)
+            state = mm[start]
+            if state == _EMPTY:
+                if reusable is None:
+                    reusable = slot
+                return reusable, False
+            elif state == _DELETED:
+                if reusable is None:
+                    reusable = slot
+            elif mm[start + 1:start + 1 + _GHID_LENGTH] == key:
+                return slot, True
+            slot = (slot + 1) & mask
+            
+    def _seal(self, key, secret):
+        if not isinstance(secret, Secret):
+            raise TypeError('Vaults can only store Secrets.')
+        nonce = os.urandom(_NONCE_LENGTH)
+        plaintext = bytes(secret).ljust(_SECRET_LENGTH, b'\x00')
+        return _record.pack(
+            _LIVE, 
+            key, 
+            nonce, 
+            self._aead.encrypt(nonce, plaintext, key)
+        )
+        
+    def _unseal(self, slot, key):
+        start = _header.size + (slot * _record.size)
+        __, __, nonce, sealed = _record.unpack_from(self._mmap, start)
+        try:
+            plaintext = self._aead.decrypt(nonce, sealed, key)
+        except InvalidTag as e:
+            raise SecurityError(
+                'Secret vault record failed authentication.'
+            ) from e
+        return Secret.from_bytes(plaintext)
+        
+    def _cache_put(self, key, secret):
+        cache = self._cache
+        cache[key] = secret
+        cache.move_to_end(key)
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+            
+    def __contains__(self, ghid):
+        key = _ghid_key(ghid)
+        with self._lock:
+            self._check_open()
+            if key in self._cache:
+                return True
+            return self._find(key)[1]
+            
+    def __getitem__(self, ghid):
+        ''' Returns the Secret for ghid, or raises KeyError.
+        '''
+        key = _ghid_key(ghid)
+        with self._lock:
+            self._check_open()
+            try:
+                secret = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                self._cache.move_to_end(key)
+                return secret
+                
+            slot, found = self._find(key)
+            if not found:
+                raise KeyError(ghid)
+            secret = self._unseal(slot, key)
+            self._cache_put(key, secret)
+            return secret
+            
+    def get(self, ghid, default=None):
+        try:
+            return self[ghid]
+        except KeyError:
+            return default
+            
+    def __iter__(self):
+        ''' Iterates over the ghids of all stored secrets, in no 
+        particular order.
+        '''
+        with self._lock:
+            self._check_open()
+            keys = []
+            mm = self._mmap
+            for slot in range(self._capacity):
+                start = _header.size + (slot * _record.size)
+                if mm[start] == _LIVE:
+                    keys.append(mm[start + 1:start + 1 + _GHID_LENGTH])
+        for key in keys:
+            yield Ghid.from_bytes(key)
+            
+    def put(self, ghid, secret):
+        ''' Stores secret for ghid, replacing any existing secret.
+        '''
+        self.put_many([(ghid, secret)])
+        
+    def __setitem__(self, ghid, secret):
+        self.put(ghid, secret)
+        
+    def put_many(self, items):
+        ''' Stores many (ghid, secret) pairs at once. Returns the number
+        of pairs stored.
+        '''
+        # Seal everything first, so that a bad item leaves the vault 
+        # untouched.
+        records = [
+            (key, self._seal(key, secret), secret) 
+            for key, secret in 
+            ((_ghid_key(ghid), secret) for ghid, secret in items)
+        ]
+        
+        with self._lock:
+            self._check_open()
+            self._reserve(len(records))
+            for key, record, secret in records:
+                slot, found = self._find(key)
+                start = _header.size + (slot * _record.size)
+                if not found:
+                    self._count += 1
+                    if self._mmap[start] == _EMPTY:
+                        self._used += 1
+                self._mmap[start:start + _record.size] = record
+                self._cache_put(key, secret)
+            self._write_counts()
+            
+        return len(records)
+        
+    def import_handshakes(self, requests):
+        ''' Stores the secrets from many handshakes, eg the results of
+        FirstParty.receive_requests. Anything that isn't a handshake 
+        (acks, naks) is skipped. Returns the number of secrets stored.
+        
+        Only pass requests that have been through receive_request(s);
+        unverified handshakes could contain anything.
+        '''
+        return self.put_many(
+            (request.target, request.secret) 
+            for request in requests
+            if isinstance(request, AsymHandshake)
+        )
+        
+    def discard(self, ghid):
+        ''' Removes the secret for ghid, if there is one. Returns True if
+        a secret was removed.
+        '''
+        key = _ghid_key(ghid)
+        with self._lock:
+            self._check_open()
+            self._cache.pop(key, None)
+            slot, found = self._find(key)
+            if not found:
+                return False
+                
+            start = _header.size + (slot * _record.size)
+            # Scrub the record, but leave a tombstone so that probing 
+            # continues past it.
+            self._mmap[start:start + _record.size] = (
+                bytes([_DELETED]) + bytes(_record.size - 1)
+            )
+            self._count -= 1
+            self._write_counts()
+            return True
+            
+    def __delitem__(self, ghid):
+        if not self.discard(ghid):
+            raise KeyError(ghid)
+            
+    def _reserve(self, additional):
+        ''' Makes sure there's room for additional new records, rehashing
+        into a larger file if needed. Must hold the lock.
+        '''
+        if self._used + additional <= self._capacity * _MAX_LOAD:
+            return
+            
+        # Deleted records are dropped during the rehash, so size the new
+        # table off the live count only.
+        capacity = _capacity_for(self._count + additional)
+        mm = self._mmap
+        records = []
+        for slot in range(self._capacity):
+            start = _header.size + (slot * _record.size)
+            if mm[start] == _LIVE:
+                records.append(mm[start:start + _record.size])
+                
+        tmp_path = self._path + '.rehash'
+        _create(tmp_path, self._salt, self._check, capacity, records)
+        
+        self._unmap()
+        os.replace(tmp_path, self._path)
+        self._open()
@@ -78,11 +78,16 @@ setup(
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 
+    # Module-level __getattr__ (PEP 562) is used for lazy loading, and 
+    # memoryview.toreadonly for signed objects.
+    python_requires='>=3.8',
+
     # What does your project relate to?
     keywords='golix, encryption, security, privacy, private, identity, sharing',
 
@@ -100,7 +105,7 @@ setup(
     # https://packaging.python.org/en/latest/requirements.html
     install_requires=[
         'donna25519>=0.1.1',
-        'cryptoraphy>=1.4',
+        'cryptography>=2.6',
         'smartyparse>=0.1.0',
     ],
 
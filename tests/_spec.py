@@ -1,6 +1,7 @@
 '''
-Spec-based definition of Golix objects. It sure ain't beautiful, but it's 
-getting the job done for now.
+Spec-based (smartyparse) reference definition of Golix objects, for 
+checking the compiled layouts in golix._layout and the Secret codec in 
+golix.utils against. Not used by the library itself.
 
 LICENSING
 -------------------------------------------------
@@ -40,20 +41,118 @@ from smartyparse import ListyParser
 from smartyparse import parsers
 from smartyparse import references
 
-from .utils import Ghid
+from golix.utils import Ghid
+from golix.utils import cipher_length_lookup
 
-from .utils import _gen_dispatch
-from .utils import _gen_body_update
-from .utils import _callback_multi
+from golix.utils import _SECRET_MAGIC
+from golix.utils import _dummy_asym
+from golix.utils import _dummy_mac
+from golix.utils import _dummy_signature
+from golix.utils import _dummy_address
+from golix.utils import _dummy_pubkey
 
-from .utils import _dummy_asym
-from .utils import _dummy_mac
-from .utils import _dummy_signature
-from .utils import _dummy_address
-from .utils import _dummy_ghid
-from .utils import _dummy_pubkey
-from .utils import generate_ghid_parser
-from .utils import generate_ghidlist_parser
+# ----------------------------------------------------------------------
+# Hash algo identifier / length block
+
+_hash_algo_lookup = {
+    0: ParseHelper(parsers.Blob(length=len(_dummy_address))),
+    1: ParseHelper(parsers.Blob(length=64)),
+    2: ParseHelper(parsers.Blob(length=64))
+}
+
+# ----------------------------------------------------------------------
+# Ghid parsers
+
+def _ghid_transform(unpacked_spo):
+    ''' Transforms an unpacked SmartyParseObject into a .utils.Ghid.
+    If using algo zero, also eliminates the address and replaces with
+    None.
+    '''
+    ghid = Ghid(algo=unpacked_spo['algo'], address=unpacked_spo['address'])
+    
+    if ghid.algo == 0:
+        ghid.address = None
+        
+    return ghid
+
+
+def generate_ghid_parser():
+    ghid_parser = SmartyParser()
+    ghid_parser['algo'] = ParseHelper(parsers.Int8(signed=False))
+    ghid_parser['address'] = None
+
+    @references(ghid_parser)
+    def _ghid_format(self, algo):
+        try:
+            self['address'] = _hash_algo_lookup[algo]
+        except KeyError as e:
+            print(algo)
+            raise ValueError('Improper hash algorithm declaration.') from e
+            
+    ghid_parser['algo'].register_callback('prepack', _ghid_format)
+    ghid_parser['algo'].register_callback('postunpack', _ghid_format)
+    
+    # Don't forget to transform the object back to a utils.Ghid
+    ghid_parser.register_callback('postunpack', _ghid_transform, modify=True)
+    
+    return ghid_parser
+    
+    
+def generate_ghidlist_parser():    
+    return ListyParser(parsers=[generate_ghid_parser()])
+
+# ----------------------------------------------------------------------
+# Generalized object dispatchers
+
+def _gen_dispatch(header, lookup, key):
+    @references(header)
+    def _dispatch_obj(self, version, key=key):
+        try:
+            self[key] = lookup[version]
+        except KeyError:
+            raise parsers.ParseError('No matching version number available.')
+    return _dispatch_obj
+    
+# This should keep working even with the addition of new version numbers
+def _gen_body_update(header, lookup, key):
+    @references(header)
+    def _update_body(self, parsed, key=key):
+        try:
+            self['body'][key] = lookup[parsed]
+        except KeyError:
+            raise parsers.ParseError('No matching object body key available.')
+    return _update_body
+    
+def _callback_multi(*funcs):
+    def generated_callback(value):
+        for f in funcs:
+            f(value)
+    return generated_callback
+
+# ----------------------------------------------------------------------
+# Secrets
+
+_secret_parser = SmartyParser()
+_secret_parser['magic'] = ParseHelper(parsers.Literal(_SECRET_MAGIC))
+_secret_parser['version'] = ParseHelper(parsers.Int16(signed=False))
+_secret_parser['cipher'] = ParseHelper(parsers.Int8(signed=False))
+_secret_parser['key'] = None
+_secret_parser['seed'] = None
+
+def _secret_cipher_update(cipher):
+    key_length = cipher_length_lookup[cipher]['key']
+    seed_length = cipher_length_lookup[cipher]['seed']
+    _secret_parser['key'] = ParseHelper(parsers.Blob(length=key_length))
+    _secret_parser['seed'] = ParseHelper(parsers.Blob(length=seed_length))
+
+_secret_parser['cipher'].register_callback(
+    'prepack', 
+    _secret_cipher_update
+)
+_secret_parser['cipher'].register_callback(
+    'postunpack', 
+    _secret_cipher_update
+)
 
 # ----------------------------------------------------------------------
 # Crypto parsers definition block
@@ -61,7 +160,7 @@ from .utils import generate_ghidlist_parser
 _signature_parsers = {}
 _signature_parsers[0] = ParseHelper(parsers.Literal(_dummy_signature, verify=False))
 _signature_parsers[1] = ParseHelper(parsers.Blob(length=512))
-_signature_parsers[2] = ParseHelper(parsers.Blob(length=512))
+_signature_parsers[2] = ParseHelper(parsers.Blob(length=64))
 
 _mac_parsers = {}
 _mac_parsers[0] = ParseHelper(parsers.Literal(_dummy_mac, verify=False))
@@ -71,17 +170,17 @@ _mac_parsers[2] = ParseHelper(parsers.Blob(length=64))
 _asym_parsers = {}
 _asym_parsers[0] = ParseHelper(parsers.Literal(_dummy_asym, verify=False))
 _asym_parsers[1] = ParseHelper(parsers.Blob(length=512))
-_asym_parsers[2] = ParseHelper(parsers.Blob(length=512))
+_asym_parsers[2] = ParseHelper(parsers.Blob(length=286))
 
 _pubkey_parsers_sig = {}
 _pubkey_parsers_sig[0] = ParseHelper(parsers.Literal(_dummy_pubkey, verify=False))
 _pubkey_parsers_sig[1] = ParseHelper(parsers.Blob(length=512))
-_pubkey_parsers_sig[2] = ParseHelper(parsers.Blob(length=512))
+_pubkey_parsers_sig[2] = ParseHelper(parsers.Blob(length=32))
 
 _pubkey_parsers_encrypt = {}
 _pubkey_parsers_encrypt[0] = ParseHelper(parsers.Literal(_dummy_pubkey, verify=False))
 _pubkey_parsers_encrypt[1] = ParseHelper(parsers.Blob(length=512))
-_pubkey_parsers_encrypt[2] = ParseHelper(parsers.Blob(length=512))
+_pubkey_parsers_encrypt[2] = ParseHelper(parsers.Blob(length=32))
 
 _pubkey_parsers_exchange = {}
 _pubkey_parsers_exchange[0] = ParseHelper(parsers.Literal(_dummy_pubkey, verify=False))
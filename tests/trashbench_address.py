@@ -0,0 +1,100 @@
+'''
+Benchmarks for address algorithms: SHA-512 (1) vs BLAKE2b (2).
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GEOC
+from golix.utils import hash_lookup
+from golix.utils import _dummy_ghid
+from golix.utils import _dummy_signature
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _best_of(func, repeat):
+    best = None
+    for __ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+    
+    
+def bench_geoc(size, repeat):
+    payload = os.urandom(size)
+    print('GEOC payload {:,} bytes:'.format(size))
+    
+    for address_algo in (1, 2):
+        addresser = hash_lookup(address_algo)
+        hash_time = _best_of(lambda: addresser.create(payload), repeat)
+        
+        def pack():
+            geoc = GEOC(author=_dummy_ghid, payload=payload)
+            geoc.pack(cipher=0, address_algo=address_algo)
+            geoc.pack_signature(_dummy_signature)
+            return geoc
+            
+        packed = pack().packed
+        pack_time = _best_of(pack, repeat)
+        unpack_time = _best_of(lambda: GEOC.unpack(packed), repeat)
+        
+        print(
+            '    {:<16} hash {:>7.1f} MB/s   pack {:>8.2f} ms   '
+            'unpack+verify {:>8.2f} ms'.format(
+                addresser.__name__,
+                size / hash_time / 1e6,
+                pack_time * 1e3,
+                unpack_time * 1e3
+            )
+        )
+        
+        
+def run(repeat=5):
+    for size in (1 << 20, 8 << 20, 32 << 20):
+        bench_geoc(size, repeat)
+    
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,114 @@
+'''
+Benchmarks for antientropy.py: round trips and bytes exchanged to find
+the difference between two replicas, against exchanging ghid lists.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import pickle
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are abnormal (don't use in production) inclusions.
+from golix.antientropy import MerkleTree
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+class _Transport:
+    def __init__(self, remote):
+        self.remote = remote
+        self.round_trips = 0
+        self.transferred = 0
+        
+    def __call__(self, request):
+        self.round_trips += 1
+        request = pickle.dumps(request)
+        response = pickle.dumps(self.remote.handle(pickle.loads(request)))
+        self.transferred += len(request) + len(response)
+        return pickle.loads(response)
+        
+        
+def run(count=100000):
+    print('Building trees of {:,} ghids...'.format(count))
+    shared = [Ghid(1, os.urandom(64)) for __ in range(count)]
+    
+    start = time.perf_counter()
+    base = MerkleTree(shared)
+    elapsed = time.perf_counter() - start
+    print('    {:.1f} us per ghid (bulk)'.format(elapsed / count * 1e6))
+    
+    extra = [Ghid(1, os.urandom(64)) for __ in range(10000)]
+    start = time.perf_counter()
+    for ghid in extra:
+        base.add(ghid)
+    elapsed = time.perf_counter() - start
+    print('    {:.1f} us per add'.format(elapsed / len(extra) * 1e6))
+    for ghid in extra:
+        base.discard(ghid)
+    
+    full_list = len(pickle.dumps([bytes(ghid) for ghid in shared]))
+    print('    exchanging the full ghid list: {:,} bytes'.format(full_list))
+    
+    for differences in (0, 1, 100, 10000):
+        local = MerkleTree(shared)
+        remote = MerkleTree(shared)
+        for ghid in (Ghid(1, os.urandom(64)) for __ in range(differences)):
+            local.add(ghid)
+        transport = _Transport(remote)
+        
+        start = time.perf_counter()
+        missing_here, missing_there = local.difference(transport)
+        elapsed = time.perf_counter() - start
+        assert len(missing_there) == differences
+        print(
+            '    {:>6,} differences: {} round trips, {:>10,} bytes, '
+            '{:.1f} ms'.format(
+                differences, 
+                transport.round_trips, 
+                transport.transferred,
+                elapsed * 1e3
+            )
+        )
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,110 @@
+'''
+Benchmarks for chunking.py: bytes rewritten for small edits to large
+payloads, chunked versus a single container.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.chunking import split_chunks
+from golix.chunking import make_chunked
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _edits(data):
+    middle = len(data) // 2
+    
+    flipped = bytearray(data)
+    flipped[middle] ^= 0xFF
+    yield 'overwrite 1 byte', flipped
+    
+    yield 'insert 1 byte', data[:middle] + b'x' + data[middle:]
+    yield 'delete 1 KiB', data[:middle] + data[middle + 1024:]
+    yield 'append 4 KiB', data + os.urandom(4096)
+    
+    
+def _uploaded(chunked):
+    return sum(len(geoc.packed) for geoc in chunked.chunks) + len(
+        chunked.container.packed
+    )
+    
+    
+def run(megabytes=32):
+    author = FirstParty2()
+    data = os.urandom(megabytes * 1024 * 1024)
+    print('Payload: {:,} bytes'.format(len(data)))
+    
+    start = time.perf_counter()
+    chunks = split_chunks(data)
+    elapsed = time.perf_counter() - start
+    print('    chunking: {:.1f} MB/s, {:,} chunks'.format(
+        megabytes / elapsed, len(chunks)
+    ))
+    
+    start = time.perf_counter()
+    author.make_container(author.new_secret(), data)
+    print('    single container:  {:.3f} s'.format(
+        time.perf_counter() - start
+    ))
+    
+    start = time.perf_counter()
+    original = make_chunked(author, data)
+    print('    chunked container: {:.3f} s, {:,} bytes'.format(
+        time.perf_counter() - start, _uploaded(original)
+    ))
+    
+    print('Rewritten after edits (single container is always the whole '
+          'payload):')
+    for label, edited in _edits(data):
+        start = time.perf_counter()
+        chunked = make_chunked(author, edited, previous=original.manifest)
+        elapsed = time.perf_counter() - start
+        print('    {:<18} {:>3} new chunks {:>12,} bytes   {:.3f} s'.format(
+            label, len(chunked.chunks), _uploaded(chunked), elapsed
+        ))
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
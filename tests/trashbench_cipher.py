@@ -0,0 +1,328 @@
+'''
+Benchmarks for cipher.py: ciphersuite 1 (RSA-4096) vs 2 (Ed25519/X25519).
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import concurrent.futures
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# These are semi-normal imports
+from golix.cipher import FirstParty1
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) imports.
+from golix.utils import _xor_bytes
+from golix.utils import _hkdf_sha512
+from golix.cipher import _aes_ctr
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _timeit(func, repeat):
+    start = time.perf_counter()
+    for __ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+    
+    
+def _report(label, seconds):
+    print('    {:<32} {:>12.1f} us'.format(label, seconds * 1e6))
+    
+    
+def bench_suite(cls, repeat):
+    print(cls.__name__ + ':')
+    keygen_repeat = max(1, repeat // 50) if cls is FirstParty1 else repeat
+    _report('identity generation', _timeit(cls, keygen_repeat))
+    
+    author = cls()
+    partner = cls()
+    secret = author.new_secret()
+    address = author.ghid.address
+    
+    signature = author._sign(address)
+    _report('sign', _timeit(lambda: author._sign(address), repeat))
+    _report(
+        'verify', 
+        _timeit(
+            lambda: cls._verify(author.second_party, signature, address), 
+            repeat
+        )
+    )
+    
+    handshake = author.make_handshake(secret=secret, target=author.ghid)
+    request = author.make_request(partner.second_party, handshake)
+    _report(
+        'make_request', 
+        _timeit(lambda: author.make_request(partner.second_party, handshake), 
+                repeat)
+    )
+    _report(
+        'unpack_request', 
+        _timeit(lambda: partner.unpack_request(request.packed), repeat)
+    )
+    
+    container = author.make_container(secret, b'Hello world')
+    binding = author.make_bind_static(container.ghid)
+    print('    sizes: GIDC {} B, GEOC(11 B) {} B, GOBS {} B, GARQ {} B'.format(
+        len(author.second_party.packed), 
+        len(container.packed), 
+        len(binding.packed),
+        len(request.packed)
+    ))
+    
+    
+class _LegacyNoopSHA512(hashes.SHA512):
+    ''' The hash-context hack formerly used to sign addresses through the
+    (since removed) signer() API. Only used for before/after comparison
+    when the installed cryptography still supports it.
+    '''
+    def __init__(self, noopdata, *args, **kwargs):
+        self.__data = noopdata
+        super().__init__(*args, **kwargs)
+        self.algorithm = self
+        
+    def copy(self):
+        return self
+        
+    def update(self, data):
+        pass
+        
+    def finalize(self):
+        return self.__data
+        
+        
+def _legacy_sign(first_party, data):
+    signer = first_party._signature_key.signer(
+        padding.PSS(
+            mgf = padding.MGF1(hashes.SHA512()),
+            salt_length = hashes.SHA512.digest_size
+        ),
+        hashes.SHA512()
+    )
+    signer._hash_ctx = _LegacyNoopSHA512(data)
+    return signer.finalize()
+    
+    
+def _throughput(func, count, workers):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda __: func(), range(count)))
+    return count / (time.perf_counter() - start)
+    
+    
+def bench_rsa_signing(count):
+    print('RSA-4096 PSS (ciphersuite 1) per-op latency and thread scaling:')
+    author = FirstParty1()
+    address = author.ghid.address
+    signature = author._sign(address)
+    
+    ops = [
+        ('prehashed sign', lambda: author._sign(address)),
+        ('prehashed verify', lambda: FirstParty1._verify(
+            author.second_party, signature, address
+        ))
+    ]
+    if hasattr(author._signature_key, 'signer'):
+        ops.append(('legacy signer() sign', lambda: _legacy_sign(
+            author, address
+        )))
+    else:
+        print('    (legacy signer() API unavailable; skipping "before")')
+        
+    for label, func in ops:
+        _report(label, _timeit(func, count))
+        for workers in (1, 2, 4, 8):
+            print('        {} threads: {:>10.1f} ops/s'.format(
+                workers, _throughput(func, count, workers)
+            ))
+    
+    
+def _legacy_derive_shared(first_party, partner):
+    ''' The previous derivation: per-byte XOR and a new HKDF instance.
+    '''
+    ecdh = first_party._exchange_key.exchange(partner._exchange_key)
+    salt = bytes([
+        a ^ b for a, b in zip(first_party.ghid.address, partner.ghid.address)
+    ])
+    instance = HKDF(
+        algorithm = hashes.SHA512(),
+        length = hashes.SHA512.digest_size,
+        salt = salt,
+        info = b''
+    )
+    return instance.derive(ecdh)
+    
+    
+def bench_derive_shared(count):
+    print('Shared secret derivation (ciphersuite 2), {:,} partners:'.format(
+        count
+    ))
+    first_party = FirstParty2()
+    partners = [FirstParty2().second_party for __ in range(count)]
+    
+    def legacy():
+        for partner in partners:
+            _legacy_derive_shared(first_party, partner)
+            
+    def single():
+        for partner in partners:
+            first_party._derive_shared(partner)
+            
+    def batched():
+        first_party._derive_shared_many(partners)
+    
+    for label, func in (('legacy', legacy),
+                        ('_derive_shared', single),
+                        ('_derive_shared_many', batched)):
+        _report(label + ' (per partner)', _timeit(func, 5) / count)
+        
+    # ECDH dominates the above, so also isolate the salt and KDF.
+    ikm = first_party._exchange_key.exchange(partners[0]._exchange_key)
+    mine = first_party.ghid.address
+    theirs = partners[0].ghid.address
+    
+    def legacy_kdf():
+        salt = bytes([a ^ b for a, b in zip(mine, theirs)])
+        HKDF(
+            algorithm = hashes.SHA512(),
+            length = hashes.SHA512.digest_size,
+            salt = salt,
+            info = b''
+        ).derive(ikm)
+        
+    def kdf():
+        _hkdf_sha512(ikm, _xor_bytes(mine, theirs))
+        
+    _report('legacy salt + KDF', _timeit(legacy_kdf, count))
+    _report('_xor_bytes + _hkdf_sha512', _timeit(kdf, count))
+    
+    
+def bench_unpack_requests(count):
+    print('Draining {:,} requests (ciphersuite 1):'.format(count))
+    sender = FirstParty1()
+    recipient = FirstParty1()
+    secret = sender.new_secret()
+    inbox = []
+    for ii in range(count):
+        request = sender.make_handshake(
+            target = sender.ghid, 
+            secret = secret
+        )
+        inbox.append(sender.make_request(
+            recipient = recipient.second_party, 
+            request = request
+        ).packed)
+        
+    def serial():
+        for packed in inbox:
+            recipient.unpack_request(packed)
+    _report('unpack_request (per request)', _timeit(serial, 1) / count)
+        
+    for workers in (1, 2, 4, 8):
+        def bulk():
+            for index, garq, error in recipient.unpack_requests(
+                inbox, workers):
+                    assert error is None
+        _report(
+            'unpack_requests, ' + str(workers) + ' workers', 
+            _timeit(bulk, 1) / count
+        )
+    
+    
+def bench_fanout(count):
+    print('Sharing a container with {:,} recipients:'.format(count))
+    for cls in (FirstParty1, FirstParty2):
+        author = cls()
+        # Identity generation is slow for RSA, so reuse a few recipients.
+        recipients = [cls().second_party for __ in range(4)] * (count // 4)
+        handshake = author.make_handshake(
+            secret = author.new_secret(), 
+            target = author.ghid
+        )
+        
+        def serial():
+            for recipient in recipients:
+                author.make_request(recipient, handshake)
+        _report(
+            cls.__name__ + ' make_request', 
+            _timeit(serial, 1) / len(recipients)
+        )
+        
+        for workers in (1, 4):
+            _report(
+                cls.__name__ + ' fanout, ' + str(workers) + ' workers',
+                _timeit(
+                    lambda: author.make_requests_fanout(
+                        recipients, handshake, workers
+                    ), 
+                    1
+                ) / len(recipients)
+            )
+    
+    
+def bench_aes_ctr(megabytes):
+    print('AES-256-CTR over {:,} MiB:'.format(megabytes))
+    payload = os.urandom(megabytes * 1024 * 1024)
+    key = os.urandom(32)
+    nonce = os.urandom(16)
+    
+    for workers in (1, 2, 4, 8):
+        seconds = _timeit(lambda: _aes_ctr(key, nonce, payload, workers), 3)
+        print('    {} workers: {:>10.1f} MB/s'.format(
+            workers, megabytes / seconds
+        ))
+    
+    
+def run(repeat=200):
+    bench_suite(FirstParty1, repeat)
+    bench_suite(FirstParty2, repeat)
+    bench_rsa_signing(repeat)
+    bench_derive_shared(repeat)
+    bench_unpack_requests(repeat)
+    bench_fanout(repeat)
+    bench_aes_ctr(256)
+    
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
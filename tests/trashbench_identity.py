@@ -0,0 +1,189 @@
+'''
+Benchmarks for loading SecondParty identities from packed GIDCs.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import pickle
+import tempfile
+import subprocess
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from donna25519 import PublicKey as ECDHPublic
+
+# These are normal inclusions
+from golix import load_second_parties
+from golix import load_first_party
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty1
+from golix.cipher import SecondParty1
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GIDC
+from golix.cipher import CRYPTO_BACKEND
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _load_numbers(packed):
+    ''' The previous loading route: full GIDC unpack, and public keys
+    built through int.from_bytes and RSAPublicNumbers.
+    '''
+    gidc = GIDC.unpack(packed)
+    keys = {}
+    for name, value in (('signature', gidc.signature_key),
+                        ('encryption', gidc.encryption_key)):
+        n = int.from_bytes(value, byteorder='big')
+        nums = rsa.RSAPublicNumbers(n=n, e=65537)
+        keys[name] = nums.public_key(CRYPTO_BACKEND)
+    keys['exchange'] = ECDHPublic(bytes(gidc.exchange_key))
+    return SecondParty1(keys=keys, ghid=gidc.ghid)
+    
+    
+def _report(label, seconds, count):
+    print(
+        '    {:<36} {:>9.3f} s   {:>8.1f} us/identity'.format(
+            label, seconds, seconds / count * 1e6
+        )
+    )
+    
+    
+# Loads a FirstParty in a fresh interpreter, timing imports included.
+_COLD_START = '''
+import sys, time, pickle
+start = time.perf_counter()
+from golix import load_first_party
+from golix.cipher import FirstParty1
+with open(sys.argv[1], 'rb') as f:
+    data = f.read()
+if sys.argv[2] == 'serialized':
+    FirstParty1._from_serialized(pickle.loads(data))
+elif sys.argv[2] == 'passphrase':
+    load_first_party(data, passphrase='benchmark')
+else:
+    load_first_party(data)
+print(time.perf_counter() - start)
+'''
+
+
+def _report_load(label, seconds):
+    print('    {:<36} {:>9.1f} ms'.format(label, seconds * 1e3))
+    
+    
+def bench_first_party(repeat=3):
+    ''' Cold-start (fresh process) FirstParty1 load times, for the 
+    _serialize dict (pickled) and each identity file envelope.
+    '''
+    first_party = FirstParty1()
+    secret = first_party.new_secret()
+    print('FirstParty1 load, cold start (import + load), best of ' + 
+          str(repeat) + ':')
+    
+    with tempfile.TemporaryDirectory() as root:
+        cases = (
+            ('_from_serialized', 
+                pickle.dumps(first_party._serialize()), 'serialized'),
+            ('identity file, plain', first_party.dump(), 'plain'),
+            ('identity file, passphrase', 
+                first_party.dump(passphrase='benchmark'), 'passphrase'),
+        )
+        for label, data, mode in cases:
+            path = os.path.join(root, mode)
+            with open(path, 'wb') as f:
+                f.write(data)
+            times = [
+                float(subprocess.check_output(
+                    [sys.executable, '-c', _COLD_START, path, mode]
+                ))
+                for __ in range(repeat)
+            ]
+            _report_load(label, min(times))
+            
+        # Secrets can't be passed through argv, so time this in-process.
+        dumped = first_party.dump(secret=secret)
+        start = time.perf_counter()
+        load_first_party(dumped, secret=secret)
+        _report_load('identity file, secret (warm)', time.perf_counter() - start)
+        
+        
+def run(count=5000):
+    # Key generation is slow, so reuse a handful of real identities.
+    print('Generating identities...')
+    rsa_ids = [FirstParty1().second_party.packed for __ in range(4)]
+    ec_ids = [FirstParty2().second_party.packed for __ in range(4)]
+    rsa_ids = (rsa_ids * count)[:count]
+    ec_ids = (ec_ids * count)[:count]
+    
+    print('Ciphersuite 1 (RSA-4096), {:,} identities:'.format(count))
+    start = time.perf_counter()
+    for packed in rsa_ids:
+        _load_numbers(packed)
+    _report('GIDC.unpack + RSAPublicNumbers', time.perf_counter() - start, count)
+    
+    start = time.perf_counter()
+    for packed in rsa_ids:
+        SecondParty1.from_packed(packed)
+    _report('from_packed', time.perf_counter() - start, count)
+    
+    start = time.perf_counter()
+    loaded = SecondParty1.from_packed_many(rsa_ids)
+    _report('from_packed_many (lazy)', time.perf_counter() - start, count)
+    
+    start = time.perf_counter()
+    for second_party in loaded:
+        second_party._signature_key
+    _report('  first use of lazy keys', time.perf_counter() - start, count)
+    
+    print('Mixed ciphersuites, {:,} identities:'.format(2 * count))
+    start = time.perf_counter()
+    load_second_parties(rsa_ids + ec_ids, lazy=False)
+    _report('load_second_parties (eager)', time.perf_counter() - start, 2 * count)
+    
+    start = time.perf_counter()
+    load_second_parties(rsa_ids + ec_ids)
+    _report('load_second_parties (lazy)', time.perf_counter() - start, 2 * count)
+    
+    bench_first_party()
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
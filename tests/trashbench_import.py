@@ -0,0 +1,112 @@
+'''
+Startup benchmarks for the golix package (python -X importtime).
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import subprocess
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+# Budgets, in milliseconds, for the cumulative import time of each statement
+# in a fresh interpreter.
+BUDGETS = [
+    ('import golix', 10),
+    ('from golix import Ghid', 60),
+    ('from golix import FirstParty', 150),
+]
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _importtime(statement):
+    ''' Runs statement in a fresh interpreter with -X importtime, and 
+    returns a list of (self us, cumulative us, module name) for every
+    top-level import it triggered.
+    '''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = _ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    # Interpreter startup (site, encodings, etc) is also reported; only
+    # count from the first golix import onwards.
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        env = env,
+        stderr = subprocess.PIPE,
+        stdout = subprocess.DEVNULL,
+        check = True,
+        universal_newlines = True
+    )
+    
+    entries = []
+    started = False
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Top-level imports are not indented
+        if name.startswith(' ') and not name.startswith('  '):
+            name = name.strip()
+            if name == 'golix':
+                started = True
+            if started:
+                entries.append((int(self_us), int(cumulative_us), name))
+    return entries
+    
+    
+def run(repeat=5):
+    failed = False
+    for statement, budget in BUDGETS:
+        best = None
+        for __ in range(repeat):
+            entries = _importtime(statement)
+            total = sum(cumulative for __, cumulative, __ in entries)
+            if best is None or total < best[0]:
+                best = (total, entries)
+                
+        total, entries = best
+        status = 'ok' if total / 1000 <= budget else 'OVER BUDGET'
+        failed |= status != 'ok'
+        print('{:<32} {:>8.1f} ms  (budget {:>4} ms)  {}'.format(
+            statement, total / 1000, budget, status
+        ))
+        for __, cumulative, name in sorted(entries, reverse=True)[:5]:
+            print('    {:<40} {:>8.1f} ms'.format(name, cumulative / 1000))
+            
+    return not failed
+    
+                
+if __name__ == '__main__':
+    sys.exit(0 if run() else 1)
@@ -0,0 +1,107 @@
+'''
+Adversarial benchmarks for inbox.py: cost of floods of unwanted 
+requests, with and without screening.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import sys
+import time
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty1
+
+# These are abnormal (don't use in production) inclusions.
+from golix.inbox import Inbox
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _flood(sender, recipient, count):
+    return [
+        sender.make_request(
+            recipient.second_party, 
+            sender.make_ack(target=Ghid(1, ii.to_bytes(64, 'big')))
+        ).packed
+        for ii in range(count)
+    ]
+    
+    
+def _per_request(func, packeds):
+    start = time.perf_counter()
+    for packed in packeds:
+        try:
+            func(packed)
+        except Exception:
+            pass
+    return (time.perf_counter() - start) / len(packeds)
+    
+    
+def run(count=100):
+    recipient = FirstParty1()
+    attacker = FirstParty1()
+    bystander = FirstParty1()
+    
+    floods = [
+        ('wrong recipient', _flood(attacker, bystander, count)),
+        ('replayed request', _flood(attacker, recipient, 1) * count),
+        ('single sender flood', _flood(attacker, recipient, count)),
+    ]
+    
+    print('Per-request cost of a {:,}-request flood (RSA-4096):'.format(
+        count
+    ))
+    for label, packeds in floods:
+        unscreened = _per_request(recipient.unpack_request, packeds)
+        inbox = Inbox(recipient, per_sender=10)
+        screened = _per_request(
+            lambda packed: inbox.unpack_request(packed, attacker.ghid), 
+            packeds
+        )
+        print('    {:<22} {:>10.1f} us unscreened {:>10.1f} us screened'
+            .format(label, unscreened * 1e6, screened * 1e6))
+        print('        ' + ', '.join(
+            key + ': ' + str(value) 
+            for key, value in sorted(inbox.counters.items())
+        ))
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,127 @@
+'''
+Benchmarks for _layout.py, against the reference smartyparse definitions.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GEOC
+from golix.utils import Ghid
+from trashtest_layout import _controls
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _time(func, arg, count):
+    start = time.perf_counter()
+    for __ in range(count):
+        func(arg)
+    return (time.perf_counter() - start) / count * 1e6
+    
+    
+def run(count=2000):
+    print('{:<8} {:>12} {:>12} {:>12} {:>12}'.format(
+        'object', 'sp pack', 'layout pack', 'sp unpack', 'layout unpack'
+    ))
+    seen = set()
+    for fmt, reference, control in _controls(cipher=1, algo=1):
+        if fmt in seen:
+            continue
+        seen.add(fmt)
+        
+        packed = bytes(fmt.pack(control))
+        results = (
+            _time(reference.pack, control, count),
+            _time(fmt.pack, control, count),
+            _time(reference.unpack, packed, count),
+            _time(fmt.unpack, packed, count),
+        )
+        print('{:<8} {:>9.1f} us {:>9.1f} us {:>9.1f} us {:>9.1f} us'.format(
+            fmt.magic.decode(), *results
+        ))
+        
+    bench_large(max(count // 500, 3))
+    
+    
+def bench_large(count):
+    ''' Packing large containers: frozen (contiguous bytes), as segments 
+    for scatter-gather writes, and directly into a preallocated buffer.
+    '''
+    author = Ghid(2, bytes(64))
+    signature = bytes(64)
+    
+    def frozen(payload):
+        geoc = GEOC(author=author, payload=payload)
+        geoc.pack(cipher=2, address_algo=2)
+        geoc.pack_signature(signature)
+        
+    def segments(payload):
+        geoc = GEOC(author=author, payload=payload)
+        geoc.pack(cipher=2, address_algo=2)
+        geoc.pack_signature(signature, freeze=False)
+        list(geoc.iter_segments())
+        
+    def into(payload):
+        geoc = GEOC(author=author, payload=payload)
+        geoc.pack_into(buffer, 0, cipher=2, address_algo=2)
+        geoc.pack_signature(signature, freeze=False)
+        
+    print()
+    print('{:<8} {:>12} {:>12} {:>12}'.format(
+        'GEOC', 'frozen', 'segments', 'pack_into'
+    ))
+    for size in (1 << 16, 1 << 20, 1 << 24):
+        payload = os.urandom(size)
+        buffer = bytearray(
+            GEOC(author=author, payload=payload).packed_size(2, 2)
+        )
+        results = (
+            _time(frozen, payload, count),
+            _time(segments, payload, count),
+            _time(into, payload, count),
+        )
+        print('{:<8} {:>9.0f} us {:>9.0f} us {:>9.0f} us'.format(
+            str(size >> 10) + ' KiB', *results
+        ))
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
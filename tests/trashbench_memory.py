@@ -0,0 +1,114 @@
+'''
+Memory benchmarks for unpacked low-level Golix objects.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import sys
+import gc
+import tracemalloc
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GOBS
+from golix._getlow import GOBD
+from golix._getlow import GARQAck
+from golix.utils import _dummy_signature
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _ghid(index):
+    return Ghid(1, index.to_bytes(64, byteorder='big'))
+    
+    
+def _gobs(index):
+    obj = GOBS(binder=_ghid(index), target=_ghid(index + 1))
+    obj.pack(cipher=0, address_algo=1)
+    obj.pack_signature(_dummy_signature)
+    return bytes(obj.packed)
+    
+    
+def _gobd(index):
+    obj = GOBD(binder=_ghid(index), target=_ghid(index + 1))
+    obj.pack(cipher=0, address_algo=1)
+    obj.pack_signature(_dummy_signature)
+    return bytes(obj.packed)
+    
+    
+def _ack(index):
+    obj = GARQAck(target=_ghid(index), status=index)
+    obj.author = _ghid(index + 1)
+    obj.pack()
+    return bytes(obj.packed)
+    
+    
+def _measure(unpacker, packeds):
+    ''' Returns the bytes allocated per unpacked object, excluding the
+    packed data itself (which is allocated up front).
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objs = [unpacker(packed) for packed in packeds]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Don't count the list holding them.
+    return (after - before - sys.getsizeof(objs)) / len(objs)
+    
+    
+def run(count=10000):
+    print('{:<8} {:>14} {:>18}'.format(
+        'object', 'bytes/object', 'MiB per million'
+    ))
+    for name, builder, unpacker in (
+        ('GOBS', _gobs, GOBS.unpack),
+        ('GOBD', _gobd, GOBD.unpack),
+        ('AK', _ack, GARQAck.unpack)):
+        packeds = [builder(index) for index in range(count)]
+        per_object = _measure(unpacker, packeds)
+        print('{:<8} {:>14.1f} {:>18.1f}'.format(
+            name, per_object, per_object * 1e6 / 2**20
+        ))
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,164 @@
+'''
+Benchmarks for the SQLite metadata index: ingest throughput into a 
+pack file with and without indexing, and indexed queries against a 
+full unpack-and-filter scan.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import tempfile
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GEOC
+from golix._getlow import GOBS
+from golix._getlow import GOBD
+from golix.metadata import MetadataIndex
+from golix.packfile import PackWriter
+from golix.packfile import PackReader
+from golix.utils import _dummy_signature
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+_AUTHORS = [Ghid(1, bytes([ii]) * 64) for ii in range(1, 33)]
+
+
+def _make_objects(count):
+    ''' A mix of containers, static bindings, and dynamic bindings from 
+    a few dozen authors.
+    '''
+    objs = []
+    for ii in range(count):
+        author = _AUTHORS[ii % len(_AUTHORS)]
+        target = Ghid(1, int.to_bytes(ii, length=64, byteorder='big'))
+        kind = ii % 4
+        if kind < 2:
+            obj = GEOC(author=author, payload=os.urandom(256))
+        elif kind == 2:
+            obj = GOBS(binder=author, target=target)
+        else:
+            obj = GOBD(binder=author, target=target)
+        obj.pack(cipher=0, address_algo=1)
+        obj.pack_signature(_dummy_signature)
+        objs.append(obj)
+    return objs
+    
+    
+def _report(label, seconds, count, unit='object'):
+    print(
+        '    {:<32} {:>9.3f} s   {:>10.1f} us/{}'.format(
+            label, seconds, seconds / count * 1e6, unit
+        )
+    )
+    
+    
+def bench_ingest(root, objs):
+    start = time.perf_counter()
+    with PackWriter(os.path.join(root, 'plain.gpak')) as writer:
+        for obj in objs:
+            writer.add(obj)
+    _report('pack file', time.perf_counter() - start, len(objs))
+    
+    for batch_size in (1, 100, 1000):
+        start = time.perf_counter()
+        with PackWriter(os.path.join(root, str(batch_size) + '.gpak')) as writer:
+            with MetadataIndex(
+                os.path.join(root, str(batch_size) + '.sqlite'), 
+                batch_size = batch_size
+            ) as index:
+                for obj in objs:
+                    if writer.add(obj):
+                        index.add(obj)
+        _report(
+            'pack file + index (batch ' + str(batch_size) + ')', 
+            time.perf_counter() - start, 
+            len(objs)
+        )
+        
+        
+def bench_queries(root, objs):
+    pack_path = os.path.join(root, '1000.gpak')
+    queries = _AUTHORS[:8]
+    
+    with PackReader(pack_path) as reader:
+        start = time.perf_counter()
+        for author in queries:
+            found = [
+                obj.ghid for obj in reader.iter_unpacked() 
+                if isinstance(obj, GEOC) and obj.author == author
+            ]
+        _report('scan: GEOC by author', time.perf_counter() - start, 
+                len(queries), 'query')
+        
+    with MetadataIndex(os.path.join(root, '1000.sqlite')) as index:
+        start = time.perf_counter()
+        for author in queries:
+            indexed = [
+                record.ghid for record in 
+                index.find(type=GEOC, party=author)
+            ]
+        _report('index: GEOC by author', time.perf_counter() - start, 
+                len(queries), 'query')
+        assert indexed == found
+        
+        cursor = index.find()[len(objs) // 2].seq
+        start = time.perf_counter()
+        for __ in queries:
+            index.find(type=GOBD, after=cursor)
+        _report('index: GOBD after cursor', time.perf_counter() - start, 
+                len(queries), 'query')
+    
+    
+def run(count=20000):
+    print('Generating {:,} objects...'.format(count))
+    objs = _make_objects(count)
+    
+    with tempfile.TemporaryDirectory() as root:
+        print('Ingest')
+        bench_ingest(root, objs)
+        print('Queries')
+        bench_queries(root, objs)
+        
+        
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,154 @@
+'''
+Benchmarks for packfile.py, against a directory-per-object layout.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GOBS
+from golix.packfile import PackWriter
+from golix.packfile import PackReader
+from golix.utils import _dummy_signature
+from golix.utils import _dummy_ghid
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _make_bindings(count):
+    bindings = []
+    for ii in range(count):
+        target = Ghid(1, int.to_bytes(ii, length=64, byteorder='big'))
+        gobs = GOBS(binder=_dummy_ghid, target=target)
+        gobs.pack(cipher=0, address_algo=1)
+        gobs.pack_signature(_dummy_signature)
+        bindings.append((gobs.ghid, bytes(gobs.packed)))
+    return bindings
+    
+    
+def _disk_usage(paths):
+    # st_blocks is always in 512-byte units
+    return sum(os.stat(path).st_blocks * 512 for path in paths)
+    
+    
+def _report(label, seconds, count):
+    print(
+        '    {:<28} {:>9.3f} s   {:>10.1f} us/object'.format(
+            label, seconds, seconds / count * 1e6
+        )
+    )
+    
+    
+def bench_directory(root, bindings, lookups):
+    objdir = os.path.join(root, 'objects')
+    os.mkdir(objdir)
+    
+    start = time.perf_counter()
+    paths = []
+    for ghid, packed in bindings:
+        path = os.path.join(objdir, ghid.as_str())
+        with open(path, 'wb') as f:
+            f.write(packed)
+        paths.append(path)
+    _report('write', time.perf_counter() - start, len(bindings))
+    
+    start = time.perf_counter()
+    for ghid in lookups:
+        with open(os.path.join(objdir, ghid.as_str()), 'rb') as f:
+            f.read()
+    _report('random lookup', time.perf_counter() - start, len(lookups))
+    
+    start = time.perf_counter()
+    for name in os.listdir(objdir):
+        with open(os.path.join(objdir, name), 'rb') as f:
+            f.read()
+    _report('sequential iteration', time.perf_counter() - start, len(bindings))
+    
+    print('    disk usage: {:,} bytes in {:,} inodes'.format(
+        _disk_usage(paths), len(paths)
+    ))
+    
+    
+def bench_packfile(root, bindings, lookups):
+    path = os.path.join(root, 'objects.gpak')
+    
+    start = time.perf_counter()
+    with PackWriter(path) as writer:
+        for ghid, packed in bindings:
+            writer.add_packed(ghid, packed)
+    _report('write', time.perf_counter() - start, len(bindings))
+    
+    with PackReader(path) as reader:
+        start = time.perf_counter()
+        for ghid in lookups:
+            reader.get(ghid)
+        _report('random lookup', time.perf_counter() - start, len(lookups))
+        
+        start = time.perf_counter()
+        for ghid, packed in reader.iter_packed():
+            pass
+        _report(
+            'sequential iteration', 
+            time.perf_counter() - start, 
+            len(bindings)
+        )
+        
+    print('    disk usage: {:,} bytes in 1 inode'.format(_disk_usage([path])))
+    
+    
+def run(count=20000):
+    print('Generating {:,} static bindings...'.format(count))
+    bindings = _make_bindings(count)
+    lookups = [ghid for ghid, packed in random.sample(bindings, count // 2)]
+    
+    with tempfile.TemporaryDirectory() as root:
+        print('Directory-per-object:')
+        bench_directory(root, bindings, lookups)
+        print('Pack file:')
+        bench_packfile(root, bindings, lookups)
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
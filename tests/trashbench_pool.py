@@ -0,0 +1,87 @@
+'''
+Benchmarks for pool.py: RSA signing across threads and processes.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty1
+
+# These are abnormal (don't use in production) inclusions.
+from golix.pool import IdentityPool
+from golix.utils import _map_ordered
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _report(label, seconds, count):
+    print(
+        '    {:<28} {:>9.3f} s   {:>8.0f} signatures/s'.format(
+            label, seconds, count / seconds
+        )
+    )
+    
+    
+def run(count=200):
+    workers = os.cpu_count() or 1
+    first_party = FirstParty1()
+    addresses = [os.urandom(64) for __ in range(count)]
+    print('Signing ' + str(count) + ' addresses, ' + str(workers) + ' cpus:')
+    
+    start = time.perf_counter()
+    for address in addresses:
+        first_party._sign(address)
+    _report('serial', time.perf_counter() - start, count)
+    
+    start = time.perf_counter()
+    _map_ordered(first_party._sign, addresses, workers)
+    _report('threads', time.perf_counter() - start, count)
+    
+    with IdentityPool([first_party], workers=workers) as pool:
+        # Don't count worker startup.
+        pool.sign_many(first_party.ghid, addresses[:workers])
+        start = time.perf_counter()
+        pool.sign_many(first_party.ghid, addresses)
+        _report('processes', time.perf_counter() - start, count)
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,146 @@
+'''
+Adversarial benchmarks for validation.py: time spent rejecting hostile
+or corrupt objects, with and without fail-fast validation.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import struct
+
+from smartyparse import ParseError
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+from golix.cipher import ThirdParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.validation import Limits
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _legacy_unpack_any(handler, packed):
+    ''' The previous unpack_any, which tried every parser in turn.
+    '''
+    for parser in (handler.unpack_identity, 
+                    handler.unpack_container,
+                    handler.unpack_bind_static,
+                    handler.unpack_bind_dynamic,
+                    handler.unpack_debind,
+                    handler.unpack_request):
+        try:
+            return parser(packed)
+        except (ParseError, TypeError):
+            pass
+    raise ParseError('Packed data does not appear to be a Golix object.')
+    
+    
+def _hostile_inputs(megabytes):
+    author = FirstParty2()
+    big = bytes(author.make_container(
+        author.new_secret(), 
+        os.urandom(megabytes * 1024 * 1024)
+    ).packed)
+    
+    huge_claim = bytearray(big[:200])
+    struct.pack_into('>Q', huge_claim, 9 + 65, 2 ** 63)
+    
+    # A (signature-less) binding whose history is as long as possible.
+    history = [Ghid(1, os.urandom(64)) for __ in range(65535 // 65)]
+    gobd = bytes(author.make_bind_dynamic(
+        history[0], 
+        ghid_dynamic = history[-1], 
+        history = history
+    ).packed)
+    
+    return [
+        ('GEOC claiming 2^63 payload', bytes(huge_claim)),
+        ('GEOC plus 1 trailing byte', big + b'\x00'),
+        ('GEOC, unknown version', big[:4] + b'\xff' + big[5:]),
+        ('unknown magic', b'XXXX' + big[4:]),
+        ('GOBD, 1008 history entries', gobd),
+    ]
+    
+    
+def _time_rejection(func, data, repeat):
+    ''' Note that not every input is rejected by every unpacker: the 
+    legacy unpack_any ignores trailing data, and only explicit limits 
+    reject long histories.
+    '''
+    start = time.perf_counter()
+    for __ in range(repeat):
+        try:
+            func(data)
+        except ParseError:
+            pass
+    return (time.perf_counter() - start) / repeat
+    
+    
+def run(megabytes=64, repeat=5):
+    handler = ThirdParty2()
+    hardened = ThirdParty2()
+    hardened.limits = Limits(
+        max_size = 1024 * 1024 * 1024, 
+        ciphers = {2}, 
+        max_history = 64
+    )
+    
+    print('Time to reject ({} MiB payloads):'.format(megabytes))
+    print('    {:<30} {:>14} {:>14} {:>14}'.format(
+        '', 'legacy', 'unpack_any', 'with limits'
+    ))
+    for label, data in _hostile_inputs(megabytes):
+        times = [
+            _time_rejection(func, data, repeat) for func in (
+                lambda data: _legacy_unpack_any(handler, data),
+                handler.unpack_any,
+                hardened.unpack_any
+            )
+        ]
+        print('    {:<30} {:>11.1f} us {:>11.1f} us {:>11.1f} us'.format(
+            label, *(seconds * 1e6 for seconds in times)
+        ))
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
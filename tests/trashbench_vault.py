@@ -0,0 +1,136 @@
+'''
+Benchmarks for vault.py, against a dict of Secrets.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.vault import SecretVault
+
+# ###############################################
+# Benchmarking
+# ###############################################
+
+
+def _report(label, seconds, count):
+    print(
+        '    {:<28} {:>9.3f} s   {:>10.1f} us/secret'.format(
+            label, seconds, seconds / count * 1e6
+        )
+    )
+    
+    
+def bench_dict(items, lookups):
+    tracemalloc.start()
+    start = time.perf_counter()
+    secrets = dict(items)
+    _report('insert', time.perf_counter() - start, len(items))
+    
+    start = time.perf_counter()
+    for ghid in lookups:
+        secrets[ghid]
+    _report('random lookup', time.perf_counter() - start, len(lookups))
+    
+    # The Secrets themselves were allocated before tracing started; 
+    # this is only the dict overhead.
+    print('    resident: {:,} bytes (plus the Secrets)'.format(
+        tracemalloc.get_traced_memory()[0]
+    ))
+    tracemalloc.stop()
+    
+    
+def bench_vault(root, items, lookups):
+    path = os.path.join(root, 'secrets.gsvt')
+    master = FirstParty2.new_secret()
+    
+    with SecretVault(path, master) as vault:
+        start = time.perf_counter()
+        vault.put_many(items)
+        _report('insert', time.perf_counter() - start, len(items))
+        
+    tracemalloc.start()
+    start = time.perf_counter()
+    vault = SecretVault(path, master)
+    print('    cold open: {:.3f} ms'.format(
+        (time.perf_counter() - start) * 1e3
+    ))
+    
+    with vault:
+        start = time.perf_counter()
+        for ghid in lookups:
+            vault[ghid]
+        _report('random lookup', time.perf_counter() - start, len(lookups))
+        
+        start = time.perf_counter()
+        for ghid in lookups:
+            vault[ghid]
+        _report('cached lookup', time.perf_counter() - start, len(lookups))
+        
+        print('    resident: {:,} bytes, file: {:,} bytes'.format(
+            tracemalloc.get_traced_memory()[0], os.path.getsize(path)
+        ))
+    tracemalloc.stop()
+    
+    
+def run(count=100000):
+    print('Generating {:,} secrets...'.format(count))
+    items = [
+        (Ghid(1, os.urandom(64)), FirstParty2.new_secret()) 
+        for __ in range(count)
+    ]
+    lookups = [ghid for ghid, secret in random.sample(items, 1000)]
+    
+    with tempfile.TemporaryDirectory() as root:
+        print('Dict:')
+        bench_dict(items, lookups)
+        print('Secret vault:')
+        bench_vault(root, items, lookups)
+        
+                
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,188 @@
+'''
+Scratchpad for test-based development. Unit tests for antientropy.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import pickle
+import random
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are abnormal (don't use in production) inclusions.
+from golix.antientropy import MerkleTree
+from golix.antientropy import _bucket_hash
+from golix.antientropy import _node_hash
+from golix.antientropy import _EMPTY_DIGEST
+from golix.antientropy import MAX_INDICES
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _ghids(count):
+    return [Ghid(1, os.urandom(64)) for __ in range(count)]
+    
+    
+class _Transport:
+    ''' Round-trips every request and response through pickle, like a
+    real transport would, and counts the round trips.
+    '''
+    def __init__(self, remote):
+        self.remote = remote
+        self.round_trips = 0
+        
+    def __call__(self, request):
+        self.round_trips += 1
+        request = pickle.loads(pickle.dumps(request))
+        return pickle.loads(pickle.dumps(self.remote.handle(request)))
+    
+    
+def run():
+    shared = _ghids(2000)
+    only_local = _ghids(7)
+    only_remote = _ghids(11)
+    
+    local = MerkleTree(shared + only_local, depth=12)
+    remote = MerkleTree(depth=12)
+    # Digests don't depend on insertion order.
+    for ghid in random.sample(shared, len(shared)):
+        remote.add(ghid)
+    remote.update(only_remote)
+    assert len(local) == len(shared) + len(only_local)
+    assert all(ghid in local for ghid in only_local)
+    assert only_remote[0] not in local
+    assert not local.add(shared[0])
+    
+    transport = _Transport(remote)
+    missing_here, missing_there = local.difference(transport, stride=4)
+    assert missing_here == set(only_remote)
+    assert missing_there == set(only_local)
+    # root, 12 / 4 levels of nodes, buckets
+    assert transport.round_trips == 5
+    
+    # Other strides find the same difference.
+    for stride in (1, 5, 12, 20):
+        transport = _Transport(remote)
+        assert local.difference(transport, stride) == (
+            missing_here, missing_there
+        )
+        assert transport.round_trips == 2 + -(-12 // min(stride, 12))
+    
+    # Once reconciled, the trees are identical.
+    local.update(missing_here)
+    remote.update(missing_there)
+    assert local.digest == remote.digest
+    transport = _Transport(remote)
+    assert local.difference(transport) == (set(), set())
+    assert transport.round_trips == 1
+    assert list(local) == list(remote)
+    
+    # Removal exactly undoes addition.
+    empty = MerkleTree(depth=12)
+    for ghid in list(local):
+        assert local.discard(ghid)
+    assert not local.discard(shared[0])
+    assert len(local) == 0
+    assert local.digest == empty.digest
+    assert all(not level for level in local._levels)
+    
+    # Digests hash the actual tree structure: buckets hash their sorted
+    # contents, and nodes their children (rather than XORing elements,
+    # which can be made to cancel out).
+    ghids = [Ghid(1, bytes([prefix]) + os.urandom(63)) for prefix in (
+        0x00, 0x10, 0x20, 0x80, 0x90
+    )]
+    tree = MerkleTree(ghids, depth=2)
+    buckets = [
+        _bucket_hash([bytes(ghid) for ghid in ghids[:3]]),
+        _EMPTY_DIGEST,
+        _bucket_hash([bytes(ghid) for ghid in ghids[3:]]),
+        _EMPTY_DIGEST
+    ]
+    assert tree.digest == _node_hash(
+        _node_hash(buckets[0], buckets[1]),
+        _node_hash(buckets[2], buckets[3])
+    )
+    single = MerkleTree(depth=2)
+    for ghid in reversed(ghids):
+        single.add(ghid)
+    assert single.digest == tree.digest
+    assert single._levels == tree._levels
+    
+    try:
+        MerkleTree(depth=8).difference(remote.handle)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Compared trees of different depths.')
+        
+    # Replies must answer every index asked for, no more and no less.
+    local = MerkleTree(shared + only_local, depth=12)
+    for kind, adjust in (
+        ('nodes', lambda reply: reply[:-1]),
+        ('nodes', lambda reply: reply + [_EMPTY_DIGEST]),
+        ('buckets', lambda reply: reply[1:]),
+        ('buckets', lambda reply: reply + [[]])):
+            def transport(request):
+                reply = remote.handle(request)
+                if request[0] == kind:
+                    reply = adjust(reply)
+                return reply
+            try:
+                local.difference(transport)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('Accepted a mismatched reply: ' + kind)
+            
+    # handle() refuses oversized requests, and difference() batches to 
+    # stay under the cap, even when every bucket differs.
+    try:
+        remote.handle(('nodes', 12, list(range(MAX_INDICES + 1))))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Answered an oversized request.')
+    sparse = MerkleTree(_ghids(3 * MAX_INDICES), depth=14)
+    transport = _Transport(MerkleTree(depth=14))
+    missing_here, missing_there = sparse.difference(transport, stride=14)
+    assert not missing_here
+    assert missing_there == set(sparse)
+    assert transport.round_trips > 3
+    
+    
+if __name__ == '__main__':
+    run()
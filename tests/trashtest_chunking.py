@@ -0,0 +1,176 @@
+'''
+Scratchpad for test-based development. Unit tests for chunking.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import random
+import binascii
+
+from smartyparse import ParseError
+
+# These are normal inclusions
+from golix import SecurityError
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.chunking import Manifest
+from golix.chunking import split_chunks
+from golix.chunking import make_chunked
+from golix.chunking import receive_manifest
+from golix.chunking import receive_chunked
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+# Small chunks, to keep the tests fast.
+SIZES = {'min_size': 1024, 'avg_size': 4096, 'max_size': 16384}
+
+
+def _random_bytes(rng, length):
+    ''' Seeded, so that the edit tests below don't occasionally hit an 
+    edit that happens to create a boundary near an existing one.
+    '''
+    return rng.getrandbits(8 * length).to_bytes(length, 'big')
+
+
+def run_split():
+    rng = random.Random(42)
+    data = _random_bytes(rng, 200000)
+    chunks = split_chunks(data, **SIZES)
+    assert b''.join(chunks) == data
+    for chunk in chunks[:-1]:
+        assert SIZES['min_size'] <= len(chunk) <= SIZES['max_size']
+    assert split_chunks(data, **SIZES) == chunks
+    assert split_chunks(b'', **SIZES) == []
+    # Boundaries can't be found in runs of identical bytes.
+    assert [len(chunk) for chunk in split_chunks(bytes(40000), **SIZES)] == [
+        16384, 16384, 7232
+    ]
+    
+    # Boundaries resynchronize shortly after an insertion.
+    edited = data[:100000] + b'edit' + data[100000:]
+    before = {bytes(chunk) for chunk in chunks}
+    changed = [
+        chunk for chunk in split_chunks(edited, **SIZES) 
+        if bytes(chunk) not in before
+    ]
+    assert 1 <= len(changed) <= 2
+    
+    # Likewise for low-alphabet data (hex text and DNA), where boundaries 
+    # must come from the hash of a window rather than single bytes.
+    acgt = bytes(b'ACGT'[ii % 4] for ii in range(256))
+    for data in (binascii.hexlify(_random_bytes(rng, 100000)), 
+                 _random_bytes(rng, 200000).translate(acgt)):
+        chunks = split_chunks(data, **SIZES)
+        assert b''.join(chunks) == data
+        assert len(chunks) > len(data) // SIZES['max_size'] * 2
+        edited = data[:5000] + b'CA' + data[5000:]
+        before = {bytes(chunk) for chunk in chunks}
+        changed = [
+            chunk for chunk in split_chunks(edited, **SIZES) 
+            if bytes(chunk) not in before
+        ]
+        assert 1 <= len(changed) <= 2
+    
+    try:
+        split_chunks(data, min_size=10, avg_size=5, max_size=20)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Accepted inconsistent chunk sizes.')
+        
+        
+def run_containers():
+    author = FirstParty2()
+    reader = FirstParty2()
+    data = bytearray(os.urandom(100000))
+    # Repeated content within a single payload is only stored once.
+    data += data[:50000]
+    
+    chunked = make_chunked(author, data, workers=2, **SIZES)
+    manifest = chunked.manifest
+    assert len(manifest) == len(data)
+    assert len(chunked.chunks) < len(manifest.chunks)
+    assert Manifest.from_bytes(bytes(manifest)) == manifest
+    
+    containers = {geoc.ghid: geoc for geoc in chunked.chunks}
+    received = receive_manifest(
+        reader, author.second_party, chunked.secret, chunked.container
+    )
+    assert received == manifest
+    plaintext = receive_chunked(
+        reader, author.second_party, received, containers, workers=2
+    )
+    assert plaintext == data
+    
+    # A small edit only makes new chunks around the edit.
+    edited = bytearray(data)
+    edited[60000] ^= 0xFF
+    rechunked = make_chunked(author, edited, previous=manifest, **SIZES)
+    assert 1 <= len(rechunked.chunks) <= 2
+    containers.update((geoc.ghid, geoc) for geoc in rechunked.chunks)
+    assert receive_chunked(
+        reader, author.second_party, rechunked.manifest, containers
+    ) == edited
+    
+    # Swapping chunk contents must be caught.
+    first, second = manifest.chunks[:2]
+    swapped = dict(containers)
+    swapped[first.ghid] = containers[second.ghid]
+    try:
+        receive_chunked(reader, author.second_party, manifest, swapped)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Accepted a chunk that does not match.')
+        
+    try:
+        Manifest.from_bytes(bytes(manifest)[:-1])
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('Accepted a truncated manifest.')
+    
+    
+def run():
+    run_split()
+    run_containers()
+    
+    
+if __name__ == '__main__':
+    run()
@@ -33,11 +33,24 @@ golix: A python library for Golix protocol object manipulation.
 
 '''
 
+import os
 import sys
 import collections
 
 # These are normal imports
 from golix import Ghid
+from golix import SecurityError
+from golix import load_second_parties
+from golix import load_first_party
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.ciphers import Cipher
+from cryptography.hazmat.primitives.ciphers import algorithms
+from cryptography.hazmat.primitives.ciphers import modes
+
+from smartyparse import ParseError
 
 # These are semi-normal imports
 from golix.cipher import FirstParty0
@@ -46,12 +59,20 @@ from golix.cipher import ThirdParty0
 from golix.cipher import FirstParty1
 from golix.cipher import SecondParty1
 from golix.cipher import ThirdParty1
+from golix.cipher import FirstParty2
+from golix.cipher import SecondParty2
+from golix.cipher import ThirdParty2
 
 # These are abnormal (don't use in production) imports.
-from golix._spec import _dummy_signature
-from golix._spec import _dummy_mac
-from golix._spec import _dummy_asym
-from golix._spec import _dummy_address
+from golix.utils import _dummy_signature
+from golix.utils import _dummy_mac
+from golix.utils import _dummy_asym
+from golix.utils import _dummy_address
+from golix.utils import _xor_bytes
+from golix.utils import _dummy_ghid
+from golix.utils import cipher_length_lookup
+from golix.cipher import _aes_ctr
+from golix.cipher import _CTR_PARALLEL_THRESHOLD
 
 # ###############################################
 # Testing
@@ -154,6 +175,47 @@ def run():
         target = bind2d.ghid_dynamic
     )
     
+    # -------------------------------------------------------------------------
+    # Batch creation, both threaded and serial.
+    batch_targets = [container2.ghid, container2a.ghid, bind2.ghid]
+    for workers in (None, 1):
+        batch_containers = first_id_1.make_containers(
+            secrets = [secret2, secret2a],
+            plaintexts = [_dummy_payload, _dummy_payload_2],
+            workers = workers
+        )
+        batch_binds = first_id_1.make_binds_static(
+            targets = batch_targets,
+            workers = workers
+        )
+        batch_binds_d = first_id_1.make_binds_dynamic(
+            targets = batch_targets,
+            workers = workers
+        )
+        batch_debinds = first_id_1.make_debinds(
+            targets = batch_targets,
+            workers = workers
+        )
+        assert [obj.target for obj in batch_binds] == batch_targets
+        assert [obj.target for obj in batch_binds_d] == batch_targets
+        assert [obj.target for obj in batch_debinds] == batch_targets
+        
+        for obj in batch_binds + batch_binds_d + batch_debinds:
+            ThirdParty1.verify_object(second_id_1, obj)
+        for container, secret, payload in zip(
+            batch_containers, 
+            [secret2, secret2a], 
+            [_dummy_payload, _dummy_payload_2]):
+                assert first_id_2.receive_container(
+                    author = second_id_1,
+                    secret = secret,
+                    container = first_id_2.unpack_container(container.packed)
+                ) == payload
+                
+    batch_binds_1 = fake_first_id.make_binds_static(
+        targets = [container1.ghid, container1a.ghid]
+    )
+    
     # -------------------------------------------------------------------------
     # Asymmetric handshakes
     ahand1 = fake_first_id.make_handshake(
@@ -234,6 +296,16 @@ def run():
         secret = secret1a, 
         container = geoc1a
     )
+    # With an explicit secret, this also works on the class.
+    assert type(fake_first_id).receive_container(
+        author_1, secret1a, geoc1a
+    ) == geoc_1ar_plaintext
+    try:
+        type(fake_first_id).receive_container(author_1, None, geoc1a)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('Resolved a secret without a vault.')
     
     # Note that the author lookup ideally shouldn't be necessary if you already 
     # know who it is.
@@ -354,6 +426,59 @@ def run():
         request = anak2_up
     )
     
+    # Bulk request processing, with one shared secret per requestor
+    bulk_rec = first_id_2.receive_requests(
+        requestors = [second_id_1],
+        requests = [
+            first_id_2.unpack_request(packed = garq.packed)
+            for garq in (areq2a, areq2b, areq2c)
+        ]
+    )
+    assert bulk_rec == [areq2_rec, aack2_rec, anak2_rec]
+    try:
+        first_id_2.receive_requests(
+            requestors = [second_id_2],
+            requests = [first_id_2.unpack_request(packed = areq2a.packed)]
+        )
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Received a request from an unknown requestor.')
+    
+    # Draining an inbox, with garbage mixed in. Results may arrive in any
+    # order, but errors must stay with their own request.
+    inbox = [areq2a.packed, b'garbage', areq2b.packed, areq2c.packed]
+    for workers in (1, 4):
+        drained = {}
+        for index, garq, error in first_id_2.unpack_requests(inbox, workers):
+            drained[index] = (garq, error)
+        assert sorted(drained) == [0, 1, 2, 3]
+        assert drained[1][0] is None and drained[1][1] is not None
+        received = [
+            first_id_2.receive_request(
+                requestor = second_id_1, 
+                request = drained[index][0]
+            ) for index in (0, 2, 3)
+        ]
+        assert received == [areq2_rec, aack2_rec, anak2_rec]
+    
+    # Batched derivation must match one-at-a-time derivation, which in turn
+    # must match the original per-byte XOR and HKDF.
+    shared = first_id_2._derive_shared_many([second_id_1, second_id_2])
+    assert shared[second_id_1.ghid] == first_id_2._derive_shared(second_id_1)
+    assert shared[second_id_2.ghid] == first_id_2._derive_shared(second_id_2)
+    salt = bytes([
+        a ^ b for a, b in zip(first_id_2.ghid.address, second_id_1.ghid.address)
+    ])
+    assert _xor_bytes(first_id_2.ghid.address, second_id_1.ghid.address) == salt
+    ikm = first_id_2._exchange_key.do_exchange(second_id_1._exchange_key)
+    assert shared[second_id_1.ghid] == HKDF(
+        algorithm = hashes.SHA512(),
+        length = 64,
+        salt = salt,
+        info = b''
+    ).derive(ikm)
+    
     
     # -------------------------------------------------------------------------
     # Test all verification as a server
@@ -427,6 +552,286 @@ def run():
     
     # Don't bother testing asymmetric in trashtest (should simply raise)
     
+    # Signing the address as a prehashed digest must be wire-compatible with
+    # a normal RSA-PSS SHA512 signature over the hashed portion of the object.
+    hashed_portion = bytes(container2.packed[:-(512 + 64)])
+    second_id_1._signature_key.verify(
+        bytes(container2.signature),
+        hashed_portion,
+        padding.PSS(
+            mgf = padding.MGF1(hashes.SHA512()),
+            salt_length = hashes.SHA512.digest_size
+        ),
+        hashes.SHA512()
+    )
+    try:
+        server1.verify_object(
+            second_party = second_id_2,
+            obj = geoc2
+        )
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Verified a signature from the wrong author.')
+    
+    # -------------------------------------------------------------------------
+    # Ciphersuite 2 (Ed25519 / X25519), start to finish
+    first_id_3 = FirstParty2(address_algo=1)
+    first_id_4 = FirstParty2(address_algo=1)
+    second_id_3 = first_id_3.second_party
+    second_id_4 = first_id_4.second_party
+    fid3_unpack = FirstParty2._from_serialized(first_id_3._serialize())
+    assert fid3_unpack.ghid == first_id_3.ghid
+    assert SecondParty2.from_packed(second_id_3.packed).ghid == second_id_3.ghid
+    
+    # Identity files: plain, passphrase, and secret envelopes.
+    file_secret = first_id_3.new_secret()
+    for first_id in (fake_first_id, first_id_1, first_id_3):
+        for kwargs in ({}, {'passphrase': 'correct horse'}, 
+                        {'secret': file_secret}):
+            dumped = first_id.dump(**kwargs)
+            loaded = type(first_id).load(dumped, **kwargs)
+            assert loaded.ghid == first_id.ghid
+            assert loaded.second_party.ghid == first_id.ghid
+            assert loaded.second_party.packed == first_id.second_party.packed
+            assert loaded.address_algo == first_id.address_algo
+    # Only real ciphersuites are available through load_first_party.
+    for first_id in (first_id_1, first_id_3):
+        loaded = load_first_party(first_id.dump(secret=file_secret), 
+                                  secret=file_secret)
+        assert type(loaded) is type(first_id)
+        assert loaded.ghid == first_id.ghid
+    
+    # Loaded identities are fully operational.
+    loaded_3 = load_first_party(first_id_3.dump(secret=file_secret), 
+                                secret=file_secret)
+    bind3_loaded = loaded_3.make_bind_static(target=_dummy_ghid)
+    assert first_id_4.receive_bind_static(
+        binder = second_id_3, 
+        binding = first_id_4.unpack_bind_static(bind3_loaded.packed)
+    ) == _dummy_ghid
+    
+    # BLAKE2b identities keep their address algorithm.
+    first_id_blake = FirstParty2(address_algo=2)
+    loaded_blake = load_first_party(first_id_blake.dump())
+    assert loaded_blake.address_algo == 2
+    assert loaded_blake.second_party.ghid == first_id_blake.ghid
+    
+    dumped = first_id_3.dump(passphrase='correct horse')
+    for kwargs in ({'passphrase': 'incorrect horse'}, {'secret': file_secret}):
+        try:
+            load_first_party(dumped, **kwargs)
+        except (SecurityError, ValueError):
+            pass
+        else:
+            raise AssertionError('Loaded identity file with wrong key.')
+    # scrypt cost is checked before the (unauthenticated) KDF runs. It 
+    # follows the 7-byte header and 16-byte salt.
+    for params in ((40, 8, 1), (14, 255, 1), (14, 8, 255), (20, 16, 1), 
+                   (10, 8, 1), (14, 1, 1)):
+        hostile = bytearray(dumped)
+        hostile[23:26] = bytes(params)
+        try:
+            load_first_party(hostile, passphrase='correct horse')
+        except ParseError:
+            pass
+        else:
+            raise AssertionError('Used out-of-range scrypt parameters.')
+    tampered = bytearray(first_id_3.dump(secret=file_secret))
+    tampered[40] ^= 0x01
+    try:
+        load_first_party(tampered, secret=file_secret)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Loaded tampered identity file.')
+    try:
+        FirstParty1.load(first_id_3.dump())
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Loaded identity file with wrong ciphersuite.')
+        
+    # Unencrypted files must match their GIDC. Swap in another signature
+    # key, after the header, GIDC, and key length.
+    mismatched = bytearray(first_id_3.dump())
+    start = 7 + 4 + len(second_id_3.packed) + 4
+    mismatched[start:start + 32] = bytes(
+        first_id_4._serialize()['signature']
+    )
+    try:
+        load_first_party(mismatched)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Loaded identity file with mismatched keys.')
+    
+    secret3 = first_id_3.new_secret()
+    container3 = first_id_3.make_container(
+        secret = secret3, 
+        plaintext = _dummy_payload
+    )
+    # Signatures are 64 bytes instead of 512.
+    assert len(container3.packed) == len(container2.packed) - 448
+    geoc3 = first_id_4.unpack_container(container3.packed)
+    assert first_id_4.receive_container(
+        author = second_id_3,
+        secret = secret3,
+        container = geoc3
+    ) == _dummy_payload
+    
+    bind3 = first_id_3.make_bind_static(target = container3.ghid)
+    bind3d = first_id_3.make_bind_dynamic(target = container3.ghid)
+    debind3 = first_id_3.make_debind(target = bind3.ghid)
+    server2 = ThirdParty2()
+    for obj in (geoc3, bind3, bind3d, debind3):
+        server2.verify_object(
+            second_party = second_id_3,
+            obj = server2.unpack_any(obj.packed)
+        )
+    # Frozen objects can stand in for packed bytes, and are shared.
+    for obj in (geoc3, bind3, bind3d, debind3):
+        unpacked = server2.unpack_any(obj.frozen)
+        assert unpacked.frozen is obj.frozen
+        server2.verify_object(second_party = second_id_3, obj = unpacked)
+    try:
+        server2.verify_object(second_party = second_id_4, obj = geoc3)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Verified a signature from the wrong author.')
+    
+    # BLAKE2b addresses, selected per-FirstParty
+    first_id_5 = FirstParty2(address_algo=2)
+    assert first_id_5.ghid.algo == 2
+    container5 = first_id_5.make_container(
+        secret = secret3, 
+        plaintext = _dummy_payload
+    )
+    assert container5.ghid.algo == 2
+    assert first_id_4.receive_container(
+        author = first_id_5.second_party,
+        secret = secret3,
+        container = first_id_4.unpack_container(container5.packed)
+    ) == _dummy_payload
+    
+    for request in (
+        first_id_3.make_handshake(target=container3.ghid, secret=secret3),
+        first_id_3.make_ack(target=container3.ghid),
+        first_id_3.make_nak(target=container3.ghid, status=3)):
+            garq3 = first_id_3.make_request(
+                recipient = second_id_4,
+                request = request
+            )
+            # Ephemeral key, then the padded body, then the MAC; no 
+            # room left over from the RSA-sized suite 1 payloads.
+            assert len(garq3.payload) == cipher_length_lookup[2]['asym']
+            assert len(garq3.payload) == 32 + 2 + 188 + 64
+            assert len(first_id_3._pack_asym(request)) <= 188
+            garq3_up = first_id_4.unpack_request(garq3.packed)
+            assert first_id_4.receive_request(
+                requestor = second_id_3,
+                request = garq3_up
+            ) == request
+    
+    # -------------------------------------------------------------------------
+    # Fast and bulk identity loading
+    packed_ids = [second_id_1.packed, second_id_2.packed, second_id_3.packed]
+    
+    eager = SecondParty1.from_packed(second_id_1.packed)
+    assert eager.ghid == second_id_1.ghid
+    assert (eager._signature_key.public_numbers() == 
+        second_id_1._signature_key.public_numbers())
+    assert (eager._encryption_key.public_numbers() == 
+        second_id_1._encryption_key.public_numbers())
+    
+    # Lazily-loaded keys are decoded on first use, ie verification.
+    lazy = SecondParty1.from_packed_many(packed_ids[:2])
+    assert [second.ghid for second in lazy] == [
+        second_id_1.ghid, second_id_2.ghid
+    ]
+    assert '_keys' not in vars(lazy[0])
+    server1.verify_object(second_party = lazy[0], obj = geoc2)
+    assert '_keys' in vars(lazy[0])
+    
+    shared = first_id_3._derive_shared_many([second_id_3, second_id_4])
+    assert shared[second_id_4.ghid] == first_id_3._derive_shared(second_id_4)
+    assert shared[second_id_4.ghid] == first_id_4._derive_shared(second_id_3)
+    
+    # Mixed ciphersuites dispatch to the right SecondParty.
+    loaded = load_second_parties(packed_ids)
+    assert [type(second) for second in loaded] == [
+        SecondParty1, SecondParty1, SecondParty2
+    ]
+    server2.verify_object(second_party = loaded[2], obj = geoc3)
+    
+    # Tampered identities must fail address verification.
+    tampered = bytearray(second_id_1.packed)
+    tampered[20] ^= 1
+    try:
+        SecondParty1.from_packed(bytes(tampered), lazy=True)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Loaded a tampered identity.')
+    
+    
+    # -------------------------------------------------------------------------
+    # Request fan-out: one request, many recipients, in recipient order.
+    for author, recipients in (
+        (first_id_1, [first_id_2, first_id_1]),
+        (first_id_3, [first_id_4, FirstParty2(), first_id_3])):
+            fan_secret = author.new_secret()
+            fan_handshake = author.make_handshake(
+                secret = fan_secret, 
+                target = _dummy_ghid
+            )
+            for workers in (1, 3):
+                fanned = author.make_requests_fanout(
+                    [recipient.second_party for recipient in recipients],
+                    fan_handshake,
+                    workers = workers
+                )
+                assert len(fanned) == len(recipients)
+                for recipient, garq in zip(recipients, fanned):
+                    assert garq.recipient == recipient.ghid
+                    unpacked = recipient.unpack_request(garq.packed)
+                    assert recipient.receive_request(
+                        author.second_party, 
+                        unpacked
+                    ) == fan_handshake
+                    
+    try:
+        first_id_1.make_requests_fanout(
+            [second_id_2, second_id_3], 
+            first_id_1.make_ack(target=_dummy_ghid)
+        )
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('Fanned out to a mismatched ciphersuite.')
+    
+    # -------------------------------------------------------------------------
+    # Parallel AES-CTR must match the serial path exactly, including when
+    # the counter carries (or wraps around) between segments.
+    payload = os.urandom(_CTR_PARALLEL_THRESHOLD + 1000003)
+    key = os.urandom(32)
+    for nonce in (os.urandom(16), bytes(8) + b'\xff' * 8, b'\xff' * 16):
+        serial = _aes_ctr(key, nonce, payload, workers=1)
+        parallel = _aes_ctr(key, nonce, payload, workers=4)
+        assert parallel == serial
+        assert type(serial) is bytes and type(parallel) is bytes
+        assert _aes_ctr(key, nonce, memoryview(serial), workers=4) == payload
+    
+    big_secret = FirstParty1.new_secret()
+    ciphertext = FirstParty1._encrypt(big_secret, payload)
+    worker = Cipher(
+        algorithms.AES(big_secret.key), 
+        modes.CTR(big_secret.seed)
+    ).encryptor()
+    assert ciphertext == worker.update(payload) + worker.finalize()
+    plaintext = FirstParty2._decrypt(big_secret, ciphertext)
+    assert isinstance(plaintext, bytes) and plaintext == payload
     
     # import IPython
     # IPython.embed()
@@ -33,11 +33,15 @@ golix: A python library for Golix protocol object manipulation.
 
 '''
 
+import os
 import sys
+import pickle
 import collections
 
 # These are normal inclusions
 from golix import Ghid
+from golix import SecurityError
+from golix import ParseError
 
 # These are abnormal (don't use in production) inclusions.
 from golix._getlow import GEOC
@@ -50,6 +54,7 @@ from golix._getlow import GARQHandshake
 from golix._getlow import GARQAck
 from golix._getlow import GARQNak
 from golix._getlow import GARQElse
+from golix._getlow import PackedObject
 
 from golix.utils import Secret
 from golix.utils import _dummy_signature
@@ -60,8 +65,6 @@ from golix.utils import _dummy_pubkey
 from golix.utils import _dummy_ghid
 
 # These are soon-to-be-removed abnormal imports
-from golix._spec import _gidc, _geoc, _gobs, _gobd, _gdxx, _garq
-from golix._spec import _asym_hand, _asym_ak, _asym_nk, _asym_else
 
 # ###############################################
 # Testing
@@ -107,6 +110,26 @@ def run():
     geoc_2p = geoc_2.packed
     geoc_2r = GEOC.unpack(geoc_2p)
     
+    # GEOC BLAKE2b address test.
+    geoc_3 = GEOC(author=_rls_author, payload=_dummy_payload)
+    geoc_3.pack(cipher=0, address_algo=2)
+    geoc_3.pack_signature(_dummy_signature)
+    geoc_3p = geoc_3.packed
+    geoc_3r = GEOC.unpack(geoc_3p)
+    assert geoc_3r.ghid.algo == 2
+    assert geoc_3r.ghid == geoc_3.ghid
+    assert geoc_3.ghid.address != geoc_2.ghid.address
+    
+    # Corrupted BLAKE2b payload should fail address verification.
+    geoc_3c = bytearray(geoc_3p)
+    geoc_3c[100] ^= 0xFF
+    try:
+        GEOC.unpack(geoc_3c)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Corrupted GEOC passed address verification.')
+    
     # GOBS dummy address test.
     gobs_1 = GOBS(
         binder=_dummy_author, 
@@ -159,6 +182,25 @@ def run():
     gobd_3p = gobd_3.packed
     gobd_3r = GOBD.unpack(gobd_3p)
     
+    # GOBD BLAKE2b address test, with and without history
+    gobd_4 = GOBD(
+        binder=_rls_author, 
+        target=_dummy_ghid
+    )
+    gobd_4.pack(cipher=0, address_algo=2)
+    gobd_4.pack_signature(_dummy_signature)
+    gobd_4r = GOBD.unpack(gobd_4.packed)
+    gobd_5 = GOBD(
+        binder=_rls_author, 
+        target=_dummy_ghid,
+        ghid_dynamic=gobd_4.ghid_dynamic,
+        history=[gobd_4.ghid]
+    )
+    gobd_5.pack(cipher=0, address_algo=2)
+    gobd_5.pack_signature(_dummy_signature)
+    gobd_5r = GOBD.unpack(gobd_5.packed)
+    assert gobd_5r.ghid_dynamic == gobd_4.ghid_dynamic
+    
     # GDXX dummy address test.
     gdxx_1 = GDXX(
         debinder=_dummy_author, 
@@ -240,7 +282,211 @@ def run():
     asel_1.pack()
     asel_1p = asel_1.packed
     asel_1r = GARQElse.unpack(asel_1p)
+
+    # Objects are built directly by the layouts into compact __slots__.
+    for obj in (gidc_2r, geoc_2r, gobs_1r, gdxx_2r, garq_2r,
+                asrq_1r, asak_1r, asnk_1r, asel_1r):
+        assert not hasattr(obj, '__dict__')
+    assert geoc_2r.author == geoc_2.author
+    assert bytes(geoc_2r.payload) == _dummy_payload
+    assert gdxx_2r.debinder == _rls_author
+    assert garq_2r.recipient == _rls_author
+    assert asrq_1r.target == asrq_1.target
+    assert asrq_1r.secret == asrq_1.secret
+    assert asak_1r.status == 5
+    assert asnk_1r.status == 7
+    assert asnk_1r.magic == b'NK'
+    assert bytes(asel_1r.payload) == b'Hello world'
+
+    # Unpacked dicts still load through _control.
+    geoc_2c = GEOC(_control=GEOC.LAYOUT.unpack(geoc_2p)[0])
+    assert geoc_2c.author == geoc_2.author
+    assert geoc_2c.ghid == geoc_2.ghid
+    asak_1c = GARQAck(_control=GARQAck.LAYOUT.unpack(asak_1p)[0])
+    assert asak_1c.target == asak_1.target
+    assert asak_1c.status == 5
+
+    # Missing fields still raise AttributeError, not a bare slot error.
+    try:
+        GOBS.__new__(GOBS).binder
+    except AttributeError as e:
+        assert 'Binder not yet defined.' in str(e)
+    else:
+        raise AssertionError('Undefined binder did not raise.')
+
+    # Signed objects produce immutable PackedObjects, equal by ghid.
+    gobs_3 = GOBS(binder=_rls_author, target=_dummy_ghid)
+    gobs_3.pack(cipher=0, address_algo=1)
+    try:
+        gobs_3.frozen
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('Unsigned object produced a PackedObject.')
+    gobs_3f = gobs_3.pack_signature(_dummy_signature)
+    assert isinstance(gobs_3f, PackedObject)
+    assert isinstance(gobs_3.packed, bytes)
+    assert gobs_3f is gobs_3.frozen
+    assert gobs_3f.type is GOBS
+    assert gobs_3f.ghid == gobs_3.ghid
+    assert bytes(gobs_3f) is gobs_3.packed
+    assert len(gobs_3f) == len(gobs_3.packed)
+
+    gobs_3r = GOBS.unpack(bytearray(gobs_3f.packed))
+    assert gobs_3r.frozen == gobs_3f
+    assert gobs_3r.frozen is not gobs_3f
+    assert hash(gobs_3r.frozen) == hash(gobs_3f)
+    assert len({gobs_3f, gobs_3r.frozen, gobs_1.frozen}) == 2
+    assert gobs_3f != gobs_3.packed
+
+    # Unpacking a PackedObject shares it rather than copying.
+    gobs_3s = gobs_3f.unpack()
+    assert isinstance(gobs_3s, GOBS)
+    assert gobs_3s.frozen is gobs_3f
+    assert gobs_3s.target == _dummy_ghid
+    assert GIDC.load_keys(gidc_2.frozen)[0] == gidc_2.ghid
+    assert GOBD.unpack(gobd_3.frozen).history == [gobd_2.ghid]
+
+    try:
+        gobs_3f.ghid = _dummy_ghid
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError('PackedObject was mutable.')
+
+    # The ghid is copied, so mutating the object's ghid doesn't leak.
+    gobs_3.ghid.address = bytes(64)
+    assert gobs_3f.ghid == gobs_3r.ghid
+    assert hash(gobs_3f) == hash(gobs_3r.frozen)
+    # So is the one it hands out.
+    gobs_3f.ghid.address = bytes(64)
+    assert gobs_3f.ghid == gobs_3r.ghid
+    assert gobs_3f in {gobs_3r.frozen}
+    
+    # Building one directly checks the ghid against the packed object.
+    gobs_3d = PackedObject(GOBS, gobs_3r.ghid, bytearray(gobs_3f.packed))
+    assert gobs_3d == gobs_3f
+    assert isinstance(gobs_3d.packed, bytes)
+    try:
+        PackedObject(GOBS, gobs_1.ghid, gobs_3f.packed)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('PackedObject accepted a mismatched ghid.')
+
+    gobs_3p = pickle.loads(pickle.dumps(gobs_3f))
+    assert gobs_3p == gobs_3f
+    assert gobs_3p.packed == gobs_3f.packed
+    assert gobs_3p.type is GOBS
+
+    # packed_size, pack_into, and iter_segments all agree with pack.
+    _payload = bytearray(os.urandom(100000))
+    _makers = {
+        GIDC: lambda: GIDC(
+            signature_key=_dummy_pubkey,
+            encryption_key=_dummy_pubkey,
+            exchange_key=_dummy_pubkey,
+        ),
+        GEOC: lambda: GEOC(author=_rls_author, payload=_payload),
+        GOBS: lambda: GOBS(binder=_rls_author, target=_dummy_ghid),
+        GOBD: lambda: GOBD(binder=_rls_author, target=_dummy_ghid),
+        GDXX: lambda: GDXX(debinder=_rls_author, target=gobs_1.ghid),
+        GARQ: lambda: GARQ(recipient=_rls_author, payload=_dummy_asym),
+    }
+    _history = {'history': [gobd_2.ghid], 'ghid_dynamic': gobd_2.ghid_dynamic}
+    for cls, make in _makers.items():
+        if cls is GIDC:
+            signature = None
+        elif cls is GARQ:
+            signature = _dummy_mac
+        else:
+            signature = _dummy_signature
+        for address_algo in (1, 2):
+            reference = make()
+            size = reference.packed_size(address_algo=address_algo, cipher=0)
+            reference.pack(cipher=0, address_algo=address_algo)
+            if signature is not None:
+                reference.pack_signature(signature, freeze=False)
+            assert b''.join(reference.iter_segments()) == reference.packed
+            assert len(reference.packed) == size
+            
+            buffer = bytearray(size + 10)
+            obj = make()
+            assert obj.pack_into(buffer, 7, address_algo, 0) == size
+            if signature is not None:
+                assert obj.pack_signature(signature, freeze=False) is None
+            assert obj.ghid == reference.ghid
+            assert bytes(obj.packed) == reference.packed
+            assert buffer[7:7 + size] == reference.packed
+            assert buffer[:7] == bytes(7) and buffer[7 + size:] == bytes(3)
+            assert list(obj.iter_segments()) == [obj.packed]
+            assert cls.unpack(buffer[7:7 + size]).ghid == reference.ghid
+            
+            try:
+                make().pack_into(bytearray(size - 1), 0, address_algo, 0)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('Packed object past end of buffer.')
+                
+    # Existing history is sized (and packed) too.
+    gobd_4s = GOBD(binder=_rls_author, target=_dummy_ghid, **_history)
+    size = gobd_4s.packed_size(1, 0)
+    gobd_4s.pack(cipher=0, address_algo=1)
+    gobd_4s.pack_signature(_dummy_signature)
+    assert gobd_4s.ghid_dynamic == gobd_2.ghid_dynamic
+    assert size == len(gobd_4s.packed) == gobd_4s.packed_size(1, 0)
+    
+    # Large immutable payloads are passed through to iter_segments, not 
+    # copied.
+    _frozen_payload = bytes(_payload)
+    geoc_4 = GEOC(author=_rls_author, payload=memoryview(_frozen_payload))
+    geoc_4.pack(cipher=0, address_algo=2)
+    geoc_4.pack_signature(_dummy_signature, freeze=False)
+    segments = list(geoc_4.iter_segments())
+    assert len(segments) == 3
+    assert segments[1].obj is _frozen_payload
+    assert b''.join(segments) == geoc_4.packed
+    assert list(geoc_4.iter_segments()) == [geoc_4.packed]
     
+    # Mutable ones are snapshotted, so changing them after packing can't
+    # invalidate the ghid.
+    _mutable_payload = bytearray(_payload)
+    geoc_4m = GEOC(author=_rls_author, payload=_mutable_payload)
+    geoc_4m.pack(cipher=0, address_algo=2)
+    geoc_4m.pack_signature(_dummy_signature, freeze=False)
+    _mutable_payload[:8] = b'mutated!'
+    segments = list(geoc_4m.iter_segments())
+    assert segments[1] == _payload
+    assert GEOC.unpack(b''.join(segments)).ghid == geoc_4.ghid
+    assert GEOC.unpack(geoc_4m.packed).payload == _payload
+    
+    # packed_size checks fixed-length fields just like packing does.
+    garq_5 = GARQ(recipient=_rls_author, payload=bytes(511))
+    assert GARQ(recipient=_rls_author, payload=bytes(512)).packed_size(1, 1)
+    try:
+        garq_5.packed_size(1, 1)
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('Sized a GARQ with a short payload.')
+    
+    # Unsigned objects can't be iterated, and signatures must fit.
+    geoc_5 = GEOC(author=_rls_author, payload=b'hello')
+    geoc_5.pack(cipher=0, address_algo=2)
+    try:
+        geoc_5.iter_segments()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('Unsigned object produced segments.')
+    try:
+        geoc_5.pack_signature(_dummy_signature + b'!')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Packed an oversized signature.')
+
     # import IPython
     # IPython.embed()
                 
@@ -0,0 +1,245 @@
+'''
+Scratchpad for test-based development. Unit tests for inbox.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# These are normal inclusions
+from golix import Ghid
+from golix import SecurityError
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.inbox import Inbox
+from golix.inbox import RequestRejected
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0
+        
+    def __call__(self):
+        return self.now
+        
+        
+def _expect_rejected(reason, inbox, packed, sender=None):
+    try:
+        inbox.unpack_request(packed, sender)
+    except RequestRejected as exc:
+        assert exc.reason == reason, exc.reason
+    else:
+        raise AssertionError('Inbox accepted a request it should reject.')
+        
+        
+def _requests(sender, recipient, count):
+    return [
+        sender.make_request(
+            recipient.second_party, 
+            sender.make_ack(target=Ghid(1, bytes([ii]) * 64))
+        ).packed
+        for ii in range(count)
+    ]
+    
+    
+def run():
+    recipient = FirstParty2()
+    alice = FirstParty2()
+    bob = FirstParty2()
+    bystander = FirstParty2()
+    
+    clock = _Clock()
+    inbox = Inbox(recipient, per_sender=2, total=3, window=10, clock=clock)
+    # Never decrypt anything that fails screening.
+    def fail(*args, **kwargs):
+        raise AssertionError('Decrypted a request that failed screening.')
+    recipient._decrypt_asym = fail
+    
+    from_alice = _requests(alice, recipient, 4)
+    from_bob = _requests(bob, recipient, 2)
+    
+    _expect_rejected('invalid', inbox, b'GARQ' + bytes(100))
+    _expect_rejected('invalid', inbox, recipient.make_container(
+        recipient.new_secret(), b'Not a request'
+    ).packed)
+    _expect_rejected(
+        'wrong_recipient', inbox, _requests(alice, bystander, 1)[0]
+    )
+    
+    del recipient._decrypt_asym
+    garq = inbox.unpack_request(from_alice[0], alice.ghid)
+    assert recipient.receive_request(alice.second_party, garq).target == (
+        Ghid(1, bytes([0]) * 64)
+    )
+    recipient._decrypt_asym = fail
+    
+    _expect_rejected('duplicate', inbox, from_alice[0], alice.ghid)
+    
+    del recipient._decrypt_asym
+    inbox.unpack_request(from_alice[1], alice.ghid)
+    recipient._decrypt_asym = fail
+    _expect_rejected('over_sender_budget', inbox, from_alice[2], alice.ghid)
+    
+    del recipient._decrypt_asym
+    inbox.unpack_request(from_bob[0], bob.ghid)
+    recipient._decrypt_asym = fail
+    _expect_rejected('over_total_budget', inbox, from_bob[1], bob.ghid)
+    
+    # Budgets reset with the window.
+    del recipient._decrypt_asym
+    clock.now = 10
+    inbox.unpack_request(from_alice[2], alice.ghid)
+    
+    # Screened requests that fail decryption are counted separately.
+    try:
+        recipient._decrypt_asym = lambda data: b'garbage'
+        inbox.unpack_request(from_alice[3], alice.ghid)
+    except RequestRejected:
+        raise AssertionError('Decryption failure reported as screening.')
+    except Exception:
+        pass
+    else:
+        raise AssertionError('Accepted an undecryptable request.')
+    finally:
+        del recipient._decrypt_asym
+    
+    assert inbox.counters == {
+        'invalid': 2,
+        'wrong_recipient': 1,
+        'accepted': 4,
+        'duplicate': 1,
+        'over_sender_budget': 1,
+        'over_total_budget': 1,
+        'failed': 1,
+    }, inbox.counters
+    
+    # A copy with a corrupted MAC, sent first, doesn't get the genuine 
+    # request rejected as a duplicate.
+    inbox = Inbox(recipient)
+    genuine = _requests(alice, recipient, 1)[0]
+    forged = bytearray(genuine)
+    forged[-1] ^= 1
+    forged = bytes(forged)
+    garq = inbox.unpack_request(forged, bob.ghid)
+    try:
+        recipient.receive_request(alice.second_party, garq)
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Received a request with a corrupted MAC.')
+    _expect_rejected('duplicate', inbox, forged, bob.ghid)
+    # Copies with other MACs reuse the first decryption.
+    recipient._decrypt_asym = fail
+    garq = inbox.unpack_request(genuine, alice.ghid)
+    recipient.receive_request(alice.second_party, garq)
+    for ii in range(3):
+        replay = bytearray(genuine)
+        replay[-1] ^= 2 + ii
+        garq = inbox.unpack_request(bytes(replay), bob.ghid)
+        try:
+            recipient.receive_request(alice.second_party, garq)
+        except SecurityError:
+            pass
+        else:
+            raise AssertionError('Received a request with a corrupted MAC.')
+    del recipient._decrypt_asym
+    assert inbox.counters['cached'] == 4, inbox.counters
+    assert inbox.counters['accepted'] == 5, inbox.counters
+    
+    # Requests that were only screened can't be reused.
+    inbox = Inbox(recipient)
+    packed = _requests(alice, recipient, 1)[0]
+    inbox.screen(packed, alice.ghid)
+    replay = bytearray(packed)
+    replay[-1] ^= 1
+    _expect_rejected('duplicate', inbox, bytes(replay), alice.ghid)
+    
+    # Bulk unpacking reports rejections alongside results.
+    inbox = Inbox(recipient, per_sender=3)
+    packeds = _requests(alice, recipient, 4) + _requests(bob, recipient, 1)
+    packeds.append(packeds[0])
+    replay = bytearray(packeds[1])
+    replay[-1] ^= 1
+    packeds.append(bytes(replay))
+    senders = [alice.ghid] * 4 + [bob.ghid, alice.ghid, alice.ghid]
+    results = sorted(inbox.unpack_requests(packeds, senders, workers=2))
+    assert [index for index, garq, error in results] == list(range(7))
+    reasons = [
+        error.reason if error is not None else None 
+        for index, garq, error in results
+    ]
+    assert reasons == [
+        None, None, None, 'over_sender_budget', None, 'duplicate', None
+    ]
+    for (index, garq, error), reason in zip(results, reasons):
+        assert (garq is None) == (reason is not None)
+    assert results[6][1].payload == results[1][1].payload
+    assert inbox.counters['cached'] == 1
+    
+    # Closing the generator early forgets whatever it hasn't decrypted 
+    # yet, and refunds its budget, so it can be resubmitted.
+    inbox = Inbox(recipient, per_sender=2)
+    packeds = _requests(alice, recipient, 2)
+    results = inbox.unpack_requests(
+        [packeds[0], b'junk', packeds[1]], 
+        [alice.ghid] * 3, 
+        workers = 1
+    )
+    index, garq, error = next(results)
+    assert index == 1 and error.reason == 'invalid'
+    results.close()
+    replay = bytearray(packeds[0])
+    replay[-1] ^= 1
+    garq = inbox.unpack_request(bytes(replay), alice.ghid)
+    garq = inbox.unpack_request(packeds[1], alice.ghid)
+    recipient.receive_request(alice.second_party, garq)
+    assert inbox.counters['cached'] == 0, inbox.counters
+    
+    # Likewise part way through decryption.
+    inbox = Inbox(recipient)
+    results = inbox.unpack_requests(packeds + [b'junk'], workers=1)
+    next(results)
+    index, garq, error = next(results)
+    assert index == 0 and error is None
+    results.close()
+    _expect_rejected('duplicate', inbox, packeds[0])
+    garq = inbox.unpack_request(packeds[1])
+    recipient.receive_request(alice.second_party, garq)
+    
+    
+if __name__ == '__main__':
+    run()
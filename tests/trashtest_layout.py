@@ -0,0 +1,278 @@
+'''
+Scratchpad for test-based development. Unit tests for _layout.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+
+# These are normal inclusions
+from golix import Ghid
+from golix import ParseError
+
+# These are abnormal (don't use in production) inclusions.
+from golix import _layout
+from golix.utils import Secret
+from golix.utils import cipher_length_lookup
+from golix.utils import _dummy_pubkey
+from golix.utils import _dummy_ghid
+
+# The smartyparse reference definitions live alongside the tests.
+import _spec
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _ghid(algo=1):
+    if algo == 0:
+        return _dummy_ghid
+    return Ghid(algo, os.urandom(64))
+    
+    
+def _header(magic, fmt, cipher, body, algo):
+    return {
+        'magic': magic,
+        'version': fmt.latest,
+        'cipher': cipher,
+        'body': body,
+        'ghid': _ghid(algo),
+        'signature': None
+    }
+    
+    
+def _controls(cipher, algo):
+    ''' Yields (format, reference parser, control) for every object type.
+    '''
+    lengths = cipher_length_lookup[cipher]
+    signature = os.urandom(lengths['sig'])
+    
+    if cipher == 0:
+        keys = (_dummy_pubkey, _dummy_pubkey, _dummy_pubkey)
+    elif cipher == 1:
+        keys = (os.urandom(512), os.urandom(512), os.urandom(32))
+    else:
+        keys = (os.urandom(32), os.urandom(32), os.urandom(32))
+    control = _header(b'GIDC', _layout.gidc, cipher, {
+        'signature_key': keys[0],
+        'encryption_key': keys[1],
+        'exchange_key': keys[2],
+    }, algo)
+    control['signature'] = b''
+    yield _layout.gidc, _spec._gidc, control
+    
+    # Note: smartyparse cannot pack empty payloads, so they aren't compared.
+    for payload in (b'hello world', os.urandom(5000)):
+        control = _header(b'GEOC', _layout.geoc, cipher, {
+            'author': _ghid(algo),
+            'payload': payload
+        }, algo)
+        control['signature'] = signature
+        yield _layout.geoc, _spec._geoc, control
+        
+    control = _header(b'GOBS', _layout.gobs, cipher, {
+        'binder': _ghid(algo),
+        'target': _ghid(algo)
+    }, algo)
+    control['signature'] = signature
+    yield _layout.gobs, _spec._gobs, control
+    
+    for history in ([], [_ghid(algo)], [_ghid(algo) for __ in range(7)]):
+        control = _header(b'GOBD', _layout.gobd, cipher, {
+            'binder': _ghid(algo),
+            'history': history,
+            'target': _ghid(algo)
+        }, algo)
+        control['ghid_dynamic'] = _ghid(algo)
+        control['signature'] = signature
+        yield _layout.gobd, _spec._gobd, control
+        
+    control = _header(b'GDXX', _layout.gdxx, cipher, {
+        'debinder': _ghid(algo),
+        'target': _ghid(algo)
+    }, algo)
+    control['signature'] = signature
+    yield _layout.gdxx, _spec._gdxx, control
+    
+    control = _header(b'GARQ', _layout.garq, cipher, {
+        'recipient': _ghid(algo),
+        'payload': os.urandom(lengths['asym'])
+    }, algo)
+    control['signature'] = os.urandom(lengths['mac'])
+    yield _layout.garq, _spec._garq, control
+    
+    
+def _payloads(algo):
+    secret = Secret(cipher=1, key=os.urandom(32), seed=os.urandom(16))
+    yield _layout.asym_hand, _spec._asym_hand, {
+        'author': _ghid(algo),
+        'magic': b'HS',
+        'payload': {'target': _ghid(algo), 'secret': bytes(secret)}
+    }
+    yield _layout.asym_ak, _spec._asym_ak, {
+        'author': _ghid(algo),
+        'magic': b'AK',
+        'payload': {'target': _ghid(algo), 'status': 0}
+    }
+    yield _layout.asym_nk, _spec._asym_nk, {
+        'author': _ghid(algo),
+        'magic': b'NK',
+        'payload': {'target': _ghid(algo), 'status': 7}
+    }
+    yield _layout.asym_else, _spec._asym_else, {
+        'author': _ghid(algo),
+        'magic': b'\x00\x00',
+        'payload': b'arbitrary'
+    }
+    
+    
+def _normalize(value):
+    ''' Converts smartyparse and layout outputs into comparable form.
+    '''
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    elif isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    elif hasattr(value, 'keys'):
+        normalized = {}
+        for key in value.keys():
+            try:
+                normalized[key] = _normalize(value[key])
+            # Smartyparse lists length fields in keys(), but omits them.
+            except KeyError:
+                pass
+        return normalized
+    else:
+        return value
+        
+        
+def _check(fmt, reference, control):
+    packed = fmt.pack(control)
+    expected = reference.pack(control)
+    assert isinstance(packed, bytearray)
+    assert packed == expected, fmt
+    
+    unpacked, offsets = fmt.unpack(bytes(expected))
+    assert _normalize(unpacked) == _normalize(reference.unpack(expected))
+    
+    # Offsets must locate the ghid exactly.
+    if 'ghid' in offsets:
+        start = offsets['ghid']
+        assert packed[start:start + 65] == bytes(unpacked['ghid'])
+    
+    
+def run():
+    # Every object type, cipher and address algorithm must be byte-for-byte
+    # identical to the reference smartyparse definitions.
+    for cipher in (0, 1, 2):
+        for algo in (0, 1, 2):
+            for fmt, reference, control in _controls(cipher, algo):
+                _check(fmt, reference, control)
+                
+    for algo in (0, 1, 2):
+        for fmt, reference, control in _payloads(algo):
+            _check(fmt, reference, control)
+            
+    # Layouts are compiled once per (version, cipher) and then reused.
+    layout = _layout.geoc.layout(14, 1)
+    assert _layout.geoc.layout(14, 1) is layout
+    assert _layout.geoc.layout(14, 2) is not layout
+    # Everything before the (variable-length) payload has a static offset.
+    assert [field.offset for field in layout.fields][:4] == [0, 4, 8, 9]
+    assert layout.fields[-1].offset is None
+    assert _layout.gobs.layout(6, 1).SIZE == 4 + 4 + 1 + 65 + 65 + 65 + 512
+    
+    for magic, fmt in _layout.OBJECT_FORMATS.items():
+        assert fmt.magic == magic
+        
+    # Malformed data must raise ParseError.
+    control = next(_controls(1, 1))[2]
+    packed = bytes(_layout.gidc.pack(control))
+    bad = [
+        b'',
+        packed[:3],
+        packed[:-1],
+        b'GEOC' + packed[4:],
+        packed[:4] + b'\x00\x00\x00\x63' + packed[8:],
+        packed[:8] + b'\x63' + packed[9:],
+    ]
+    for data in bad:
+        try:
+            _layout.gidc.unpack(data)
+        except ParseError:
+            pass
+        else:
+            raise AssertionError('Unpacked malformed data.')
+            
+    # A history length that overruns the object
+    fmt, __, control = list(_controls(1, 1))[-3]
+    packed = bytearray(fmt.pack(control))
+    offset = 4 + 4 + 1 + 65
+    packed[offset:offset + 2] = b'\xff\xff'
+    try:
+        fmt.unpack(packed)
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('Unpacked malformed history.')
+        
+    # Empty payloads round-trip.
+    control = list(_controls(1, 1))[1][2]
+    control['body']['payload'] = b''
+    unpacked, __ = _layout.geoc.unpack(_layout.geoc.pack(control))
+    assert unpacked['body']['payload'] == b''
+    
+    # Unknown ciphers can neither pack nor unpack.
+    try:
+        _layout.gobs.layout(6, 99)
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('Compiled a layout for an unknown cipher.')
+        
+    # Incomplete codecs fail on creation, not on first use.
+    class _PackOnly(_layout._Codec):
+        def pack(self, value):
+            return b''
+    try:
+        _PackOnly()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('Created a codec without unpack.')
+    
+    # import IPython
+    # IPython.embed()
+                
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,192 @@
+'''
+Scratchpad for test-based development. Unit tests for metadata.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Global dependencies
+import os
+import tempfile
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GIDC
+from golix._getlow import GEOC
+from golix._getlow import GOBS
+from golix._getlow import GOBD
+from golix.metadata import MetadataIndex
+from golix.metadata import Record
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _objects(alice, bob):
+    geocs = [
+        alice.make_container(alice.new_secret(), b'hello ' + bytes([ii]))
+        for ii in range(3)
+    ]
+    gobs = alice.make_bind_static(geocs[0].ghid)
+    gobd = alice.make_bind_dynamic(geocs[1].ghid)
+    gobd_2 = alice.make_bind_dynamic(
+        geocs[2].ghid, 
+        ghid_dynamic = gobd.ghid_dynamic,
+        history = [gobd.ghid]
+    )
+    gdxx = alice.make_debind(gobs.ghid)
+    garq = alice.make_request(
+        bob.second_party, 
+        alice.make_ack(target=geocs[0].ghid)
+    )
+    bob_geoc = bob.make_container(bob.new_secret(), b'from bob')
+    bob_gobs = bob.make_bind_static(geocs[0].ghid)
+    gidc = GIDC.unpack(alice.second_party.packed)
+    return (
+        [gidc] + geocs + [gobs, gobd, gobd_2, gdxx, garq, bob_geoc, bob_gobs]
+    )
+    
+    
+def run():
+    alice = FirstParty2()
+    bob = FirstParty2()
+    objs = _objects(alice, bob)
+    gidc, geoc_1, geoc_2, geoc_3, gobs, gobd, gobd_2, gdxx, garq = objs[:9]
+    bob_geoc, bob_gobs = objs[9:]
+    
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'index.sqlite')
+        
+        with MetadataIndex(path, batch_size=4) as index:
+            # Frozen and unfrozen objects both work; repeats are ignored.
+            index.add(objs[0].frozen)
+            assert index.add_many(objs[1:]) == len(objs) - 1
+            index.add_many(objs[:3])
+            assert len(index) == len(objs)
+            assert [record.ghid for record in index.find()] == [
+                obj.ghid for obj in objs
+            ]
+            
+            record = index.get(gobd_2.ghid)
+            assert isinstance(record, Record)
+            assert record.type is GOBD
+            assert record.party == alice.ghid
+            assert record.target == geoc_3.ghid
+            assert record.ghid_dynamic == gobd.ghid_dynamic
+            assert record.size == len(gobd_2.packed)
+            
+            record = index.get(gidc.ghid)
+            assert record.type is GIDC
+            assert record.party is None and record.target is None
+            assert index.get(garq.ghid).party == bob.ghid
+            assert index.get(gdxx.ghid).party == alice.ghid
+            
+            # The queries servers need.
+            assert [r.ghid for r in index.find(type=GEOC, party=alice.ghid)] \
+                == [geoc_1.ghid, geoc_2.ghid, geoc_3.ghid]
+            assert [r.ghid for r in index.find(type='GOBS', party=bob.ghid)] \
+                == [bob_gobs.ghid]
+            assert [r.ghid for r in index.find(target=geoc_1.ghid)] == [
+                gobs.ghid, bob_gobs.ghid
+            ]
+            assert [r.ghid for r in index.find(target=gobs.ghid)] == [
+                gdxx.ghid
+            ]
+            assert [
+                r.ghid for r in index.find(ghid_dynamic=gobd.ghid_dynamic)
+            ] == [gobd.ghid, gobd_2.ghid]
+            
+            # Cursors page through ingest order.
+            cursor = index.get(gobd.ghid).seq
+            page = index.find(after=cursor, limit=2)
+            assert [r.ghid for r in page] == [gobd_2.ghid, gdxx.ghid]
+            assert [r.ghid for r in index.find(after=page[-1].seq)] == [
+                obj.ghid for obj in objs[8:]
+            ]
+            assert index.find(after=index.cursor) == []
+            after = index.get(geoc_3.ghid).seq
+            assert index.find(type=GEOC, after=after) == [
+                index.get(bob_geoc.ghid)
+            ]
+            
+            assert index.discard(gdxx.ghid)
+            assert not index.discard(gdxx.ghid)
+            assert gdxx.ghid not in index
+            assert gobs.ghid in index
+            
+            for bad in ('nonsense', object):
+                try:
+                    index.find(type=bad)
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError('Found an unknown type.')
+            try:
+                index.add(b'not an object')
+            except TypeError:
+                pass
+            else:
+                raise AssertionError('Indexed something other than an object.')
+            try:
+                index.get(gdxx.ghid)
+            except KeyError:
+                pass
+            else:
+                raise AssertionError('Got a discarded record.')
+                
+            extra = alice.make_bind_static(Ghid(1, bytes(64)))
+            index.add(extra)
+            last = index.cursor
+            
+        # Adds still pending at close are written.
+        with MetadataIndex(path) as index:
+            index.add(alice.make_bind_static(Ghid(1, bytes([1]) * 64)))
+        with MetadataIndex(path) as index:
+            assert len(index) == len(objs) + 1
+            assert extra.ghid in index
+            assert index.find(after=last)[0].seq == last + 1
+            
+        try:
+            index.find()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('Queried a closed index.')
+            
+        
+if __name__ == '__main__':
+    run()
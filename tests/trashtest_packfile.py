@@ -0,0 +1,164 @@
+'''
+Scratchpad for test-based development. Unit tests for packfile.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import tempfile
+
+from smartyparse import ParseError
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are abnormal (don't use in production) inclusions.
+from golix._getlow import GOBS
+from golix._getlow import GEOC
+from golix.packfile import PackWriter
+from golix.packfile import PackReader
+from golix.packfile import compact
+from golix.utils import _dummy_signature
+from golix.utils import _dummy_ghid
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _make_bindings(count, start=0):
+    bindings = []
+    for ii in range(start, start + count):
+        target = Ghid(1, int.to_bytes(ii, length=64, byteorder='big'))
+        gobs = GOBS(binder=_dummy_ghid, target=target)
+        gobs.pack(cipher=0, address_algo=1)
+        gobs.pack_signature(_dummy_signature)
+        bindings.append(gobs)
+    return bindings
+    
+    
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'objects.gpak')
+        
+        # Initial segment
+        first = _make_bindings(50)
+        with PackWriter(path) as writer:
+            for gobs in first:
+                assert writer.add(gobs)
+            # Duplicates are skipped
+            assert not writer.add(first[0])
+            
+        with PackReader(path) as reader:
+            assert len(reader) == 50
+            for gobs in first:
+                assert gobs.ghid in reader
+                assert reader.get(gobs.ghid) == bytes(gobs.packed)
+                assert reader.unpack(gobs.ghid).target == gobs.target
+            ghids = list(reader)
+            assert ghids == sorted(ghids, key=bytes)
+            
+        # Appended segment, with a container thrown in for good measure
+        second = _make_bindings(25, start=50)
+        geoc = GEOC(author=_dummy_ghid, payload=b'Hello world')
+        geoc.pack(cipher=0, address_algo=1)
+        geoc.pack_signature(_dummy_signature)
+        with PackWriter(path) as writer:
+            assert len(writer) == 50
+            for gobs in second:
+                writer.add(gobs)
+            writer.add(geoc)
+            
+        with PackReader(path) as reader:
+            assert len(reader) == 76
+            assert reader.unpack(geoc.ghid).payload == b'Hello world'
+            sequential = [ghid for ghid, packed in reader.iter_packed()]
+            expected = [obj.ghid for obj in first + second] + [geoc.ghid]
+            assert sequential == expected
+            assert len(list(reader.iter_unpacked())) == 76
+            assert Ghid(1, bytes(64)) not in reader
+            
+        # An interrupted append leaves everything already stored readable
+        third = _make_bindings(5, start=100)
+        writer = PackWriter(path)
+        for gobs in third:
+            writer.add(gobs)
+        writer._file.flush()
+        with PackReader(path) as reader:
+            assert len(reader) == 76
+            assert third[0].ghid not in reader
+        # Simulate a crash: the new index and trailer are never written.
+        writer._file.write(b'half an object')
+        writer._file.close()
+        with PackReader(path) as reader:
+            assert len(reader) == 76
+            assert reader.unpack(geoc.ghid).payload == b'Hello world'
+        # The next writer discards the partial segment.
+        with PackWriter(path) as writer:
+            assert len(writer) == 76
+            writer.add(third[0])
+        assert not os.path.exists(path + '.pending')
+        with PackReader(path) as reader:
+            assert len(reader) == 77
+            assert reader.get(third[0].ghid) == bytes(third[0].packed)
+        second.append(third[0])
+        
+        # Compaction reclaims the old index and drops objects
+        size_before = os.path.getsize(path)
+        dropped = [gobs.ghid for gobs in first[:10]]
+        assert compact(path, drop=dropped) == 67
+        assert os.path.getsize(path) < size_before
+        
+        with PackReader(path) as reader:
+            assert len(reader) == 67
+            for ghid in dropped:
+                assert ghid not in reader
+            for gobs in first[10:] + second:
+                assert reader.get(gobs.ghid) == bytes(gobs.packed)
+                
+        # Garbage (including empty files) should refuse to load
+        junk = os.path.join(root, 'junk.gpak')
+        for garbage in (b'Definitely not a pack file.', b'', b'GPAK'):
+            with open(junk, 'wb') as f:
+                f.write(garbage)
+            try:
+                PackReader(junk)
+            except ParseError:
+                pass
+            else:
+                raise AssertionError('Loaded a garbage pack file.')
+    
+    # import IPython
+    # IPython.embed()
+                
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,165 @@
+'''
+Scratchpad for test-based development. Unit tests for pool.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# These are normal inclusions
+from golix import SecurityError
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty1
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.pool import IdentityPool
+from golix.utils import Ghid
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _targets(count):
+    return [
+        Ghid(1, int.to_bytes(ii, length=64, byteorder='big'))
+        for ii in range(count)
+    ]
+    
+    
+def run():
+    first_id_1 = FirstParty1()
+    first_id_2 = FirstParty2()
+    first_id_3 = FirstParty2()
+    outsider = FirstParty2()
+    second_id_1 = first_id_1.second_party
+    second_id_3 = first_id_3.second_party
+    
+    with IdentityPool([first_id_1, first_id_2, first_id_3], workers=2) as pool:
+        assert first_id_2.ghid in pool
+        assert outsider.ghid not in pool
+        
+        # Signatures from the pool must verify just like local ones.
+        addresses = [target.address for target in _targets(9)]
+        for first_id, second_id in ((first_id_1, second_id_1),
+                                    (first_id_3, second_id_3)):
+            signatures = pool.sign_many(first_id.ghid, addresses)
+            assert len(signatures) == len(addresses)
+            for address, signature in zip(addresses, signatures):
+                first_id._verify(second_id, signature, address)
+        
+        future = pool.submit_sign(first_id_3.ghid, addresses[0])
+        first_id_3._verify(second_id_3, future.result(), addresses[0])
+        
+        # Routing is by ghid: a signature from the wrong identity fails.
+        wrong = pool.sign_many(first_id_2.ghid, addresses[:1])[0]
+        try:
+            first_id_3._verify(second_id_3, wrong, addresses[0])
+        except SecurityError:
+            pass
+        else:
+            raise AssertionError('Pool signed as the wrong identity.')
+            
+        try:
+            pool.sign_many(outsider.ghid, addresses)
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Pool signed as a non-resident identity.')
+        
+        # Batch methods accept the pool in place of workers.
+        bindings = first_id_2.make_binds_static(_targets(5), workers=pool)
+        for binding in bindings:
+            assert first_id_2.receive_bind_static(
+                binder = first_id_2.second_party,
+                binding = first_id_2.unpack_bind_static(binding.packed)
+            ) == binding.target
+        secrets = [first_id_1.new_secret() for __ in range(3)]
+        plaintexts = [b'hello', b'pooled', b'world']
+        containers = first_id_1.make_containers(
+            secrets, 
+            plaintexts, 
+            workers = pool
+        )
+        for secret, plaintext, container in zip(
+            secrets, plaintexts, containers):
+                assert first_id_1.receive_container(
+                    author = second_id_1,
+                    secret = secret,
+                    container = first_id_1.unpack_container(container.packed)
+                ) == plaintext
+        
+        # Shared secrets match the local derivation, in both directions.
+        partners = [second_id_3, outsider.second_party]
+        shared = pool.derive_shared_many(first_id_2.ghid, partners)
+        assert shared == first_id_2._derive_shared_many(partners)
+        assert (
+            pool.submit_derive_shared(first_id_3.ghid, first_id_2.second_party)
+            .result() == first_id_2._derive_shared(second_id_3)
+        )
+        
+        # Fanned-out requests can derive their MAC keys in the pool.
+        handshake = first_id_2.make_handshake(
+            secret = first_id_2.new_secret(), 
+            target = _targets(1)[0]
+        )
+        recipients = [first_id_3, outsider]
+        fanned = first_id_2.make_requests_fanout(
+            [recipient.second_party for recipient in recipients],
+            handshake,
+            workers = pool
+        )
+        for recipient, garq in zip(recipients, fanned):
+            unpacked = recipient.unpack_request(garq.packed)
+            assert recipient.receive_request(
+                first_id_2.second_party, 
+                unpacked
+            ) == handshake
+        
+        # Requests encrypted for a resident identity decrypt in the pool.
+        requests = [
+            outsider.make_request(
+                recipient = first_id_3.second_party,
+                request = outsider.make_ack(target=target)
+            )
+            for target in _targets(4)
+        ]
+        plaintexts = pool.decrypt_asym_many(
+            first_id_3.ghid, 
+            [request.payload for request in requests]
+        )
+        for request, plaintext in zip(requests, plaintexts):
+            assert plaintext == first_id_3._decrypt_asym(request.payload)
+    
+    
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,177 @@
+'''
+Scratchpad for test-based development. Unit tests for profile.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+# Global dependencies
+import os
+import io
+import time
+import tempfile
+import contextlib
+import cProfile
+import pstats
+
+# These are abnormal (don't use in production) inclusions.
+from golix.profile import OPERATIONS
+from golix.profile import Workload
+from golix.profile import main
+from golix.profile import SamplingProfiler
+from golix.profile import _component
+from golix.profile import _pstats_table
+from golix.utils import _map_ordered
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _check_outputs(prefix):
+    with open(prefix + '.folded') as f:
+        lines = f.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, __, count = line.rpartition(' ')
+        assert stack
+        assert int(count) > 0
+        
+    with open(prefix + '.txt') as f:
+        report = f.read()
+    assert 'Self time by component' in report
+    assert 'Top functions by self time' in report
+    assert 'golix.' in report
+    
+    
+def _spin(seconds):
+    ''' Busy-waits in Python, so that the sampling profiler sees it.
+    '''
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+        
+        
+def run_attribution():
+    # Signing and verifying happen in C, but are still charged to 
+    # cryptography rather than to builtins.
+    workload = Workload(identities=2, cipher=2, mix={'bind_static': 1})
+    workload.setup()
+    profiler = cProfile.Profile()
+    profiler.runcall(workload.run, 30)
+    table = _pstats_table(pstats.Stats(profiler))
+    components = {}
+    for (module, function), (own, __) in table.items():
+        component = _component(module)
+        components[component] = components.get(component, 0) + own
+        if 'Ed25519' in function:
+            assert component == 'cryptography', (module, function)
+    assert components['cryptography'] > components.get('<builtin>', 0)
+    assert any(
+        function.startswith('Ed25519PublicKey.') 
+        for (module, function) in table
+    )
+    
+    # Worker threads are sampled, not just the calling thread (which 
+    # only waits on them).
+    with SamplingProfiler(0.001) as sampler:
+        _map_ordered(_spin, [0.1] * 3, workers=3)
+    spins = sum(
+        count for stack, count in sampler.stacks.items() 
+        if stack[-1][1] == '_spin'
+    )
+    assert spins > sampler.samples // 2, (spins, sampler.samples)
+    
+    
+def run():
+    run_attribution()
+    
+    # Every operation completes a full round trip on every ciphersuite 
+    # that's cheap enough to exercise here.
+    for cipher in (0, 2):
+        mix = {name: 1 for name in OPERATIONS}
+        if cipher == 0:
+            del mix['request']
+        workload = Workload(
+            identities = 2, 
+            cipher = cipher, 
+            mix = mix,
+            payload_sizes = (10, 5000)
+        )
+        assert workload.run(2) == 2 * len(mix)
+        
+    # Ciphersuite 0 only rejects requests when they're asked for.
+    assert 'request' not in Workload(cipher=0).mix
+    assert 'request' in Workload(cipher=2).mix
+    bad = (
+        {'mix': {'nonsense': 1}}, 
+        {'cipher': 0, 'mix': {'request': 1}}, 
+        {'cipher': 7}
+    )
+    for kwargs in bad:
+        try:
+            Workload(**kwargs)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Workload accepted a bad configuration.')
+            
+    with tempfile.TemporaryDirectory() as root:
+        for profiler in ('cprofile', 'sample'):
+            prefix = os.path.join(root, profiler)
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert main([
+                    '--identities', '2',
+                    '--cipher', '2',
+                    '--mix', 'container:3,bind_static:2,request',
+                    '--payload-size', '100',
+                    '--payload-size', '20000',
+                    '--iterations', '20',
+                    '--profiler', profiler,
+                    '--interval', '0.0005',
+                    '--output', prefix
+                ]) == 0
+            _check_outputs(prefix)
+            
+        # The default mix works with ciphersuite 0.
+        prefix = os.path.join(root, 'zero')
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert main([
+                '--cipher', '0', '--iterations', '2', '--output', prefix
+            ]) == 0
+        _check_outputs(prefix)
+        
+        assert os.path.exists(os.path.join(root, 'cprofile.prof'))
+        assert not os.path.exists(os.path.join(root, 'sample.prof'))
+        
+        
+if __name__ == '__main__':
+    run()
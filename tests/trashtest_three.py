@@ -1,12 +1,34 @@
 import trashtest
+import trashtest_antientropy
+import trashtest_chunking
 import trashtest_cipher
 import trashtest_getlow
+import trashtest_inbox
+import trashtest_layout
+import trashtest_metadata
+import trashtest_packfile
+import trashtest_pool
+import trashtest_profile
+import trashtest_utils
+import trashtest_validation
+import trashtest_vault
 import trashtest_spec
 
 def run():
     trashtest_getlow.run()
     trashtest_spec.run()
+    trashtest_layout.run()
     trashtest_cipher.run()
+    trashtest_chunking.run()
+    trashtest_antientropy.run()
+    trashtest_packfile.run()
+    trashtest_metadata.run()
+    trashtest_pool.run()
+    trashtest_inbox.run()
+    trashtest_profile.run()
+    trashtest_utils.run()
+    trashtest_validation.run()
+    trashtest_vault.run()
     trashtest.run()
           
 if __name__ == '__main__':
@@ -0,0 +1,157 @@
+'''
+Scratchpad for test-based development. Unit tests for utils.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import threading
+
+from smartyparse import ParseError
+
+# These are normal inclusions
+from golix import Secret
+
+# These are abnormal (don't use in production) inclusions.
+from golix.utils import cipher_length_lookup
+
+# The smartyparse reference definitions live alongside the tests.
+from _spec import _secret_parser
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _random_secret(cipher):
+    lengths = cipher_length_lookup[cipher]
+    return Secret(
+        cipher = cipher,
+        key = os.urandom(lengths['key']),
+        seed = os.urandom(lengths['seed'])
+    )
+    
+    
+def _expect(error, func, *args):
+    try:
+        func(*args)
+    except error:
+        pass
+    else:
+        raise AssertionError(
+            'Expected ' + error.__name__ + ' from ' + func.__name__
+        )
+    
+    
+def run_secret_codec():
+    reference = _secret_parser
+    for cipher in cipher_length_lookup:
+        secret = _random_secret(cipher)
+        packed = bytes(secret)
+        
+        # Byte-identical to the reference smartyparser, both ways.
+        assert packed == bytes(reference.pack(secret._control))
+        assert Secret.from_bytes(packed) == secret
+        unpacked = reference.unpack(packed)
+        assert bytes(unpacked['key']) == secret.key
+        assert bytes(unpacked['seed']) == secret.seed
+        
+        lengths = cipher_length_lookup[cipher]
+        assert len(packed) == 5 + lengths['key'] + lengths['seed']
+        assert Secret.from_bytes(memoryview(packed)) == secret
+        assert isinstance(Secret.from_bytes(packed).key, bytes)
+        # Trailing data is ignored.
+        assert Secret.from_bytes(packed + b'trailing') == secret
+        
+    packed = bytearray(bytes(_random_secret(1)))
+    _expect(ParseError, Secret.from_bytes, packed[:-1])
+    _expect(ParseError, Secret.from_bytes, b'SH')
+    _expect(ParseError, Secret.from_bytes, b'XX' + packed[2:])
+    bad_version = bytearray(packed)
+    bad_version[3] = 7
+    _expect(ParseError, Secret.from_bytes, bad_version)
+    bad_cipher = bytearray(packed)
+    bad_cipher[4] = 99
+    _expect(ParseError, Secret.from_bytes, bad_cipher)
+    
+    
+def run_pack_many():
+    secrets = [_random_secret(ii % 3) for ii in range(300)]
+    packed = Secret.pack_many(secrets)
+    assert packed == b''.join(bytes(secret) for secret in secrets)
+    assert Secret.unpack_many(packed) == secrets
+    assert Secret.unpack_many(bytearray(packed)) == secrets
+    assert Secret.pack_many([]) == b''
+    assert Secret.unpack_many(b'') == []
+    
+    # Unlike from_bytes, unpack_many doesn't tolerate partial records.
+    _expect(ParseError, Secret.unpack_many, packed[:-1])
+    _expect(ParseError, Secret.unpack_many, packed + b'S')
+    
+    
+def run_threads(threads=8, rounds=300):
+    ''' Packing and unpacking must be safe to run concurrently, including
+    for secrets of different ciphers.
+    '''
+    errors = []
+    barrier = threading.Barrier(threads)
+    
+    def worker(cipher):
+        try:
+            secrets = [_random_secret(cipher) for __ in range(rounds)]
+            barrier.wait()
+            for secret in secrets:
+                assert Secret.from_bytes(bytes(secret)) == secret
+            assert Secret.unpack_many(Secret.pack_many(secrets)) == secrets
+        except Exception as exc:
+            errors.append(exc)
+            
+    workers = [
+        threading.Thread(target=worker, args=(ii % 3,)) 
+        for ii in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if errors:
+        raise errors[0]
+    
+    
+def run():
+    run_secret_codec()
+    run_pack_many()
+    run_threads()
+    
+    
+if __name__ == '__main__':
+    run()
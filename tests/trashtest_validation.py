@@ -0,0 +1,165 @@
+'''
+Scratchpad for test-based development. Unit tests for validation.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import struct
+
+from smartyparse import ParseError
+
+# These are normal inclusions
+from golix import Ghid
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty2
+from golix.cipher import ThirdParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.validation import Limits
+from golix.validation import validate
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _expect_invalid(data, limits=None):
+    try:
+        validate(data, limits)
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('Accepted invalid data.')
+    
+    
+def run():
+    author = FirstParty2()
+    recipient = FirstParty2()
+    secret = author.new_secret()
+    history = [Ghid(1, os.urandom(64)) for __ in range(3)]
+    
+    geoc = author.make_container(secret, b'Hello world')
+    objs = {
+        b'GIDC': author.second_party.packed,
+        b'GEOC': geoc.packed,
+        b'GOBS': author.make_bind_static(geoc.ghid).packed,
+        b'GOBD': author.make_bind_dynamic(
+            geoc.ghid, 
+            ghid_dynamic = Ghid(1, os.urandom(64)),
+            history = history
+        ).packed,
+        b'GDXX': author.make_debind(geoc.ghid).packed,
+        b'GARQ': author.make_request(
+            recipient.second_party, 
+            author.make_handshake(secret, geoc.ghid)
+        ).packed,
+    }
+    for magic, packed in objs.items():
+        assert validate(packed) == magic
+        assert validate(memoryview(packed)) == magic
+    assert validate(geoc.frozen) == b'GEOC'
+    
+    # Declared lengths must exactly match what's available.
+    packed = bytes(geoc.packed)
+    _expect_invalid(packed[:-1])
+    _expect_invalid(packed + b'\x00')
+    _expect_invalid(packed[:9])
+    # len_payload immediately follows the header and the author ghid.
+    hostile = bytearray(packed)
+    struct.pack_into('>Q', hostile, 9 + 65, 2 ** 63)
+    _expect_invalid(hostile)
+    
+    _expect_invalid(b'XXXX' + packed[4:])
+    _expect_invalid(packed[:4] + struct.pack('>I', 99) + packed[8:])
+    _expect_invalid(packed[:8] + b'\x07' + packed[9:])
+    
+    # Configurable limits
+    validate(packed, Limits(max_size=len(packed)))
+    _expect_invalid(packed, Limits(max_size=len(packed) - 1))
+    _expect_invalid(packed, Limits(ciphers={1}))
+    validate(packed, Limits(ciphers={1, 2}))
+    _expect_invalid(packed, Limits(versions={b'GEOC': {13}}))
+    validate(packed, Limits(versions={b'GEOC': {14}, b'GOBD': {15}}))
+    validate(objs[b'GOBD'], Limits(max_history=3))
+    _expect_invalid(objs[b'GOBD'], Limits(max_history=2))
+    # Objects without history are unaffected.
+    validate(packed, Limits(max_history=0))
+    
+    # unpack_any dispatches on the magic, and applies the limits.
+    server = ThirdParty2()
+    assert server.unpack_any(packed).ghid == geoc.ghid
+    for magic, packed in objs.items():
+        assert type(server.unpack_any(packed)).__name__ == magic.decode()
+    server.limits = Limits(max_size=len(objs[b'GIDC']))
+    try:
+        server.unpack_any(objs[b'GOBS'])
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('unpack_any ignored its limits.')
+    assert server.unpack_any(objs[b'GIDC'])
+    
+    # unpack_object is the same path, limits included.
+    try:
+        server.unpack_object(objs[b'GOBS'])
+    except ParseError:
+        pass
+    else:
+        raise AssertionError('unpack_object ignored its limits.')
+    server.limits = None
+    for magic, packed in objs.items():
+        assert type(server.unpack_object(packed)).__name__ == magic.decode()
+        
+    # Every unpack_* method rejects trailing data, and the wrong object.
+    for unpacker, magic in (
+        (server.unpack_identity, b'GIDC'),
+        (server.unpack_container, b'GEOC'),
+        (server.unpack_bind_static, b'GOBS'),
+        (server.unpack_bind_dynamic, b'GOBD'),
+        (server.unpack_debind, b'GDXX'),
+        (server.unpack_request, b'GARQ'),
+        (recipient.unpack_request, b'GARQ'),
+    ):
+        unpacker(objs[magic])
+        for bad in (bytes(objs[magic]) + b'\x00', objs[b'GEOC'][:-1]):
+            try:
+                unpacker(bad)
+            except ParseError:
+                pass
+            else:
+                raise AssertionError('Accepted invalid data.')
+    
+    
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,198 @@
+'''
+Scratchpad for test-based development. Unit tests for vault.py.
+
+LICENSING
+-------------------------------------------------
+
+golix: A python library for Golix protocol object manipulation.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger 
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the 
+    Free Software Foundation, Inc.,
+    51 Franklin Street, 
+    Fifth Floor, 
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import os
+import tempfile
+
+# These are normal inclusions
+from golix import Ghid
+from golix import SecurityError
+
+# These are semi-normal inclusions
+from golix.cipher import FirstParty1
+from golix.cipher import FirstParty2
+
+# These are abnormal (don't use in production) inclusions.
+from golix.vault import SecretVault
+from golix.vault import _MIN_CAPACITY
+from golix.vault import _header
+from golix.vault import _record
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+def _ghids(count):
+    return [Ghid(1, os.urandom(64)) for __ in range(count)]
+    
+    
+def run_storage(root):
+    path = os.path.join(root, 'secrets.gsvt')
+    master = FirstParty2.new_secret()
+    ghids = _ghids(500)
+    secrets = [
+        FirstParty1.new_secret() if ii % 2 else FirstParty2.new_secret()
+        for ii in range(len(ghids))
+    ]
+    
+    with SecretVault(path, master, cache_size=16) as vault:
+        assert len(vault) == 0
+        assert ghids[0] not in vault
+        assert vault.get(ghids[0]) is None
+        
+        vault[ghids[0]] = secrets[0]
+        assert vault[ghids[0]] == secrets[0]
+        # Replacing an existing secret must not change the count.
+        vault.put(ghids[0], secrets[1])
+        assert len(vault) == 1
+        assert vault[ghids[0]] == secrets[1]
+        
+        # Enough to force several rehashes.
+        assert vault.put_many(zip(ghids, secrets)) == len(ghids)
+        assert len(vault) == len(ghids)
+        assert vault._capacity > _MIN_CAPACITY
+        assert set(vault) == set(ghids)
+        
+    # Reopening must find everything, without the cache.
+    with SecretVault(path, master, cache_size=16) as vault:
+        assert len(vault) == len(ghids)
+        for ghid, secret in zip(ghids, secrets):
+            assert ghid in vault
+            assert vault[ghid] == secret
+        assert len(vault._cache) == 16
+        
+        # Deleted slots are skipped by lookups, and reused by puts.
+        for ghid in ghids[:100]:
+            assert vault.discard(ghid)
+        assert not vault.discard(ghids[0])
+        assert len(vault) == len(ghids) - 100
+        for ghid, secret in zip(ghids[100:], secrets[100:]):
+            assert vault[ghid] == secret
+        try:
+            del vault[ghids[0]]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Deleting a missing ghid must raise.')
+        try:
+            vault[ghids[0]]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Discarded secret still in vault.')
+            
+        vault.put_many(zip(ghids[:100], secrets[:100]))
+        assert len(vault) == len(ghids)
+        vault.flush()
+        
+    try:
+        SecretVault(path, FirstParty2.new_secret())
+    except SecurityError:
+        pass
+    else:
+        raise AssertionError('Opened a vault with the wrong master.')
+        
+    # Records are authenticated, so tampering must be caught.
+    with SecretVault(path, master, cache_size=0) as vault:
+        ghid = ghids[0]
+        slot, found = vault._find(bytes(ghid))
+        assert found
+        end = _header.size + ((slot + 1) * _record.size)
+        vault._mmap[end - 1] ^= 1
+        try:
+            vault[ghid]
+        except SecurityError:
+            pass
+        else:
+            raise AssertionError('Tampered record was accepted.')
+            
+            
+def run_containers(root):
+    path = os.path.join(root, 'containers.gsvt')
+    author = FirstParty2()
+    recipient = FirstParty2()
+    
+    secret = author.new_secret()
+    container = author.make_container(secret, b'Hello vault')
+    handshake = author.make_handshake(secret, container.ghid)
+    ack = author.make_ack(container.ghid)
+    requests = [
+        recipient.unpack_request(
+            author.make_request(recipient.second_party, request).packed
+        )
+        for request in (handshake, ack)
+    ]
+    received = recipient.receive_requests([author.second_party], requests)
+    
+    with SecretVault(path, author.new_secret()) as vault:
+        # Acks (and naks) are skipped.
+        assert vault.import_handshakes(received) == 1
+        assert vault[container.ghid] == secret
+        
+        try:
+            recipient.receive_container(
+                author.second_party, None, container
+            )
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('Resolved a secret without a vault.')
+        
+        recipient.vault = vault
+        for ref in (None, container.ghid, secret):
+            plaintext = recipient.receive_container(
+                author.second_party, ref, container
+            )
+            assert plaintext == b'Hello vault'
+            
+        try:
+            recipient.receive_container(
+                author.second_party, _ghids(1)[0], container
+            )
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Resolved a missing secret.')
+    
+    
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        run_storage(root)
+        run_containers(root)
+    
+    
+if __name__ == '__main__':
+    run()